@@ -6,14 +6,23 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from config import Config
 from app.models.database import db_connection
+from app.models.database.entity_cache import entity_cache
+from app.models.database.paging import count_cache
+from app import instrumentation, logging_config, templating
+from app.jobs import job_queue
+from app.passwords import password_hasher
+from finance.report_cache import report_cache
 import os
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Records go through a queue; formatting and I/O happen on a listener thread
+    logging_config.configure_logging(app)
+
     # JWT Configuration
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
     app.config['JWT_TOKEN_LOCATION'] = ['cookies']
@@ -22,17 +31,18 @@ def create_app():
 
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        logging.error(f"Expired token: {jwt_payload}")
+        # Only the subject and token id: claims are not for the logs
+        logger.info("Expired token for subject %s (jti %s)", jwt_payload.get("sub"), jwt_payload.get("jti"))
         return jsonify({"msg": "Token has expired"}), 401
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error_string):
-        logging.error(f"Invalid token: {error_string}")
+        logger.error("Invalid token: %s", error_string)
         return jsonify({"msg": "Invalid token"}), 401
 
     @jwt.unauthorized_loader
     def unauthorized_callback(error_string):
-        logging.error(f"Unauthorized: {error_string}")
+        logger.error("Unauthorized: %s", error_string)
         return jsonify({"msg": "Missing Authorization Header"}), 401
 
     # CSRF Configuration
@@ -50,7 +60,7 @@ def create_app():
 
     # Register blueprints
     with app.app_context():
-        from .routes import users, accounts, transactions, budgets, reports, index, auth
+        from .routes import users, accounts, transactions, budgets, reports, index, auth, health
         app.register_blueprint(users.bp)
         app.register_blueprint(accounts.bp)
         app.register_blueprint(transactions.bp)
@@ -58,15 +68,51 @@ def create_app():
         app.register_blueprint(reports.bp)
         app.register_blueprint(index.bp)
         app.register_blueprint(auth.bp)
+        app.register_blueprint(health.bp)
+        # Probes run every few seconds; they must never be rate limited
+        limiter.exempt(health.bp)
+
+    # Pooled connections are checked out lazily and returned on teardown
+    db_connection.init_app(app)
+
+    # Opt-in: SQL/template timing, Server-Timing header, /metrics and sampled profiles
+    if instrumentation.init_app(app):
+        # Authenticated, and limited separately from the default limits so
+        # a scrape every few seconds still fits
+        app.view_functions['metrics'] = limiter.limit(app.config['METRICS_RATE_LIMIT'])(app.view_functions['metrics'])
 
-    @app.teardown_appcontext
-    def close_db(error):
-        if 'db' in g:
-            g.db.close()
+    # Shared compiled templates, the |money filter and cached_fragment
+    templating.init_app(app)
+
+    report_cache.configure(
+        max_entries=app.config['REPORT_CACHE_SIZE'],
+        ttl=app.config['REPORT_CACHE_TTL'],
+        max_bytes=app.config['REPORT_CACHE_MAX_BYTES']
+    )
 
-    @app.before_request
-    def before_request():
-        g.db = get_db()
+    # A new app may point at a different database
+    entity_cache.clear()
+    report_cache.clear()
+    entity_cache.configure(max_entries=app.config['ENTITY_CACHE_SIZE'], ttl=app.config['ENTITY_CACHE_TTL'])
+    count_cache.configure(ttl=app.config['ADMIN_COUNT_CACHE_TTL'])
+
+    password_hasher.configure(
+        scheme=app.config['PASSWORD_HASH_SCHEME'],
+        rounds=app.config['PASSWORD_HASH_ROUNDS'],
+        iterations=app.config['PASSWORD_HASH_ITERATIONS'],
+        threads=app.config['PASSWORD_HASH_THREADS'] or None,
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+
+    job_queue.configure(
+        db_name=app.config['DB_NAME'],
+        workers=app.config['REPORT_JOB_WORKERS'],
+        max_active=app.config['REPORT_JOB_MAX_ACTIVE'],
+        max_active_per_user=app.config['REPORT_JOB_MAX_PER_USER'],
+        output_dir=app.config['REPORT_JOB_DIR'],
+        timeout=app.config['REPORT_JOB_TIMEOUT'],
+        retention=app.config['REPORT_JOB_RETENTION']
+    )
 
     @app.after_request
     def after_request(response):
@@ -77,10 +123,7 @@ def create_app():
     return app
 
 def get_db():
-    if 'db' not in g:
-        db_name = os.getenv('DB_NAME', 'finance.db')
-        g.db = db_connection.get_connection(db_name)
-    return g.db
+    return db_connection.get_connection(current_app.config.get('DB_NAME'))
 
 if __name__ == "__main__":
     app = create_app()
@@ -0,0 +1,375 @@
+import asyncio
+import contextvars
+import io
+import logging
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
+from flask import render_template
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+from app.jobs import job_queue
+from app.models.database import AccountOperations, BudgetOperations, TransactionOperations, get_connection
+from app.models.database.db_connection import close_pools
+from app.models.database.paging import DEFAULT_PER_PAGE
+from app.models.database.transaction_operations import decode_cursor
+from app.routes.auth import identity_user_id
+from app.routes.reports import wants_report_job
+from app.routes.transactions import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, wants_stream
+from finance.money import DEFAULT_CURRENCY, from_minor
+from finance.report_cache import report_cache
+from finance.report_generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+# The contextvars.Context holding the Flask request context of the request
+# being dispatched; every step of that request runs inside it
+_flask_context = contextvars.ContextVar('flask_context')
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncAPI:
+    # ASGI front for the Flask app. The JSON endpoints below are served on the
+    # event loop: argument parsing happens inline and the SQLite work runs on
+    # a dedicated thread pool, so a slow query holds a DB thread, not a worker.
+    # They run in a Flask request context, so the rate limits, JWT checks and
+    # after_request hooks (CSRF cookie, instrumentation) apply as for the
+    # Flask routes. Every other path goes to the Flask app on the same pool.
+    def __init__(self, flask_app, threads=None):
+        self.flask_app = flask_app
+        self.threads = threads or flask_app.config.get('ASYNC_DB_THREADS') or flask_app.config['DB_POOL_SIZE']
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='async-db')
+        self.routes = [
+            (re.compile(r'/transactions/list'), self.list_transactions),
+            (re.compile(r'/transactions/get/(\d+)'), self.get_transaction),
+            (re.compile(r'/budgets/admin/all'), self.get_all_budgets),
+            (re.compile(r'/generate_report'), self.generate_report),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        if scope['method'] == 'GET':
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match and not self._served_by_flask(handler, scope):
+                    return await self._dispatch(handler, scope, send, *match.groups())
+        return await self._call_wsgi(scope, receive, send)
+
+    async def list_transactions(self, scope, identity, claims):
+        args = _query_args(scope)
+        account_id = _int_arg(args, 'account_id')
+        limit = min(_int_arg(args, 'limit') or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        filters = dict(
+            start_date=args.get('start_date'),
+            end_date=args.get('end_date'),
+            transaction_type=args.get('type'),
+            category=args.get('category'),
+            cursor=args.get('cursor'),
+        )
+        for value in (filters['start_date'], filters['end_date']):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise HTTPError(400, "Dates must be in YYYY-MM-DD format") from None
+        if limit < 1:
+            raise HTTPError(400, "limit must be a positive integer")
+        if filters['cursor']:
+            try:
+                decode_cursor(filters['cursor'])
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+
+        def query():
+            conn = get_connection()
+            currencies = _user_account_currencies(AccountOperations(conn), identity, claims, account_id)
+            if not currencies:
+                return [], None
+            transactions, next_cursor = TransactionOperations(conn).get_transactions_page(
+                account_ids=list(currencies), limit=limit, **filters
+            )
+            return [_major_units(transaction, currencies) for transaction in transactions], next_cursor
+
+        transactions, next_cursor = await self.run(query)
+        return 200, {"transactions": transactions, "next_cursor": next_cursor}
+
+    async def get_transaction(self, scope, identity, claims, transaction_id):
+        def query():
+            conn = get_connection()
+            owner_id = None if claims.get("is_admin", False) else identity
+            transaction = TransactionOperations(conn).get_transaction(int(transaction_id), user_id=owner_id)
+            if transaction is None:
+                raise HTTPError(404, f"Transaction {transaction_id} not found")
+            owner = AccountOperations(conn).get_account_owner(transaction["account_id"])
+            return _major_units(transaction, {transaction["account_id"]: owner[1] if owner else DEFAULT_CURRENCY})
+
+        return 200, await self.run(query)
+
+    async def get_all_budgets(self, scope, identity, claims):
+        if not claims.get("is_admin", False):
+            raise HTTPError(403, "Admin access required")
+        args = _query_args(scope)
+
+        def query():
+            conn = get_connection()
+            try:
+                page = BudgetOperations(conn).get_all_budgets(
+                    page=_int_arg(args, 'page') or 1,
+                    per_page=_int_arg(args, 'per_page') or DEFAULT_PER_PAGE,
+                    sort=args.get('sort') or 'id',
+                    user_id=_int_arg(args, 'user_id'),
+                    category=args.get('category') or None
+                )
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+            currencies = AccountOperations(conn).get_user_currencies(budget.user_id for budget in page.items)
+            return {"budgets": [budget.to_dict(currencies[budget.user_id]) for budget in page.items], **page.meta()}
+
+        return 200, await self.run(query)
+
+    async def generate_report(self, scope, identity, claims):
+        args = _query_args(scope)
+        user_id = _int_arg(args, 'user_id') or identity
+        if user_id != identity and not claims.get("is_admin", False):
+            raise HTTPError(403, "Unauthorized access")
+        start_date = args.get('start_date') or (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        end_date = args.get('end_date') or datetime.now().strftime('%Y-%m-%d')
+        engine = args.get('engine') or self.flask_app.config.get('REPORT_ENGINE', 'sql')
+
+        def build():
+            try:
+                report_generator = ReportGenerator(get_connection(), engine=engine, cache=report_cache)
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+            report = report_generator.generate_report(user_id, start_date, end_date)
+            return render_template('report.html', report=report)
+
+        return 200, await self.run(build)
+
+    async def run(self, fn, *args):
+        # fn runs in the request's Flask context, which holds the pooled
+        # connection; it is returned to the pool when the context is popped.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _flask_context.get().run, fn, *args)
+
+    # Helper methods
+    def _served_by_flask(self, handler, scope):
+        # Queued reports (PDF, charts) are enqueued by the Flask route, and
+        # NDJSON transaction streams come from its generator
+        if handler == self.generate_report:
+            return wants_report_job(_query_args(scope))
+        if handler == self.list_transactions:
+            return wants_stream(_query_args(scope), parse_accept_header(_header(scope, b'accept'), MIMEAccept))
+        if handler == self.get_all_budgets:
+            # Browsers get the admin_budgets.html page and its redirects
+            return _header(scope, b'content-type') != 'application/json'
+        return False
+
+    async def _dispatch(self, handler, scope, send, *params):
+        _flask_context.set(contextvars.Context())
+        request_context = self.flask_app.request_context(_wsgi_environ(scope, io.BytesIO()))
+        error = None
+        try:
+            rv, auth = await self.run(self._begin_request, request_context)
+            if rv is None:
+                try:
+                    status, body = await handler(scope, *auth, *params)
+                    rv = body, status
+                except HTTPError as e:
+                    rv = {"error": str(e)}, e.status
+                except PermissionError as e:
+                    rv = {"error": str(e)}, 403
+                except ValueError as e:
+                    rv = {"error": str(e)}, 404
+                except Exception as e:
+                    logger.exception("Error in async %s", scope['path'])
+                    error = e
+                    rv = {"error": str(e)}, 500
+            response = await self.run(self.flask_app.finalize_request, rv)
+        finally:
+            await self.run(request_context.pop, error)
+        await _respond(send, response)
+
+    def _begin_request(self, request_context):
+        # Limits and before_request hooks first, then the same access token
+        # check as @jwt_required(); a rejection comes back as Flask's response
+        request_context.push()
+        try:
+            rv = self.flask_app.preprocess_request()
+            if rv is not None:
+                return rv, None
+            verify_jwt_in_request()
+            claims = get_jwt()
+            return None, (identity_user_id(claims[self.flask_app.config['JWT_IDENTITY_CLAIM']]), claims)
+        except Exception as e:
+            return self.flask_app.handle_user_exception(e), None
+
+    async def _call_wsgi(self, scope, receive, send):
+        # The Flask app runs on a pool thread and reaches the server through
+        # the loop: the request body is received as the app reads it and each
+        # response chunk is sent as it is produced, so uploads and streamed
+        # exports stay in constant memory. A slow client holds the thread.
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        body = io.BufferedReader(_RequestBody(receive, loop))
+        await loop.run_in_executor(self.executor, self._run_wsgi, _wsgi_environ(scope, body), send_from_thread)
+
+    def _run_wsgi(self, environ, send):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+        result = self.flask_app.wsgi_app(environ, start_response)
+        started = False
+        try:
+            # start_response may be deferred until the first chunk
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not started:
+                    send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                    started = True
+                send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not started:
+                send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+            send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                job_queue.shutdown()
+                close_pools()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+class _RequestBody(io.RawIOBase):
+    # wsgi.input fed from ASGI receive() on the event loop, one message at a time
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = memoryview(b'')
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._more = False
+                break
+            self._buffer = memoryview(message.get('body', b''))
+            self._more = message.get('more_body', False)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _user_account_currencies(acc_db, identity, claims, account_id=None):
+    if account_id:
+        _, currency = _owned_account(acc_db, account_id, identity, claims)
+        return {account_id: currency}
+    return {account.id: account.currency for account in acc_db.get_user_accounts(identity)}
+
+
+def _owned_account(acc_db, account_id, identity, claims):
+    # (user_id, currency) of the account, if identity may use it
+    owner = acc_db.get_account_owner(account_id)
+    if owner is None:
+        raise ValueError(f"Account {account_id} not found")
+    if owner[0] != identity and not claims.get("is_admin", False):
+        raise PermissionError("Unauthorized access to this account")
+    return owner
+
+
+def _major_units(transaction, currencies):
+    currency = currencies.get(transaction["account_id"], DEFAULT_CURRENCY)
+    return {**transaction, "amount": float(from_minor(transaction["amount"], currency))}
+
+
+def _query_args(scope):
+    return {name: values[0] for name, values in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+
+
+def _int_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer") from None
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', ()):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def _respond(send, response):
+    body = response.get_data()
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        # Without a Content-Length the body is read until the client's last message
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
@@ -1,13 +1,15 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, FloatField, SubmitField
-from wtforms.validators import DataRequired, NumberRange
+from wtforms import StringField, DecimalField, SubmitField
+from wtforms.validators import DataRequired, Length, NumberRange
+from finance.money import DEFAULT_CURRENCY
 
 class AccountForm(FlaskForm):
     account_name = StringField('Account Name', validators=[DataRequired()])
-    initial_balance = FloatField('Initial Balance', validators=[DataRequired(), NumberRange(min=0)])
+    initial_balance = DecimalField('Initial Balance', places=2, validators=[DataRequired(), NumberRange(min=0)])
+    currency = StringField('Currency', default=DEFAULT_CURRENCY, validators=[DataRequired(), Length(min=3, max=3)])
     submit = SubmitField('Add Account')
 
 class AccountUpdateForm(FlaskForm):
     account_name = StringField('Account Name', validators=[DataRequired()])
-    new_balance = FloatField('New Balance', validators=[DataRequired(), NumberRange(min=0)])
+    new_balance = DecimalField('New Balance', places=2, validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Update Account')
\ No newline at end of file
@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import DateField, FloatField, HiddenField, IntegerField, SelectField, StringField, PasswordField, SubmitField, BooleanField
+from wtforms import DateField, DecimalField, HiddenField, IntegerField, SelectField, StringField, PasswordField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, Regexp, NumberRange
 from app.models.database import get_connection, UserOperations
 
@@ -11,10 +11,8 @@ class RegistrationForm(FlaskForm):
     submit = SubmitField('Sign Up')
 
     def validate_email(self, email):
-        db = get_connection()
-        user_ops = UserOperations(db)
-        user = user_ops.get_user_by_email(email.data)
-        if user:
+        # The only duplicate check before the insert; the UNIQUE index catches races
+        if UserOperations(get_connection()).email_exists(email.data):
             raise ValidationError('That email is already registered. Please choose a different one.')
 
 class LoginForm(FlaskForm):
@@ -33,12 +31,12 @@ class AdminCreationForm(FlaskForm):
 
 class BudgetForm(FlaskForm):
     budget_name = StringField('Budget Name', validators=[DataRequired()])
-    initial_amount = FloatField('Initial Amount', validators=[DataRequired(), NumberRange(min=0)])
+    initial_amount = DecimalField('Initial Amount', places=2, validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Add Budget')
 
 class UpdateBudgetForm(FlaskForm):
     category_name = StringField('Category Name', validators=[DataRequired(), Length(min=1, max=100)])
-    new_amount = FloatField('New Amount', validators=[DataRequired()])
+    new_amount = DecimalField('New Amount', places=2, validators=[DataRequired()])
     submit = SubmitField('Update Budget')
 
 #transactions
@@ -46,7 +44,7 @@ class UpdateBudgetForm(FlaskForm):
 class TransactionForm(FlaskForm):
     account_id = IntegerField('Account ID', validators=[DataRequired()])
     date = DateField('Date', validators=[DataRequired()])
-    amount = FloatField('Amount', validators=[DataRequired(), NumberRange(min=0.01)])
+    amount = DecimalField('Amount', places=2, validators=[DataRequired(), NumberRange(min=0.01)])
     type = SelectField('Type', choices=[('income', 'Income'), ('expense', 'Expense')], validators=[DataRequired()])
     description = StringField('Description', validators=[DataRequired()])
     category_name = StringField('Category', validators=[DataRequired()])
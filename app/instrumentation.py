@@ -0,0 +1,356 @@
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import threading
+import time
+from flask import Response, g, has_request_context, jsonify, request, template_rendered, before_render_template
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_QUERY_LABEL = 200
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    # Literals and IN (?, ?, ...) lists are collapsed so one statement shape
+    # maps to one metrics series.
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _PLACEHOLDER_LIST.sub("(?)", sql)
+    return sql[:MAX_QUERY_LABEL]
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=REQUEST_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._queries = {}
+        self._templates = {}
+        self._fragments = {}
+
+    def record_request(self, endpoint, method, status, wall, sql_time, sql_count, template_time):
+        with self._lock:
+            stats = self._requests.setdefault((endpoint, method, str(status)), {
+                "count": 0, "seconds": 0.0, "sql_seconds": 0.0, "sql_queries": 0,
+                "template_seconds": 0.0, "buckets": [0] * len(self.buckets),
+            })
+            stats["count"] += 1
+            stats["seconds"] += wall
+            stats["sql_seconds"] += sql_time
+            stats["sql_queries"] += sql_count
+            stats["template_seconds"] += template_time
+            for i, bound in enumerate(self.buckets):
+                if wall <= bound:
+                    stats["buckets"][i] += 1
+
+    def record_query(self, endpoint, query, seconds, count=1):
+        # Fetches add their time to the statement that produced the rows
+        # with count=0, so counts stay one per execute
+        with self._lock:
+            stats = self._queries.setdefault((endpoint, query), [0, 0.0])
+            stats[0] += count
+            stats[1] += seconds
+
+    def record_template(self, template, seconds):
+        with self._lock:
+            stats = self._templates.setdefault(template, [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+
+    def record_fragment(self, fragment, hit):
+        with self._lock:
+            stats = self._fragments.setdefault(fragment, [0, 0])
+            stats[0 if hit else 1] += 1
+
+    def render(self):
+        with self._lock:
+            requests = {key: dict(value, buckets=list(value["buckets"])) for key, value in self._requests.items()}
+            queries = {key: list(value) for key, value in self._queries.items()}
+            templates = {key: list(value) for key, value in self._templates.items()}
+            fragments = {key: list(value) for key, value in self._fragments.items()}
+
+        lines = [
+            "# HELP finance_request_duration_seconds Request wall time.",
+            "# TYPE finance_request_duration_seconds histogram",
+        ]
+        for (endpoint, method, status), stats in sorted(requests.items()):
+            labels = _labels(endpoint=endpoint, method=method, status=status)
+            for bound, count in zip(self.buckets, stats["buckets"]):
+                lines.append(f'finance_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'finance_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["count"]}')
+            lines.append(f"finance_request_duration_seconds_sum{{{labels}}} {stats['seconds']:.6f}")
+            lines.append(f"finance_request_duration_seconds_count{{{labels}}} {stats['count']}")
+
+        for name, key, help in (
+            ("finance_request_sql_seconds_total", "sql_seconds", "Time spent in SQL execute calls."),
+            ("finance_request_sql_queries_total", "sql_queries", "SQL execute calls."),
+            ("finance_request_template_seconds_total", "template_seconds", "Time spent rendering templates."),
+        ):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+            for (endpoint, method, status), stats in sorted(requests.items()):
+                labels = _labels(endpoint=endpoint, method=method, status=status)
+                value = stats[key]
+                lines.append(f"{name}{{{labels}}} {value:.6f}" if isinstance(value, float) else f"{name}{{{labels}}} {value}")
+
+        lines += [
+            "# HELP finance_sql_query_seconds Time per normalized SQL statement.",
+            "# TYPE finance_sql_query_seconds summary",
+        ]
+        for (endpoint, query), (count, seconds) in sorted(queries.items()):
+            labels = _labels(endpoint=endpoint, query=query)
+            lines.append(f"finance_sql_query_seconds_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"finance_sql_query_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP finance_template_render_seconds Render time per template (fragment:<name> for cache misses).",
+            "# TYPE finance_template_render_seconds summary",
+        ]
+        for template, (count, seconds) in sorted(templates.items()):
+            labels = _labels(template=template)
+            lines.append(f"finance_template_render_seconds_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"finance_template_render_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP finance_template_fragment_cache_total Cached fragment lookups.",
+            "# TYPE finance_template_fragment_cache_total counter",
+        ]
+        for fragment, (hits, misses) in sorted(fragments.items()):
+            lines.append(f"finance_template_fragment_cache_total{{{_labels(fragment=fragment, result='hit')}}} {hits}")
+            lines.append(f"finance_template_fragment_cache_total{{{_labels(fragment=fragment, result='miss')}}} {misses}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._queries.clear()
+            self._templates.clear()
+            self._fragments.clear()
+
+
+class InstrumentedCursor:
+    # Times execute and, against the same statement, the fetches that read
+    # its rows: SQLite does most of a SELECT's work while stepping through
+    # the result, not in execute.
+    FETCH_BATCH = 256
+
+    def __init__(self, cursor, registry, sql=None):
+        self._cursor = cursor
+        self._registry = registry
+        self._sql = sql
+
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        with _timed(self._registry, sql):
+            self._cursor.execute(sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        with _timed(self._registry, sql):
+            self._cursor.executemany(sql, seq_of_parameters)
+        return self
+
+    def fetchone(self):
+        with _timed(self._registry, self._sql, fetch=True):
+            return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        with _timed(self._registry, self._sql, fetch=True):
+            return self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+
+    def fetchall(self):
+        with _timed(self._registry, self._sql, fetch=True):
+            return self._cursor.fetchall()
+
+    def __iter__(self):
+        # Timed per batch rather than per row
+        while True:
+            rows = self.fetchmany(self.FETCH_BATCH)
+            if not rows:
+                return
+            yield from rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # row_factory and arraysize belong to the wrapped cursor
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+
+class InstrumentedConnection:
+    # Wraps the pooled sqlite3.Connection for one request; everything but
+    # the execute family is passed straight through.
+    def __init__(self, conn, registry):
+        self._conn = conn
+        self._registry = registry
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._registry)
+
+    def execute(self, sql, parameters=()):
+        with _timed(self._registry, sql):
+            cursor = self._conn.execute(sql, parameters)
+        return InstrumentedCursor(cursor, self._registry, sql)
+
+    def executemany(self, sql, seq_of_parameters):
+        with _timed(self._registry, sql):
+            cursor = self._conn.executemany(sql, seq_of_parameters)
+        return InstrumentedCursor(cursor, self._registry, sql)
+
+    def executescript(self, script):
+        with _timed(self._registry, script):
+            return self._conn.executescript(script)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def init_app(app, registry=None):
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return None
+
+    registry = registry or MetricsRegistry()
+    app.extensions['instrumentation'] = registry
+    app.extensions['db_connection_wrapper'] = lambda conn: InstrumentedConnection(conn, registry)
+
+    slow_threshold = app.config.get('PROFILE_SLOW_REQUEST_MS', 500) / 1000
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    profile_dir = app.config.get('PROFILE_DIR', 'profiles')
+
+    @app.before_request
+    def start_request_timer():
+        g.request_metrics = {"started": time.perf_counter(), "sql_time": 0.0, "sql_count": 0, "template_time": 0.0}
+        if sample_rate and random.random() < sample_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                return
+            g.request_profiler = profiler
+
+    @app.after_request
+    def record_request(response):
+        metrics = g.pop("request_metrics", None)
+        if metrics is None:
+            return response
+        wall = time.perf_counter() - metrics["started"]
+        profiler = g.pop("request_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            if wall >= slow_threshold:
+                _dump_profile(profiler, profile_dir, request.endpoint, wall)
+
+        registry.record_request(
+            request.endpoint or "unmatched", request.method, response.status_code,
+            wall, metrics["sql_time"], metrics["sql_count"], metrics["template_time"]
+        )
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={wall * 1000:.2f}, '
+            f'sql;dur={metrics["sql_time"] * 1000:.2f};desc="{metrics["sql_count"]} queries", '
+            f'tpl;dur={metrics["template_time"] * 1000:.2f}'
+        )
+        return response
+
+    def template_started(sender, template, context, **extra):
+        if has_request_context() and "request_metrics" in g:
+            g.request_template_started = time.perf_counter()
+
+    def template_finished(sender, template, context, **extra):
+        started = g.pop("request_template_started", None) if has_request_context() else None
+        if started is not None and "request_metrics" in g:
+            seconds = time.perf_counter() - started
+            g.request_metrics["template_time"] += seconds
+            registry.record_template(template.name or "<string>", seconds)
+
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
+
+    metrics_token = app.config.get('METRICS_TOKEN')
+
+    @app.route('/metrics')
+    def metrics():
+        # Query shapes and per-endpoint timings are not public: scrapers send
+        # "Authorization: Bearer <METRICS_TOKEN>", people an admin JWT
+        if not _metrics_authorized(app, metrics_token):
+            return jsonify({"error": "Metrics require the metrics token or an admin login"}), 401
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    logger.info("Request instrumentation enabled (profile sample rate %s, slow threshold %ss)", sample_rate, slow_threshold)
+    return registry
+
+
+# Helper methods
+def _metrics_authorized(app, metrics_token):
+    if metrics_token:
+        header = request.headers.get('Authorization', '')
+        if hmac.compare_digest(header.encode(), f"Bearer {metrics_token}".encode()):
+            return True
+    if 'flask-jwt-extended' not in app.extensions:
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+    return bool(get_jwt().get("is_admin", False))
+
+
+class _timed:
+    # fetch=True adds the time to the statement without counting a query
+    def __init__(self, registry, sql, fetch=False):
+        self.registry = registry
+        self.sql = sql
+        self.fetch = fetch
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        endpoint = "none"
+        if has_request_context():
+            endpoint = request.endpoint or "unmatched"
+            metrics = g.get("request_metrics")
+            if metrics is not None:
+                metrics["sql_time"] += elapsed
+                if not self.fetch:
+                    metrics["sql_count"] += 1
+        self.registry.record_query(endpoint, normalize_sql(self.sql or ""), elapsed, count=0 if self.fetch else 1)
+
+
+def _dump_profile(profiler, profile_dir, endpoint, wall):
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{endpoint or 'unmatched'}-{int(time.time() * 1000)}-{wall * 1000:.0f}ms.prof")
+    profiler.dump_stats(path)
+    logger.warning("Slow request %s took %.0fms, profile written to %s", endpoint, wall * 1000, path)
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,199 @@
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.models.database import JobOperations, RollupOperations, get_connection
+from app.templating import template_env
+from finance.money import from_minor
+from finance.report_generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class FormatUnavailableError(Exception):
+    pass
+
+
+class JobQueue:
+    # Heavy reports (PDF, charts) run in a local process pool so they hold a
+    # pool process, not a web worker; the report_jobs table is the source of
+    # truth for status, so any web process can answer status and download
+    # requests. The pool is per process and created on first use, after
+    # gunicorn has forked.
+    def __init__(self, workers=2, max_active=100, max_active_per_user=3, output_dir="report_jobs", timeout=1800, retention=86400):
+        self.db_name = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.configure(workers=workers, max_active=max_active, max_active_per_user=max_active_per_user,
+                       output_dir=output_dir, timeout=timeout, retention=retention)
+
+    def configure(self, db_name=None, workers=None, max_active=None, max_active_per_user=None, output_dir=None, timeout=None, retention=None):
+        if db_name is not None:
+            self.db_name = db_name
+        if workers is not None:
+            self.workers = workers
+        if max_active is not None:
+            self.max_active = max_active
+        if max_active_per_user is not None:
+            self.max_active_per_user = max_active_per_user
+        if output_dir is not None:
+            # Pool processes may not share the web process's working directory
+            self.output_dir = os.path.abspath(output_dir)
+        if timeout is not None:
+            self.timeout = timeout
+        if retention is not None:
+            self.retention = retention
+
+    def enqueue(self, conn, user_id, format, params):
+        # pdfkit renders through the wkhtmltopdf binary; without it every
+        # PDF job would fail in the pool
+        if format == "pdf" and shutil.which("wkhtmltopdf") is None:
+            raise FormatUnavailableError("PDF reports are not available: wkhtmltopdf is not installed")
+        # Abandoned jobs would otherwise count against the limits forever
+        self.sweep(conn)
+        job_id = JobOperations(conn).create_job(user_id, format, params, self.max_active, self.max_active_per_user, owner_pid=os.getpid())
+        try:
+            future = self._submit(job_id)
+        except Exception as e:
+            logger.error("Could not start report job %s: %s", job_id, e)
+            JobOperations(conn).fail_job(job_id, str(e))
+            raise
+        future.add_done_callback(lambda future: self._job_done(job_id, future))
+        return job_id
+
+    def sweep(self, conn):
+        # Fails abandoned jobs and deletes result files older than retention
+        jobs_db = JobOperations(conn)
+        jobs_db.fail_stale_jobs(self.timeout)
+        for path in jobs_db.expire_jobs(self.retention):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not delete report file %s: %s", path, e)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    # Helper methods
+    def _submit(self, job_id):
+        args = (run_report_job, self.db_name, job_id, self.output_dir)
+        try:
+            return self._executor().submit(*args)
+        except BrokenProcessPool:
+            # A pool process died (e.g. OOM killed); start a fresh pool
+            logger.warning("Report job pool was broken, restarting it")
+            with self._lock:
+                self._pool = None
+            return self._executor().submit(*args)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                # spawn, not fork: the web process has threads (pools, logging)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                self._pid = os.getpid()
+            return self._pool
+
+    def _job_done(self, job_id, future):
+        # run_report_job records its own failures; this catches the ones it
+        # cannot, like the pool process dying mid-job.
+        error = future.exception()
+        if error is None:
+            return
+        logger.error("Report job %s failed in the pool: %s", job_id, error)
+        conn = get_connection(self.db_name)
+        try:
+            JobOperations(conn).fail_job(job_id, str(error) or type(error).__name__)
+        finally:
+            conn.close()
+
+
+def run_report_job(db_name, job_id, output_dir):
+    # Runs in a pool process, outside any app context, on its own connection
+    conn = get_connection(db_name)
+    jobs_db = JobOperations(conn)
+    try:
+        if not jobs_db.start_job(job_id):
+            return None
+        job = jobs_db.get_job(job_id)
+        params = job["params"]
+        report_generator = ReportGenerator(conn, engine=params.get("engine", "sql"))
+        report = report_generator.generate_report(job["user_id"], params.get("start_date"), params.get("end_date"))
+        if not isinstance(report, dict):
+            raise ValueError(report)
+        charts = _render_charts(conn, job["user_id"], params) if params.get("charts") else []
+        html = template_env().get_template("report.html").render(report=report, charts=charts)
+
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"report-{job_id}.{job['format']}")
+        if job["format"] == "pdf":
+            import pdfkit
+            pdfkit.from_string(html, path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        jobs_db.finish_job(job_id, path)
+        return path
+    except Exception as e:
+        logger.error("Report job %s failed: %s", job_id, e)
+        jobs_db.fail_job(job_id, str(e) or type(e).__name__)
+        return None
+    finally:
+        conn.close()
+
+
+def _render_charts(conn, user_id, params):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+
+    # Amounts in different currencies cannot be added up, so each currency
+    # gets its own charts
+    rollups = RollupOperations(conn)
+    charts = []
+    for (currency,) in conn.execute("SELECT DISTINCT currency FROM accounts WHERE user_id = ? ORDER BY currency", (user_id,)).fetchall():
+        expenses = {}
+        net_by_day = {}
+        for day, type, category_name, total in rollups.get_daily_totals(user_id, params.get("start_date"), params.get("end_date"), currency):
+            amount = float(from_minor(total, currency))
+            if type == "Income":
+                net_by_day[day] = net_by_day.get(day, 0) + amount
+            else:
+                expenses[category_name] = expenses.get(category_name, 0) + amount
+                net_by_day[day] = net_by_day.get(day, 0) - amount
+
+        if expenses:
+            figure, axes = pyplot.subplots(figsize=(8, 4))
+            axes.bar(list(expenses), list(expenses.values()))
+            axes.set_title(f"Expenses by category ({currency})")
+            axes.tick_params(axis="x", labelrotation=45)
+            charts.append(_png(figure, pyplot))
+        if net_by_day:
+            figure, axes = pyplot.subplots(figsize=(8, 4))
+            axes.plot(list(net_by_day), list(net_by_day.values()), marker="o")
+            axes.set_title(f"Net cash flow per day ({currency})")
+            axes.tick_params(axis="x", labelrotation=45)
+            charts.append(_png(figure, pyplot))
+    return charts
+
+
+def _png(figure, pyplot):
+    buffer = io.BytesIO()
+    figure.tight_layout()
+    figure.savefig(buffer, format="png")
+    pyplot.close(figure)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+job_queue = JobQueue()
@@ -0,0 +1,112 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from flask import has_request_context, request
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("endpoint", "method", "path"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestQueueHandler(logging.handlers.QueueHandler):
+    # Like the stock prepare(), the message is rendered on the calling thread,
+    # so args mutated after the call cannot change what is logged; records
+    # below the level never get here. The record is also tagged with its
+    # request. Formatting (JSON, timestamps, tracebacks) and I/O stay on the
+    # listener thread.
+    def prepare(self, record):
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if has_request_context():
+            record.endpoint = request.endpoint
+            record.method = request.method
+            record.path = request.path
+        return record
+
+
+def configure_logging(app):
+    global _listener
+    stop_logging()
+
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(app.config.get('LOG_QUEUE_SIZE', -1))
+    root = logging.getLogger()
+    # Handlers the host installed (e.g. pytest's caplog) stay; only one made
+    # by an earlier call is replaced
+    for existing in root.handlers[:]:
+        if isinstance(existing, RequestQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(RequestQueueHandler(log_queue))
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    for name, level in parse_levels(app.config.get('LOG_LEVELS', '')).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    # Flushes whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # Only the forking thread survives fork, so a worker forked from a
+    # preloaded app gets a fresh queue (its lock may have been held) and its
+    # own listener thread.
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(_listener.queue.maxsize)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, RequestQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def parse_levels(spec):
+    # "app.routes=DEBUG,finance=WARNING" -> {"app.routes": "DEBUG", "finance": "WARNING"}
+    if isinstance(spec, dict):
+        return spec
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        if not level:
+            raise ValueError(f"Invalid log level setting: {item}")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
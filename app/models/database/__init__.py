@@ -1,14 +1,23 @@
-from .db_connection import get_connection, create_tables
+from .db_connection import get_connection, get_pool, release_connection, create_tables
+from .migrations import migrate, get_schema_version
 from .user_operations import UserOperations
 from .account_operations import AccountOperations
 from .transaction_operations import TransactionOperations
 from .budget_operations import BudgetOperations
+from .rollup_operations import RollupOperations
+from .job_operations import JobOperations
 
 __all__ = [
     'get_connection',
+    'get_pool',
+    'release_connection',
     'create_tables',
+    'migrate',
+    'get_schema_version',
     'UserOperations',
     'AccountOperations',
     'TransactionOperations',
-    'BudgetOperations'
+    'BudgetOperations',
+    'RollupOperations',
+    'JobOperations'
 ]
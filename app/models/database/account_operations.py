@@ -1,29 +1,62 @@
 import logging
 import sqlite3
 from finance.account import Account
+from finance.money import DEFAULT_CURRENCY
+from finance.report_cache import report_cache
+from .entity_cache import entity_cache
+from .rollup_operations import SIGNED_AMOUNT
+
+logger = logging.getLogger(__name__)
 
 class AccountOperations:
     def __init__(self, conn):
         self.conn = conn
 
-    def add_account(self, user_id, name, balance):
-        account = Account(None, user_id, name, balance)
+    def add_account(self, user_id, name, balance, currency=DEFAULT_CURRENCY):
+        account = Account(None, user_id, name, balance, currency)
         account.validate()
         self._execute_query(
-            'INSERT INTO accounts (user_id, name, balance) VALUES (?, ?, ?)',
-            (account.user_id, account.name, account.balance)
+            'INSERT INTO accounts (user_id, name, balance, currency) VALUES (?, ?, ?, ?)',
+            (account.user_id, account.name, account.balance, account.currency)
         )
-        logging.info(f"Account added for user {user_id}: {name} with balance {balance}")
+        report_cache.invalidate_user(user_id)
+        logger.info("Account added for user %s: %s with balance %s", user_id, name, balance)
 
     def get_account(self, id):
-        query = "SELECT id, user_id, name, balance FROM accounts WHERE id = ?"
+        query = "SELECT id, user_id, name, balance, currency FROM accounts WHERE id = ?"
         row = self.conn.execute(query, (id,)).fetchone()
-        return Account(*row) if row else None
+        return Account.from_row(row) if row else None
+
+    def get_account_owner(self, id):
+        # (user_id, currency) for ownership checks and amount conversion.
+        # Neither changes after creation, so it is cached process-wide.
+        def load():
+            row = self.conn.execute("SELECT user_id, currency FROM accounts WHERE id = ?", (id,)).fetchone()
+            return tuple(row) if row else None
+        return entity_cache.get("account_owner", id, load)
 
     def get_user_accounts(self, user_id):  # Changed method name from get_accounts to get_user_accounts
-        query = "SELECT id, user_id, name, balance FROM accounts WHERE user_id = ?"
+        query = "SELECT id, user_id, name, balance, currency FROM accounts WHERE user_id = ?"
         rows = self.conn.execute(query, (user_id,)).fetchall()
-        return [Account(*row) for row in rows] if rows else []
+        return [Account.from_row(row) for row in rows] if rows else []
+
+    def get_user_currency(self, user_id):
+        return self.get_user_currencies([user_id])[user_id]
+
+    def get_user_currencies(self, user_ids):
+        # Budgets and cash flow are per user, not per account; they are kept
+        # in the user's account currency when there is only one.
+        user_ids = list(set(user_ids))
+        currencies = dict.fromkeys(user_ids, DEFAULT_CURRENCY)
+        if user_ids:
+            placeholders = ", ".join("?" * len(user_ids))
+            rows = self.conn.execute(
+                f"SELECT user_id, MIN(currency) FROM accounts WHERE user_id IN ({placeholders}) "
+                "GROUP BY user_id HAVING COUNT(DISTINCT currency) = 1",
+                user_ids
+            ).fetchall()
+            currencies.update((user_id, currency) for user_id, currency in rows)
+        return currencies
 
     def update_account(self, id, account_name, balance):
         account = self.get_account(id)
@@ -35,26 +68,66 @@ class AccountOperations:
             params = (account.name, account.balance, id)
             try:
                 with self.conn:
+                    # A manual balance edit moves the opening balance with it,
+                    # so reconcile keeps matching the transactions
+                    self.conn.execute(
+                        "UPDATE accounts SET opening_balance = opening_balance + (? - balance) WHERE id = ?",
+                        (account.balance, id)
+                    )
                     self.conn.execute(query, params)
                     self.conn.commit()
-                logging.info(f"Account {id} updated to name: {account_name} with balance: {balance}")
+                report_cache.invalidate_user(account.user_id)
+                logger.info("Account %s updated to name: %s with balance: %s", id, account_name, balance)
             except sqlite3.Error as e:
-                logging.error(f"Error updating account: {e}")
+                logger.error("Error updating account: %s", e)
                 raise
 
     def delete_account(self, id):
         with self.conn:
             self.conn.execute("DELETE FROM accounts WHERE id = ?", (id,))
             self.conn.execute("DELETE FROM transactions WHERE id = ?", (id,))
-        logging.info(f"Account {id} and all related transactions deleted")
+        entity_cache.invalidate("account_owner", id)
+        report_cache.invalidate_account(id)
+        logger.info("Account %s and all related transactions deleted", id)
+
+    def check_balances(self, account_ids=None):
+        # One grouped pass over idx_transactions_account_type_amount; pass
+        # account_ids to check only the accounts a job touched. Amounts are
+        # integer minor units, so any difference is real drift.
+        query = f"""
+            SELECT a.id, a.balance, a.opening_balance + COALESCE(SUM({SIGNED_AMOUNT}), 0) AS expected
+            FROM accounts a
+            LEFT JOIN transactions t ON t.account_id = a.id
+        """
+        params = []
+        if account_ids is not None:
+            query += f" WHERE a.id IN ({', '.join('?' for _ in account_ids)})"
+            params.extend(account_ids)
+        query += " GROUP BY a.id HAVING a.balance != expected"
+        return [
+            {"account_id": row[0], "balance": row[1], "expected": row[2], "difference": row[1] - row[2]}
+            for row in self.conn.execute(query, params).fetchall()
+        ]
+
+    def repair_balances(self, account_ids=None):
+        mismatches = self.check_balances(account_ids)
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE accounts SET balance = ? WHERE id = ?",
+                [(mismatch["expected"], mismatch["account_id"]) for mismatch in mismatches]
+            )
+        for mismatch in mismatches:
+            report_cache.invalidate_account(mismatch["account_id"])
+            logger.warning("Account %s balance repaired: %s -> %s", mismatch["account_id"], mismatch["balance"], mismatch["expected"])
+        return mismatches
 
     def _execute_query(self, query, params=()):
         try:
             with self.conn:
                 self.conn.execute(query, params)
         except sqlite3.IntegrityError as e:
-            logging.error(f"IntegrityError: {e}")
+            logger.error("IntegrityError: %s", e)
             raise
         except sqlite3.OperationalError as e:
-            logging.error(f"OperationalError: {e}")
+            logger.error("OperationalError: %s", e)
             raise
\ No newline at end of file
@@ -1,6 +1,13 @@
 import logging
 import sqlite3
 from finance.budget import Budget
+from finance.report_cache import report_cache
+from .paging import DEFAULT_PER_PAGE, fetch_page, order_by, prefix_range
+
+logger = logging.getLogger(__name__)
+
+# Admin list sort keys; each is backed by an index so a page is an index walk
+BUDGET_SORTS = {"id": "id", "category": "category_name", "amount": "amount"}
 
 class BudgetOperations:
     def __init__(self, conn):
@@ -16,11 +23,12 @@ class BudgetOperations:
                 self._insert_new_budget(user_id, category_name, amount)
             
             self.conn.commit()
+            report_cache.invalidate_user(user_id)
         except sqlite3.Error as e:
-            logging.error(f"SQLite error: {e}")
+            logger.error("SQLite error: %s", e)
             raise
         except Exception as e:
-            logging.error(f"Error setting budget: {e}")
+            logger.error("Error setting budget: %s", e)
             raise
 
     def get_budget(self, user_id, category_name):
@@ -28,17 +36,17 @@ class BudgetOperations:
         
         if budget_row:
             budget = Budget(*budget_row)
-            logging.info(f"Budget retrieved for user {user_id}, category {category_name}: {budget.amount}, used: {budget.amount_used}")
+            logger.debug("Budget retrieved for user %s, category %s: %s, used: %s", user_id, category_name, budget.amount, budget.amount_used)
             return budget.amount, budget.amount_used
         
-        logging.info(f"No budget found for user {user_id}, category {category_name}")
+        logger.debug("No budget found for user %s, category %s", user_id, category_name)
         return None, None
 
     def get_budgets(self, user_id):
         budget_rows = self._fetch_all_budget_rows(user_id)
-        budgets = [Budget(*row) for row in budget_rows]
+        budgets = [Budget.from_row(row) for row in budget_rows]
         
-        logging.info(f"Retrieved {len(budgets)} budgets for user {user_id}")
+        logger.debug("Retrieved %s budgets for user %s", len(budgets), user_id)
         return budgets
 
     def update_budget(self, user_id, category_name, new_amount):
@@ -49,11 +57,29 @@ class BudgetOperations:
             budget.amount = new_amount
             budget.validate()
             self._execute_update_budget(budget)
-            logging.info(f"Budget for user {user_id}, category {category_name} updated to {new_amount}")
+            report_cache.invalidate_user(user_id)
+            logger.info("Budget for user %s, category %s updated to %s", user_id, category_name, new_amount)
 
     def delete_budget(self, user_id, category_name):
         self._execute_delete_budget(user_id, category_name)
-        logging.info(f"Budget for user {user_id} and category {category_name} deleted")
+        report_cache.invalidate_user(user_id)
+        logger.info("Budget for user %s and category %s deleted", user_id, category_name)
+
+    def get_all_budgets(self, page=1, per_page=DEFAULT_PER_PAGE, sort="id", user_id=None, category=None):
+        # One Page of every user's budgets; category is a name prefix
+        sort, order = order_by(sort, BUDGET_SORTS, "id")
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if category:
+            conditions.append("category_name >= ? AND category_name < ?")
+            params.extend(prefix_range(category))
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return fetch_page(
+            self.conn, "budgets", "id, user_id, category_name, amount, amount_used", where, params,
+            page, per_page, sort, order, lambda rows: [Budget.from_row(row) for row in rows]
+        )
 
     # Helper methods
     def _get_existing_budget(self, user_id, category_name):
@@ -64,21 +90,21 @@ class BudgetOperations:
 
     def _update_existing_budget(self, existing_budget, amount):
         budget = Budget(*existing_budget)
-        logging.info(f"Updating existing budget for user {budget.user_id}, category {budget.category_name}")
+        logger.debug("Updating existing budget for user %s, category %s", budget.user_id, budget.category_name)
         budget.amount = amount
         budget.validate()
         self.conn.execute('UPDATE budgets SET amount = ? WHERE id = ?', (budget.amount, budget.id))
-        logging.info(f"Budget updated for user {budget.user_id}, category {budget.category_name}: {amount}")
+        logger.info("Budget updated for user %s, category %s: %s", budget.user_id, budget.category_name, amount)
 
     def _insert_new_budget(self, user_id, category_name, amount):
-        logging.info(f"Inserting new budget for user {user_id}, category {category_name}")
+        logger.debug("Inserting new budget for user %s, category %s", user_id, category_name)
         budget = Budget(None, user_id, category_name, amount, 0)
         budget.validate()
         self.conn.execute(
             'INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (?, ?, ?, ?)', 
             (budget.user_id, budget.category_name, budget.amount, budget.amount_used)
         )
-        logging.info(f"Budget set for user {user_id}, category {category_name}: {amount}")
+        logger.info("Budget set for user %s, category %s: %s", user_id, category_name, amount)
 
     def _fetch_budget_row(self, user_id, category_name):
         return self.conn.execute(
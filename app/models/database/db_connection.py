@@ -1,54 +1,252 @@
-import sqlite3
+import logging
 import os
+import queue
+import sqlite3
+import threading
+import time
+from flask import current_app, g, has_app_context
+from .migrations import migrate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 10.0
+DEFAULT_STORAGE_PROFILE = "production"
+
+# PRAGMAs applied once to every new connection. busy_timeout goes first so
+# switching journal_mode waits on a locked database instead of failing.
+STORAGE_PROFILES = {
+    "legacy": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    "development": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+    "testing": {
+        "busy_timeout": 5000,
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+    },
+    "production": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pool settings from init_app per database, so a worker forked from a
+# preloaded app builds its own pool from the app config, not env defaults
+_pool_settings = {}
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, db_name, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT, pragmas=None):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(get_storage_profile() if pragmas is None else pragmas)
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+    def checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open_or_wait()
+        with self._lock:
+            self._checkouts += 1
+        return conn
+
+    def checkin(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._opened,
+                "idle": self._idle.qsize(),
+                "in_use": self._opened - self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time": self._wait_time,
+                "timeouts": self._timeouts,
+            }
+
+    # Helper methods
+    def _open_or_wait(self):
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(f"No connection available for {self.db_name} after {self.timeout}s")
+        finally:
+            with self._lock:
+                self._waits += 1
+                self._wait_time += time.perf_counter() - started
+        return conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn, self.pragmas)
+        logger.debug("Opened pooled connection to %s", self.db_name)
+        return conn
+
+
+def get_storage_profile(name=None):
+    name = name or os.getenv("DB_STORAGE_PROFILE", DEFAULT_STORAGE_PROFILE)
+    try:
+        return STORAGE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage profile: {name}") from None
 
-def get_connection(db_name=None):
-    db_name = os.getenv("DB_NAME", db_name or 'finance.db')
-    conn = sqlite3.connect(db_name)
+
+def get_pool(db_name=None, size=None, timeout=None, profile=None):
+    # Pools are per process: a worker forked from a preloaded app must not
+    # reuse the parent's SQLite connections, so it opens its own.
+    db_name = _resolve_db_name(db_name)
+    key = (os.getpid(), db_name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = _pool_settings.get(db_name, {})
+            size = size or settings.get("size")
+            timeout = timeout or settings.get("timeout")
+            pool = ConnectionPool(
+                db_name,
+                size=size or int(os.getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                timeout=timeout or float(os.getenv("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+                pragmas=get_storage_profile(profile or settings.get("profile")),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_pools():
+    # Pools inherited across fork are dropped without closing: their
+    # connections still belong to the parent.
+    pid = os.getpid()
+    with _pools_lock:
+        for (owner, _), pool in _pools.items():
+            if owner == pid:
+                pool.close()
+        _pools.clear()
+
+
+def _reset_after_fork():
+    global _pools_lock
+    # Another thread may have held the lock at fork time
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_connection(db_name=None, profile=None):
+    # Inside a Flask app context every caller shares the connection checked
+    # out for that context; it goes back to the pool in release_connection().
+    if has_app_context():
+        if "db" not in g:
+            pool = get_pool(db_name)
+            g.db = pool.checkout()
+            g.db_pool = pool
+            # app.instrumentation registers a wrapper that times every execute
+            wrap = current_app.extensions.get("db_connection_wrapper")
+            g.db_handle = wrap(g.db) if wrap else g.db
+        return g.db_handle
+    conn = sqlite3.connect(_resolve_db_name(db_name))
     conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn, get_storage_profile(profile))
     return conn
 
+
+def release_connection(error=None):
+    conn = g.pop("db", None)
+    pool = g.pop("db_pool", None)
+    g.pop("db_handle", None)
+    if conn is None:
+        return
+    if pool is None:
+        conn.close()
+    else:
+        pool.checkin(conn)
+
+
+def init_app(app):
+    settings = {
+        "size": app.config.get("DB_POOL_SIZE"),
+        "timeout": app.config.get("DB_POOL_TIMEOUT"),
+        "profile": app.config.get("DB_STORAGE_PROFILE"),
+    }
+    db_name = _resolve_db_name(app.config.get("DB_NAME"))
+    with _pools_lock:
+        _pool_settings[db_name] = settings
+    get_pool(db_name, **settings)
+    app.teardown_appcontext(release_connection)
+
+
+def _resolve_db_name(db_name):
+    return os.getenv("DB_NAME", db_name or 'finance.db')
+
+
+def _apply_pragmas(conn, pragmas):
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
 def create_tables(conn):
-    table_creation_queries = [
-        '''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL
-        )
-        ''',
-        '''
-        CREATE TABLE IF NOT EXISTS accounts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            name TEXT NOT NULL,
-            balance REAL NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            UNIQUE(user_id, name)
-        )
-        ''',
-        '''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            account_id INTEGER,
-            date TEXT NOT NULL,
-            amount REAL NOT NULL,
-            type TEXT NOT NULL,
-            description TEXT,
-            category_name TEXT,
-            FOREIGN KEY (account_id) REFERENCES accounts (id)
-        )
-        ''',
-        '''
-        CREATE TABLE IF NOT EXISTS budgets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            category_name TEXT NOT NULL,
-            amount REAL NOT NULL,
-            amount_used REAL NOT NULL DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            UNIQUE(user_id, category_name)
-        )
-        '''
-    ]
-    with conn:
-        for query in table_creation_queries:
-            conn.execute(query)
+    return migrate(conn)
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import g, has_app_context
+
+# Kinds kept in the process-wide LRU. Anything else (e.g. transaction rows,
+# which change with every write) is only remembered for the current request.
+SHARED_KINDS = ("user", "account_owner")
+
+
+class EntityCache:
+    # Two levels: a dict on flask.g so a request reads each row at most once,
+    # and a small process-wide LRU with a TTL for rows that rarely change.
+    # Writes through UserOperations/AccountOperations invalidate both here;
+    # other processes see the change once their entry expires.
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._counters = {"request_hits": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def configure(self, max_entries=None, ttl=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl is not None:
+                self.ttl = ttl
+            self._evict()
+
+    def get(self, kind, id, loader):
+        # loader() reads the row; None (not found) is remembered for the
+        # request only, so a row created later is picked up.
+        key = (kind, _normalize_id(id))
+        scope = _request_scope()
+        if scope is not None and key in scope:
+            with self._lock:
+                self._counters["request_hits"] += 1
+            return scope[key]
+
+        found, value = self._get_shared(key) if kind in SHARED_KINDS else (False, None)
+        if not found:
+            generation = self._generation
+            value = loader()
+            if value is not None and kind in SHARED_KINDS:
+                self._set_shared(key, value, generation)
+        if scope is not None:
+            scope[key] = value
+        return value
+
+    def invalidate(self, kind, id):
+        key = (kind, _normalize_id(id))
+        scope = _request_scope()
+        if scope is not None:
+            scope.pop(key, None)
+        if kind not in SHARED_KINDS:
+            return
+        with self._lock:
+            # Loads that started before this write must not store their result
+            self._generation += 1
+            if self._entries.pop(key, None) is not None:
+                self._counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), max_entries=self.max_entries, ttl=self.ttl)
+
+    # Helper methods
+    def _get_shared(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return True, value
+
+    def _set_shared(self, key, value, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+
+def _request_scope():
+    if not has_app_context():
+        return None
+    if "entity_cache" not in g:
+        g.entity_cache = {}
+    return g.entity_cache
+
+
+def _normalize_id(id):
+    # JWT identities may arrive as strings while row ids are ints
+    try:
+        return int(id)
+    except (TypeError, ValueError):
+        return id
+
+
+entity_cache = EntityCache()
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+JOB_FORMATS = ("html", "pdf")
+
+
+class JobLimitError(Exception):
+    def __init__(self, message, scope):
+        super().__init__(message)
+        # "user" when the caller has too many jobs, "queue" when everyone does
+        self.scope = scope
+
+
+class JobOperations:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def create_job(self, user_id, format, params, max_active=None, max_active_per_user=None, owner_pid=None):
+        if format not in JOB_FORMATS:
+            raise ValueError(f"Unknown report format: {format}")
+        # The limits are checked in the INSERT itself, so concurrent enqueues
+        # from several web processes cannot overshoot them.
+        try:
+            cursor = self.conn.execute(
+                f"""
+                INSERT INTO report_jobs (user_id, status, format, params, created_at, owner_pid)
+                SELECT ?, 'queued', ?, ?, ?, ?
+                WHERE (? IS NULL OR (SELECT COUNT(*) FROM report_jobs WHERE status IN {_ACTIVE}) < ?)
+                  AND (? IS NULL OR (SELECT COUNT(*) FROM report_jobs WHERE user_id = ? AND status IN {_ACTIVE}) < ?)
+                """,
+                (user_id, format, json.dumps(params), _now(), owner_pid,
+                 max_active, max_active, max_active_per_user, user_id, max_active_per_user)
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error("SQLite error: %s", e)
+            raise
+        if cursor.rowcount == 0:
+            if max_active_per_user is not None and self.count_active(user_id) >= max_active_per_user:
+                raise JobLimitError(f"At most {max_active_per_user} reports can be pending per user", "user")
+            raise JobLimitError("The report queue is full, try again later", "queue")
+        logger.info("Queued %s report job %s for user %s", format, cursor.lastrowid, user_id)
+        return cursor.lastrowid
+
+    def get_job(self, job_id):
+        row = self.conn.execute(
+            """
+            SELECT id, user_id, status, format, params, result_path, error, created_at, started_at, finished_at
+            FROM report_jobs WHERE id = ?
+            """,
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("id", "user_id", "status", "format", "params", "result_path", "error",
+                        "created_at", "started_at", "finished_at"), row))
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def count_active(self, user_id=None):
+        query = f"SELECT COUNT(*) FROM report_jobs WHERE status IN {_ACTIVE}"
+        params = ()
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params = (user_id,)
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def start_job(self, job_id):
+        # Only a queued job can start, so a job is never run twice
+        return self._transition(job_id, "running", "status = 'queued'", started_at=_now())
+
+    def finish_job(self, job_id, result_path):
+        return self._transition(job_id, "done", "status = 'running'", result_path=result_path, finished_at=_now())
+
+    def fail_job(self, job_id, error):
+        return self._transition(job_id, "failed", f"status IN {_ACTIVE}", error=error, finished_at=_now())
+
+    def fail_stale_jobs(self, max_age):
+        # Jobs live in the pool of the web process that queued them. If that
+        # process died (SIGKILL, OOM, a recycle past graceful_timeout) they
+        # stay active forever and hold the user at their limit, so jobs whose
+        # owner is gone, or that are older than max_age seconds, are failed.
+        owners = [row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT owner_pid FROM report_jobs WHERE status IN {_ACTIVE} AND owner_pid IS NOT NULL"
+        )]
+        dead = [pid for pid in owners if not _process_alive(pid)]
+        placeholders = ", ".join("?" * len(dead)) or "NULL"
+        cursor = self.conn.execute(
+            f"""
+            UPDATE report_jobs SET status = 'failed', error = 'Abandoned: the process running it is gone', finished_at = ?
+            WHERE status IN {_ACTIVE} AND (created_at < ? OR owner_pid IN ({placeholders}))
+            """,
+            (_now(), _ago(max_age), *dead)
+        )
+        self.conn.commit()
+        if cursor.rowcount:
+            logger.warning("Failed %s abandoned report jobs", cursor.rowcount)
+        return cursor.rowcount
+
+    def expire_jobs(self, max_age):
+        # Done jobs older than max_age seconds become 'expired'; returns the
+        # result files, which the caller deletes
+        expired = self.conn.execute(
+            "SELECT id, result_path FROM report_jobs WHERE status = 'done' AND finished_at < ?",
+            (_ago(max_age),)
+        ).fetchall()
+        if expired:
+            self.conn.executemany(
+                "UPDATE report_jobs SET status = 'expired', result_path = NULL WHERE id = ? AND status = 'done'",
+                [(job_id,) for job_id, _ in expired]
+            )
+            self.conn.commit()
+            logger.info("Expired %s finished report jobs", len(expired))
+        return [path for _, path in expired if path]
+
+    # Helper methods
+    def _transition(self, job_id, status, condition, **columns):
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        cursor = self.conn.execute(
+            f"UPDATE report_jobs SET status = ?, {assignments} WHERE id = ? AND {condition}",
+            (status, *columns.values(), job_id)
+        )
+        self.conn.commit()
+        if cursor.rowcount:
+            logger.debug("Report job %s is %s", job_id, status)
+        return cursor.rowcount == 1
+
+
+_ACTIVE = "('queued', 'running')"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ago(seconds):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def _process_alive(pid):
+    # Only meaningful on this host, which SQLite already assumes
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,434 @@
+import logging
+from datetime import datetime, timezone
+from finance.money import DEFAULT_CURRENCY
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        hashed_password TEXT NOT NULL,
+        is_admin BOOLEAN NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS accounts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        name TEXT NOT NULL,
+        balance REAL NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(user_id, name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_id INTEGER,
+        date TEXT NOT NULL,
+        amount REAL NOT NULL,
+        type TEXT NOT NULL,
+        description TEXT,
+        category_name TEXT,
+        FOREIGN KEY (account_id) REFERENCES accounts (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS budgets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        category_name TEXT NOT NULL,
+        amount REAL NOT NULL,
+        amount_used REAL NOT NULL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(user_id, category_name)
+    )
+    '''
+]
+
+
+def _add_user_auth_columns(conn):
+    # Databases created by the old db_connection.create_tables only had
+    # users(id, name); the ones from create_schema.py lacked is_admin.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    if "email" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN email TEXT")
+    if "hashed_password" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN hashed_password TEXT")
+    if "is_admin" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT 0")
+
+
+def _add_account_opening_balance(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(accounts)")}
+    if "opening_balance" in columns:
+        return
+    conn.execute("ALTER TABLE accounts ADD COLUMN opening_balance REAL NOT NULL DEFAULT 0")
+    # Existing balances are taken as correct; whatever transactions do not
+    # explain becomes the opening balance.
+    conn.execute('''
+        UPDATE accounts SET opening_balance = balance - COALESCE((
+            SELECT SUM(CASE WHEN type = 'Income' THEN amount ELSE -ABS(amount) END)
+            FROM transactions WHERE account_id = accounts.id
+        ), 0)
+    ''')
+
+
+def _add_report_job_owner(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(report_jobs)")}
+    if "owner_pid" not in columns:
+        conn.execute("ALTER TABLE report_jobs ADD COLUMN owner_pid INTEGER")
+
+
+# Money columns as integer minor units. Rows written before migration 6 are
+# taken to be in DEFAULT_CURRENCY with two decimal places.
+MINOR_UNIT_TABLES = [
+    ("accounts", "balance", f'''
+    CREATE TABLE accounts_minor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        name TEXT NOT NULL,
+        balance INTEGER NOT NULL,
+        opening_balance INTEGER NOT NULL DEFAULT 0,
+        currency TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}',
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(user_id, name)
+    )
+    ''', '''
+    INSERT INTO accounts_minor (id, user_id, name, balance, opening_balance)
+    SELECT id, user_id, name, CAST(ROUND(balance * 100) AS INTEGER), CAST(ROUND(opening_balance * 100) AS INTEGER)
+    FROM accounts
+    '''),
+    ("transactions", "amount", '''
+    CREATE TABLE transactions_minor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_id INTEGER,
+        date TEXT NOT NULL,
+        amount INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        description TEXT,
+        category_name TEXT,
+        FOREIGN KEY (account_id) REFERENCES accounts (id)
+    )
+    ''', '''
+    INSERT INTO transactions_minor (id, account_id, date, amount, type, description, category_name)
+    SELECT id, account_id, date, CAST(ROUND(amount * 100) AS INTEGER), type, description, category_name
+    FROM transactions
+    '''),
+    ("budgets", "amount", '''
+    CREATE TABLE budgets_minor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        category_name TEXT NOT NULL,
+        amount INTEGER NOT NULL,
+        amount_used INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(user_id, category_name)
+    )
+    ''', '''
+    INSERT INTO budgets_minor (id, user_id, category_name, amount, amount_used)
+    SELECT id, user_id, category_name, CAST(ROUND(amount * 100) AS INTEGER), CAST(ROUND(amount_used * 100) AS INTEGER)
+    FROM budgets
+    '''),
+]
+
+
+def _store_money_as_minor_units(conn):
+    # SQLite cannot change a column's type in place, so each table is copied
+    # into a new one; dropping the old table also drops its indexes and
+    # triggers, which the rest of migration 6 recreates.
+    for table, column, create, copy in MINOR_UNIT_TABLES:
+        types = {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+        if types.get(column) == "INTEGER":
+            continue
+        conn.execute(f"DROP TABLE IF EXISTS {table}_minor")
+        conn.execute(create)
+        conn.execute(copy)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_minor RENAME TO {table}")
+    for table in ("account_daily_rollups", "user_category_monthly_rollups"):
+        types = {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+        if types.get("total") != "INTEGER":
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+# Rollup tables as migrations 4 and 6 created and filled them. They are
+# copied here rather than taken from rollup_operations, whose statements
+# follow the current schema.
+ROLLUPS_V4 = [
+    '''
+    CREATE TABLE IF NOT EXISTS account_daily_rollups (
+        account_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        type TEXT NOT NULL,
+        category_name TEXT NOT NULL DEFAULT '',
+        total REAL NOT NULL DEFAULT 0,
+        txn_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (account_id, day, type, category_name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_category_monthly_rollups (
+        user_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        type TEXT NOT NULL,
+        category_name TEXT NOT NULL DEFAULT '',
+        total REAL NOT NULL DEFAULT 0,
+        txn_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, month, type, category_name)
+    )
+    ''',
+    "DELETE FROM account_daily_rollups",
+    "DELETE FROM user_category_monthly_rollups",
+    '''
+    INSERT INTO account_daily_rollups (account_id, day, type, category_name, total, txn_count)
+    SELECT account_id, date, type, COALESCE(category_name, ''), SUM(CASE WHEN type = 'Income' THEN amount ELSE -ABS(amount) END), COUNT(*)
+    FROM transactions
+    GROUP BY account_id, date, type, COALESCE(category_name, '')
+    ''',
+    '''
+    INSERT INTO user_category_monthly_rollups (user_id, month, type, category_name, total, txn_count)
+    SELECT a.user_id, substr(t.date, 1, 7), t.type, COALESCE(t.category_name, ''), SUM(CASE WHEN type = 'Income' THEN amount ELSE -ABS(amount) END), COUNT(*)
+    FROM transactions t
+    JOIN accounts a ON a.id = t.account_id
+    GROUP BY a.user_id, substr(t.date, 1, 7), t.type, COALESCE(t.category_name, '')
+    ''',
+]
+
+ROLLUPS_V6 = [
+    '''
+    CREATE TABLE IF NOT EXISTS account_daily_rollups (
+        account_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        type TEXT NOT NULL,
+        category_name TEXT NOT NULL DEFAULT '',
+        total INTEGER NOT NULL DEFAULT 0,
+        txn_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (account_id, day, type, category_name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_category_monthly_rollups (
+        user_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        type TEXT NOT NULL,
+        category_name TEXT NOT NULL DEFAULT '',
+        total INTEGER NOT NULL DEFAULT 0,
+        txn_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, month, type, category_name)
+    )
+    ''',
+    "DELETE FROM account_daily_rollups",
+    "DELETE FROM user_category_monthly_rollups",
+    '''
+    INSERT INTO account_daily_rollups (account_id, day, type, category_name, total, txn_count)
+    SELECT account_id, date, type, COALESCE(category_name, ''), SUM(CASE WHEN type = 'Income' THEN amount ELSE -ABS(amount) END), COUNT(*)
+    FROM transactions
+    GROUP BY account_id, date, type, COALESCE(category_name, '')
+    ''',
+    '''
+    INSERT INTO user_category_monthly_rollups (user_id, month, type, category_name, total, txn_count)
+    SELECT a.user_id, substr(t.date, 1, 7), t.type, COALESCE(t.category_name, ''), SUM(CASE WHEN type = 'Income' THEN amount ELSE -ABS(amount) END), COUNT(*)
+    FROM transactions t
+    JOIN accounts a ON a.id = t.account_id
+    GROUP BY a.user_id, substr(t.date, 1, 7), t.type, COALESCE(t.category_name, '')
+    ''',
+]
+
+
+# (version, description, steps). A step is either an SQL statement or a
+# callable taking the connection, and must be safe to re-run since DDL is not
+# rolled back if a later step fails. Append new migrations; never edit old ones.
+MIGRATIONS = [
+    (1, "base schema", SCHEMA),
+    (2, "users auth columns", [_add_user_auth_columns]),
+    (3, "hot path indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions (account_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_type_category ON transactions (account_id, type, category_name)",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_budgets_user_category ON budgets (user_id, category_name)",
+        "CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)",
+    ]),
+    (4, "reporting rollups", ROLLUPS_V4),
+    (5, "account opening balances", [
+        _add_account_opening_balance,
+        # New accounts open at their initial balance
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_opening_balance AFTER INSERT ON accounts
+        WHEN NEW.opening_balance = 0
+        BEGIN
+            UPDATE accounts SET opening_balance = NEW.balance WHERE id = NEW.id;
+        END
+        ''',
+        # Covers SUM(amount) per (account, type) so reconcile never reads the table
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_type_amount ON transactions (account_id, type, amount)",
+    ]),
+    (6, "money as integer minor units", [
+        _store_money_as_minor_units,
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions (account_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_type_category ON transactions (account_id, type, category_name)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_type_amount ON transactions (account_id, type, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_budgets_user_category ON budgets (user_id, category_name)",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_opening_balance AFTER INSERT ON accounts
+        WHEN NEW.opening_balance = 0
+        BEGIN
+            UPDATE accounts SET opening_balance = NEW.balance WHERE id = NEW.id;
+        END
+        ''',
+    ] + ROLLUPS_V6),
+    (7, "report jobs", [
+        '''
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            format TEXT NOT NULL,
+            params TEXT NOT NULL,
+            result_path TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        # Enqueue counts active jobs overall and per user
+        "CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs (status)",
+        "CREATE INDEX IF NOT EXISTS idx_report_jobs_user_status ON report_jobs (user_id, status)",
+    ]),
+    (8, "admin list indexes", [
+        # Admin lists sort and prefix-filter on these; users.email and
+        # budgets.user_id are already covered by earlier indexes
+        "CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)",
+        "CREATE INDEX IF NOT EXISTS idx_budgets_category ON budgets (category_name)",
+        "CREATE INDEX IF NOT EXISTS idx_budgets_amount ON budgets (amount)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount)",
+    ]),
+    (9, "user data versions", [
+        # Bumped in the writing transaction whenever a user's accounts or
+        # budgets change (transactions move account balances and budget
+        # usage), so every process can tell its cached fragments are stale
+        '''
+        CREATE TABLE IF NOT EXISTS user_data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_insert_data_version AFTER INSERT ON accounts
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_update_data_version AFTER UPDATE ON accounts
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_accounts_delete_data_version AFTER DELETE ON accounts
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (OLD.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_budgets_insert_data_version AFTER INSERT ON budgets
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_budgets_update_data_version AFTER UPDATE ON budgets
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_budgets_delete_data_version AFTER DELETE ON budgets
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (OLD.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+    ]),
+    (10, "report job owners", [
+        # The web process whose pool runs the job; once it is gone the job
+        # can never finish
+        _add_report_job_owner,
+    ]),
+    (11, "more user data versions", [
+        # Cached reports carry the data version too. Changing a transaction's
+        # date, type or category leaves the account balance alone, and the
+        # balance sheet shows the user's name.
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_update_data_version AFTER UPDATE ON transactions
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version)
+            SELECT user_id, 1 FROM accounts WHERE id IN (OLD.account_id, NEW.account_id)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_update_data_version AFTER UPDATE OF name ON users
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (NEW.id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''',
+    ]),
+    (12, "drop monthly rollups", [
+        # Reports and charts need daily totals, so every write kept a table
+        # up to date that nothing read
+        "DROP TABLE IF EXISTS user_category_monthly_rollups",
+    ]),
+]
+
+
+def get_schema_version(conn):
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, target=None):
+    current = get_schema_version(conn)
+    target = MIGRATIONS[-1][0] if target is None else target
+    for version, description, steps in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        with conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now(timezone.utc).isoformat())
+            )
+        logger.info("Applied migration %s: %s", version, description)
+        current = version
+    return current
+
+
+def _ensure_version_table(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        ''')
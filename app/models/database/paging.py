@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+class Page:
+    # One page of an admin list plus what the pager needs. total comes from
+    # count_cache, so it may lag writes by up to its TTL.
+    def __init__(self, items, page, per_page, total, sort):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.sort = sort
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    def meta(self):
+        return {"page": self.page, "per_page": self.per_page, "total": self.total, "pages": self.pages, "sort": self.sort}
+
+
+def page_bounds(page, per_page):
+    page = max(1, int(page or 1))
+    per_page = min(max(1, int(per_page or DEFAULT_PER_PAGE)), MAX_PER_PAGE)
+    return page, per_page, (page - 1) * per_page
+
+
+def order_by(sort, columns, default):
+    # sort is a whitelisted column name, "-" prefixed for descending; id
+    # breaks ties so pages never overlap
+    sort = sort or default
+    column = columns.get(sort.lstrip("-"))
+    if column is None:
+        raise ValueError(f"Cannot sort by {sort}; choose one of {', '.join(sorted(columns))}")
+    direction = "DESC" if sort.startswith("-") else "ASC"
+    tiebreak = columns["id"]
+    if column == tiebreak:
+        return sort, f"{column} {direction}"
+    return sort, f"{column} {direction}, {tiebreak} {direction}"
+
+
+def prefix_range(prefix):
+    # "col >= ? AND col < ?" bounds for a prefix match that can use an index
+    # (LIKE cannot on the BINARY-collated text columns)
+    return prefix, prefix + "\U0010ffff"
+
+
+def fetch_page(conn, table, columns, where, params, page, per_page, sort, order, to_items):
+    # One OFFSET page of "SELECT columns FROM table where"; to_items turns
+    # the plain tuples into whatever the list returns
+    page, per_page, offset = page_bounds(page, per_page)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(
+        f"SELECT {columns} FROM {table} {where} ORDER BY {order} LIMIT ? OFFSET ?",
+        list(params) + [per_page, offset]
+    ).fetchall()
+    if rows and len(rows) < per_page:
+        # A short page knows the exact total without counting
+        total = offset + len(rows)
+        count_cache.store(conn, table, where, params, total)
+    else:
+        total = count_cache.count(conn, table, where, params)
+        if rows:
+            total = max(total, offset + len(rows))
+    return Page(to_items(rows), page, per_page, total, sort)
+
+
+class CountCache:
+    # COUNT(*) over a filtered admin list walks every matching row, so totals
+    # are kept per (database, table, filter) for ttl seconds. Writes do not
+    # invalidate them; the pager tolerates a slightly stale total and a short
+    # last page corrects it.
+    def __init__(self, max_entries=256, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries=None, ttl=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl is not None:
+                self.ttl = ttl
+            self._entries.clear()
+
+    def count(self, conn, table, where, params):
+        key = self._key(conn, table, where, params)
+        if key is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+        total = conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+        if key is not None:
+            self._set(key, total)
+        return total
+
+    def store(self, conn, table, where, params, total):
+        key = self._key(conn, table, where, params)
+        if key is not None:
+            self._set(key, total)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Helper methods
+    def _key(self, conn, table, where, params):
+        # In-memory databases have no file name and are never shared
+        filename = conn.execute("PRAGMA database_list").fetchone()[2]
+        if not filename or self.ttl <= 0:
+            return None
+        return filename, table, where, tuple(params)
+
+    def _set(self, key, total):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (total, time.monotonic() + self.ttl)
+
+
+count_cache = CountCache()
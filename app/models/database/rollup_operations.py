@@ -0,0 +1,108 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Signed amount as used by reports: income adds, expenses subtract.
+SIGNED_AMOUNT = "CASE WHEN type = 'Income' THEN amount ELSE -ABS(amount) END"
+
+REBUILD_ROLLUPS = [
+    "DELETE FROM account_daily_rollups",
+    f'''
+    INSERT INTO account_daily_rollups (account_id, day, type, category_name, total, txn_count)
+    SELECT account_id, date, type, COALESCE(category_name, ''), SUM({SIGNED_AMOUNT}), COUNT(*)
+    FROM transactions
+    GROUP BY account_id, date, type, COALESCE(category_name, '')
+    '''
+]
+
+DAILY_FROM_TRANSACTIONS = f'''
+    SELECT account_id, date, type, COALESCE(category_name, ''), SUM({SIGNED_AMOUNT}), COUNT(*)
+    FROM transactions
+    GROUP BY account_id, date, type, COALESCE(category_name, '')
+'''
+DAILY_FROM_ROLLUPS = '''
+    SELECT account_id, day, type, category_name, total, txn_count
+    FROM account_daily_rollups
+'''
+
+
+class RollupOperations:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def apply(self, account_id, date, type, category_name, amount, count=1):
+        # Callers run this inside the same transaction as the write to
+        # transactions; pass a negative count to back a row out.
+        category_name = category_name or ''
+        self.apply_totals([(account_id, date, type, category_name, self._signed(type, amount) * count, count)])
+        if count < 0:
+            self._prune(account_id, date, type, category_name)
+
+    def apply_totals(self, totals):
+        # totals: (account_id, day, type, category_name, signed_total, count)
+        self.conn.executemany(
+            '''INSERT INTO account_daily_rollups (account_id, day, type, category_name, total, txn_count)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (account_id, day, type, category_name)
+               DO UPDATE SET total = total + excluded.total, txn_count = txn_count + excluded.txn_count''',
+            totals
+        )
+
+    def revert(self, account_id, date, type, category_name, amount):
+        self.apply(account_id, date, type, category_name, amount, count=-1)
+
+    def get_daily_totals(self, user_id, start_date=None, end_date=None, currency=None):
+        query = """
+            SELECT r.day, r.type, r.category_name, SUM(r.total) AS total
+            FROM account_daily_rollups r
+            JOIN accounts a ON a.id = r.account_id
+            WHERE a.user_id = ?
+        """
+        params = [user_id]
+
+        if start_date:
+            query += " AND r.day >= ?"
+            params.append(start_date)
+
+        if end_date:
+            query += " AND r.day <= ?"
+            params.append(end_date)
+
+        if currency:
+            query += " AND a.currency = ?"
+            params.append(currency)
+
+        query += " GROUP BY r.day, r.type, r.category_name ORDER BY r.day, r.type, r.category_name"
+        return self.conn.execute(query, params).fetchall()
+
+    def rebuild(self):
+        with self.conn:
+            for statement in REBUILD_ROLLUPS:
+                self.conn.execute(statement)
+        logger.info("Rollup tables rebuilt from transactions")
+
+    def check_consistency(self):
+        # Rows present on only one side of (raw aggregate, rollup) are drift.
+        mismatches = [
+            ("account_daily_rollups", row)
+            for row in self._diff(DAILY_FROM_TRANSACTIONS, DAILY_FROM_ROLLUPS)
+        ]
+        if mismatches:
+            logger.warning("Rollup consistency check found %s mismatched rows", len(mismatches))
+        return mismatches
+
+    # Helper methods
+    def _signed(self, type, amount):
+        return amount if type == "Income" else -abs(amount)
+
+    def _diff(self, left, right):
+        rows = self.conn.execute(
+            f"SELECT * FROM ({left} EXCEPT {right}) UNION ALL SELECT * FROM ({right} EXCEPT {left})"
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def _prune(self, account_id, date, type, category_name):
+        self.conn.execute(
+            "DELETE FROM account_daily_rollups WHERE account_id = ? AND day = ? AND type = ? AND category_name = ? AND txn_count <= 0",
+            (account_id, date, type, category_name)
+        )
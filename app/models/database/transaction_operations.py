@@ -1,10 +1,38 @@
+import base64
+import binascii
+import heapq
 import logging
+import time
+from collections import defaultdict
+from finance.money import to_minor
 from finance.transaction import Transaction
+from finance.transaction_import import normalize_record
+from finance.report_cache import report_cache
 from datetime import datetime
+from itertools import islice
+from .entity_cache import entity_cache
+from .paging import DEFAULT_PER_PAGE, fetch_page, order_by
+from .rollup_operations import RollupOperations
+
+logger = logging.getLogger(__name__)
+
+# Admin list sort keys; each is backed by an index so a page is an index walk
+TRANSACTION_SORTS = {"id": "id", "date": "date", "amount": "amount"}
+
+def encode_cursor(date, transaction_id):
+    return base64.urlsafe_b64encode(f"{date}|{transaction_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        date, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return date, int(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
 
 class TransactionOperations:
     def __init__(self, conn):
         self.conn = conn
+        self.rollups = RollupOperations(conn)
 
     def add_transaction(self, account_id, date, amount, type, description, category_name):
         transaction = Transaction(account_id, date, amount, type, description, category_name)
@@ -13,25 +41,189 @@ class TransactionOperations:
             transaction_id = self._insert_transaction(transaction)
             self._update_account_balance(transaction)
             self._update_budget(transaction)
+            self._apply_rollups(transaction)
+        report_cache.invalidate_account(transaction.account_id)
         
-        logging.info(f"Transaction added for account {transaction.account_id}: {transaction.type} of {transaction.amount} - {transaction.description}")
+        logger.info("Transaction added for account %s: %s of %s - %s", transaction.account_id, transaction.type, transaction.amount, transaction.description)
         return transaction_id
 
-    def update_transaction(self, transaction_id, date, amount, type, description, category_name):
-        transaction = Transaction(None, date, amount, type, description, category_name)
-        self._execute_update_transaction(transaction_id, transaction)
-        logging.info(f"Transaction {transaction_id} updated: {amount} - {description}")
+    def update_transaction(self, transaction_id, date, amount, type, description, category_name, account_id=None, user_id=None):
+        # Balance, budget and rollups move by the difference between the old
+        # and new row, in the same transaction as the row update. With
+        # user_id, the row and any new account must belong to that user; the
+        # check and the write share one write transaction.
+        transaction = Transaction(account_id, date, amount, type, description, category_name)
+        try:
+            existing = self._get_for_write(transaction_id, user_id)
+            if user_id is not None and account_id is not None and account_id != existing["account_id"]:
+                self._check_account_owner(account_id, user_id)
+            if existing:
+                transaction.account_id = transaction.account_id or existing["account_id"]
+                self._apply_balance_delta(existing, transaction)
+                self._apply_budget_delta(existing, transaction)
+                self._revert_rollups(existing)
+                self._apply_rollups(transaction)
+                if transaction.account_id != existing["account_id"]:
+                    self.conn.execute("UPDATE transactions SET account_id = ? WHERE id = ?", (transaction.account_id, transaction_id))
+            self._execute_update_transaction(transaction_id, transaction)
+        except Exception:
+            self.conn.rollback()
+            raise
+        entity_cache.invalidate("transaction", transaction_id)
+        if existing:
+            report_cache.invalidate_account(existing["account_id"])
+            if transaction.account_id != existing["account_id"]:
+                report_cache.invalidate_account(transaction.account_id)
+        logger.info("Transaction %s updated: %s - %s", transaction_id, amount, description)
 
-    def delete_transaction(self, transaction_id):
-        transaction = self._get_transaction_details(transaction_id)
-        if transaction:
-            with self.conn:
+    def delete_transaction(self, transaction_id, user_id=None):
+        # With user_id, raises unless that user owns the transaction's account
+        with self.conn:
+            transaction = self._get_for_write(transaction_id, user_id)
+            if transaction:
                 self._delete_transaction_record(transaction_id)
                 self._revert_account_balance(transaction)
                 self._revert_budget(transaction)
-            logging.info(f"Transaction {transaction_id} deleted and account balance updated")
+                self._revert_rollups(transaction)
+        if transaction:
+            entity_cache.invalidate("transaction", transaction_id)
+            report_cache.invalidate_account(transaction["account_id"])
+            logger.info("Transaction %s deleted and account balance updated", transaction_id)
+
+    def import_transactions(self, records, account_id=None, batch_size=1000, max_errors=100):
+        # Rows that fail validation or reference an unknown account are
+        # skipped and reported; every full batch is written in one transaction.
+        started = time.perf_counter()
+        accounts = {}
+        imported = skipped = batches = 0
+        errors = []
+        batch = []
+        for row_number, record in enumerate(records, start=1):
+            try:
+                fields = normalize_record(record)
+                if account_id is not None:
+                    fields["account_id"] = account_id
+                account = self._get_account(fields["account_id"], accounts)
+                if account is None:
+                    raise ValueError(f"Account {fields['account_id']} not found")
+                # Files carry major units in the account's currency
+                fields["amount"] = to_minor(fields["amount"], account[1])
+                transaction = Transaction(**fields)
+            except (KeyError, TypeError, ValueError) as e:
+                skipped += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": row_number, "error": str(e)})
+                continue
+            batch.append(transaction)
+            if len(batch) >= batch_size:
+                imported += self._insert_batch(batch, accounts)
+                batches += 1
+                batch = []
+        if batch:
+            imported += self._insert_batch(batch, accounts)
+            batches += 1
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            "imported": imported,
+            "skipped": skipped,
+            "batches": batches,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(imported / elapsed, 1) if elapsed else None,
+            "errors": errors,
+        }
+        logger.info("Imported %s transactions in %s batches (%s rows/sec), skipped %s", imported, batches, stats['rows_per_sec'], skipped)
+        return stats
 
     def get_transactions(self, account_ids=None, start_date=None, end_date=None, transaction_type=None, category=None):
+        query, params = self._build_transactions_query(account_ids, start_date, end_date, transaction_type, category)
+        rows = self._select(query, params).fetchall()
+        return self._rows_to_dicts(rows)
+
+    def get_transactions_page(self, account_ids=None, start_date=None, end_date=None, transaction_type=None, category=None, limit=100, cursor=None):
+        query, params = self._build_transactions_query(account_ids, start_date, end_date, transaction_type, category, cursor)
+        query += " ORDER BY date, id LIMIT ?"
+        params.append(limit + 1)
+        rows = self._select(query, params).fetchall()
+        transactions = self._rows_to_dicts(rows[:limit])
+        next_cursor = None
+        if len(rows) > limit:
+            last = transactions[-1]
+            next_cursor = encode_cursor(last["date"], last["id"])
+        return transactions, next_cursor
+
+    def iter_transactions(self, account_ids=None, start_date=None, end_date=None, transaction_type=None, category=None, cursor=None, chunk_size=500):
+        for rows in self.iter_transaction_chunks(account_ids, start_date, end_date, transaction_type, category, cursor, chunk_size):
+            yield from self._rows_to_dicts(rows)
+
+    def iter_transaction_chunks(self, account_ids=None, start_date=None, end_date=None, transaction_type=None, category=None, cursor=None, chunk_size=500):
+        # Lists of plain (id, account_id, date, amount, type, description,
+        # category_name) tuples in (date, id) order, so memory stays at one
+        # chunk however many rows match. Several accounts are read one
+        # index-ordered cursor each and merged here: ORDER BY over an IN list
+        # would sort every row in a temp b-tree, in memory under temp_store=MEMORY.
+        filters = (start_date, end_date, transaction_type, category, cursor)
+        if account_ids and len(account_ids) > 1:
+            rows = heapq.merge(
+                *(self._iter_rows([account_id], *filters) for account_id in account_ids),
+                key=lambda row: (row[2], row[0])
+            )
+        else:
+            rows = self._iter_rows(account_ids, *filters)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+    def get_all_transactions(self, page=1, per_page=DEFAULT_PER_PAGE, sort="-date", user_id=None, account_id=None, start_date=None, end_date=None, transaction_type=None, category=None):
+        # One Page across every account, for the admin view
+        sort, order = order_by(sort, TRANSACTION_SORTS, "-date")
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("account_id IN (SELECT id FROM accounts WHERE user_id = ?)")
+            params.append(user_id)
+        for condition, value in (("account_id = ?", account_id), ("date >= ?", start_date), ("date <= ?", end_date),
+                                 ("type = ?", transaction_type), ("category_name = ?", category)):
+            if value is not None and value != "":
+                conditions.append(condition)
+                params.append(value)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return fetch_page(
+            self.conn, "transactions", "id, account_id, date, amount, type, description, category_name", where, params,
+            page, per_page, sort, order, self._rows_to_dicts
+        )
+
+    def get_transaction(self, transaction_id, user_id=None):
+        # One query joined with the account's owner, remembered for the rest
+        # of the request. With user_id, raises PermissionError unless that
+        # user owns the account. Writes read the row afresh, since their
+        # balance deltas must use the stored values.
+        found = entity_cache.get("transaction", transaction_id, lambda: self._get_transaction_with_owner(transaction_id))
+        if found is None:
+            return None
+        transaction, owner_id = found
+        if user_id is not None and owner_id != user_id:
+            raise PermissionError("Unauthorized access to this transaction")
+        return transaction
+
+    # Helper methods
+    def _select(self, query, params):
+        # Plain tuples: list endpoints skip building a sqlite3.Row per row
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(query, params)
+
+    def _iter_rows(self, account_ids, start_date, end_date, transaction_type, category, cursor, fetch_size=1000):
+        query, params = self._build_transactions_query(account_ids, start_date, end_date, transaction_type, category, cursor)
+        result = self._select(query + " ORDER BY date, id", params)
+        while True:
+            rows = result.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def _build_transactions_query(self, account_ids=None, start_date=None, end_date=None, transaction_type=None, category=None, cursor=None):
         query = """
             SELECT id, account_id, date, amount, type, description, category_name 
             FROM transactions 
@@ -59,17 +251,13 @@ class TransactionOperations:
             query += " AND category_name = ?"
             params.append(category)
 
-        rows = self.conn.execute(query, params).fetchall()
-        return [self._row_to_dict(row) for row in rows]
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            query += " AND (date > ? OR (date = ? AND id > ?))"
+            params.extend([cursor_date, cursor_date, cursor_id])
 
-    def get_transaction(self, transaction_id):
-        row = self.conn.execute(
-            "SELECT id, account_id, date, amount, type, description, category_name FROM transactions WHERE id = ?", 
-            (transaction_id,)
-        ).fetchone()
-        return self._row_to_dict(row) if row else None
+        return query, params
 
-    # Helper methods
     def _insert_transaction(self, transaction):
         cursor = self.conn.execute(
             'INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (?, ?, ?, ?, ?, ?)', 
@@ -77,6 +265,44 @@ class TransactionOperations:
         )
         return cursor.lastrowid
 
+    def _get_account(self, account_id, accounts):
+        # (user_id, currency), looked up once per account per import
+        if account_id not in accounts:
+            row = self.conn.execute("SELECT user_id, currency FROM accounts WHERE id = ?", (account_id,)).fetchone()
+            accounts[account_id] = tuple(row) if row else None
+        return accounts[account_id]
+
+    def _insert_batch(self, batch, accounts):
+        balance_deltas = defaultdict(int)
+        budget_deltas = defaultdict(int)
+        rollup_totals = defaultdict(lambda: [0, 0])
+        for transaction in batch:
+            signed = transaction.amount if transaction.type == "Income" else -abs(transaction.amount)
+            balance_deltas[transaction.account_id] += signed
+            if transaction.type != "Income":
+                budget_deltas[(accounts[transaction.account_id][0], transaction.category_name)] += abs(transaction.amount)
+            totals = rollup_totals[(transaction.account_id, transaction.date, transaction.type, transaction.category_name or '')]
+            totals[0] += signed
+            totals[1] += 1
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (?, ?, ?, ?, ?, ?)',
+                [(t.account_id, t.date, t.amount, t.type, t.description, t.category_name) for t in batch]
+            )
+            self.conn.executemany(
+                'UPDATE accounts SET balance = balance + ? WHERE id = ?',
+                [(delta, account_id) for account_id, delta in balance_deltas.items()]
+            )
+            self.conn.executemany(
+                'UPDATE budgets SET amount_used = amount_used + ? WHERE user_id = ? AND category_name = ?',
+                [(delta, user_id, category_name) for (user_id, category_name), delta in budget_deltas.items()]
+            )
+            self.rollups.apply_totals([key + tuple(value) for key, value in rollup_totals.items()])
+        for account_id in balance_deltas:
+            report_cache.invalidate_account(account_id)
+        return len(batch)
+
     def _update_account_balance(self, transaction):
         if transaction.type == "Income":
             self.conn.execute('UPDATE accounts SET balance = balance + ? WHERE id = ?', (transaction.amount, transaction.account_id))
@@ -85,25 +311,18 @@ class TransactionOperations:
 
     def _update_budget(self, transaction):
         if transaction.type != "Income":
-            budget = self._get_budget(transaction.account_id, transaction.category_name)
-            if budget:
-                new_amount_used = budget["amount_used"] + abs(transaction.amount)
-                self._update_budget_amount_used(transaction.account_id, transaction.category_name, new_amount_used)
-                if new_amount_used > budget["amount"]:
-                    logging.warning(f"Budget exceeded for user {transaction.account_id}, category {transaction.category_name}")
-
-    def _get_budget(self, account_id, category_name):
-        row = self.conn.execute(
-            'SELECT amount, amount_used FROM budgets WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ?', 
-            (account_id, category_name)
-        ).fetchone()
-        return dict(row) if row else None
+            budget = self._adjust_budget(transaction.account_id, transaction.category_name, abs(transaction.amount))
+            if budget and budget["amount_used"] > budget["amount"]:
+                logger.warning("Budget exceeded for user %s, category %s", budget["user_id"], transaction.category_name)
 
-    def _update_budget_amount_used(self, account_id, category_name, new_amount_used):
-        self.conn.execute(
-            'UPDATE budgets SET amount_used = ? WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ?', 
-            (new_amount_used, account_id, category_name)
-        )
+    def _adjust_budget(self, account_id, category_name, delta):
+        # One atomic read-modify-write in SQLite: concurrent writers cannot
+        # lose each other's increments, and the owning user is resolved once
+        # by the uncorrelated subquery.
+        return self.conn.execute(
+            'UPDATE budgets SET amount_used = amount_used + ? WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ? RETURNING user_id, amount, amount_used',
+            (delta, account_id, category_name)
+        ).fetchone()
 
     def _execute_update_transaction(self, transaction_id, transaction):
         self.conn.execute(
@@ -112,12 +331,38 @@ class TransactionOperations:
         )
         self.conn.commit()
 
-    def _get_transaction_details(self, transaction_id):
+    def _get_transaction_with_owner(self, transaction_id):
         row = self.conn.execute(
-            "SELECT id, account_id, date, amount, type, description, category_name FROM transactions WHERE id = ?", 
+            """
+            SELECT t.id, t.account_id, t.date, t.amount, t.type, t.description, t.category_name, a.user_id
+            FROM transactions t
+            LEFT JOIN accounts a ON a.id = t.account_id
+            WHERE t.id = ?
+            """,
             (transaction_id,)
         ).fetchone()
-        return self._row_to_dict(row) if row else None
+        return (self._row_to_dict(row), row[7]) if row else None
+
+    def _get_for_write(self, transaction_id, user_id=None):
+        # Takes the write lock before reading, so no other connection can
+        # change the row or its ownership between the check and the write
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        found = self._get_transaction_with_owner(transaction_id)
+        if user_id is None:
+            return found[0] if found else None
+        if found is None:
+            raise ValueError(f"Transaction {transaction_id} not found")
+        if found[1] != user_id:
+            raise PermissionError("Unauthorized access to this transaction")
+        return found[0]
+
+    def _check_account_owner(self, account_id, user_id):
+        row = self.conn.execute("SELECT user_id FROM accounts WHERE id = ?", (account_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Account {account_id} not found")
+        if row[0] != user_id:
+            raise PermissionError("Unauthorized access to this account")
 
     def _delete_transaction_record(self, transaction_id):
         self.conn.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
@@ -128,12 +373,41 @@ class TransactionOperations:
         else:
             self.conn.execute('UPDATE accounts SET balance = balance + ? WHERE id = ?', (transaction["amount"], transaction["account_id"]))
 
+    def _apply_balance_delta(self, existing, transaction):
+        old = self._signed_amount(existing["type"], existing["amount"])
+        new = self._signed_amount(transaction.type, transaction.amount)
+        if existing["account_id"] == transaction.account_id:
+            if new != old:
+                self.conn.execute('UPDATE accounts SET balance = balance + ? WHERE id = ?', (new - old, transaction.account_id))
+        else:
+            self.conn.execute('UPDATE accounts SET balance = balance - ? WHERE id = ?', (old, existing["account_id"]))
+            self.conn.execute('UPDATE accounts SET balance = balance + ? WHERE id = ?', (new, transaction.account_id))
+
+    def _apply_budget_delta(self, existing, transaction):
+        same_budget = (
+            existing["account_id"] == transaction.account_id
+            and existing["category_name"] == transaction.category_name
+            and existing["type"] == transaction.type
+        )
+        if same_budget:
+            if transaction.type != "Income" and abs(transaction.amount) != abs(existing["amount"]):
+                self._adjust_budget(transaction.account_id, transaction.category_name, abs(transaction.amount) - abs(existing["amount"]))
+        else:
+            self._revert_budget(existing)
+            self._update_budget(transaction)
+
+    def _signed_amount(self, type, amount):
+        return amount if type == "Income" else -abs(amount)
+
     def _revert_budget(self, transaction):
         if transaction["type"] != "Income":
-            budget = self._get_budget(transaction["account_id"], transaction["category_name"])
-            if budget:
-                new_amount_used = budget["amount_used"] - transaction["amount"]
-                self._update_budget_amount_used(transaction["account_id"], transaction["category_name"], new_amount_used)
+            self._adjust_budget(transaction["account_id"], transaction["category_name"], -abs(transaction["amount"]))
+
+    def _apply_rollups(self, transaction):
+        self.rollups.apply(transaction.account_id, transaction.date, transaction.type, transaction.category_name, transaction.amount)
+
+    def _revert_rollups(self, transaction):
+        self.rollups.revert(transaction["account_id"], transaction["date"], transaction["type"], transaction["category_name"], transaction["amount"])
 
     def _row_to_dict(self, row):
         if row:
@@ -146,4 +420,13 @@ class TransactionOperations:
                 "description": row[5],
                 "category_name": row[6]
             }
-        return None
\ No newline at end of file
+        return None
+
+    def _rows_to_dicts(self, rows):
+        # Unpacking plain tuples into a dict display is the cheapest way to
+        # build the JSON-ready rows (cheaper than sqlite3.Row or dict(zip()))
+        return [
+            {"id": id, "account_id": account_id, "date": date, "amount": amount,
+             "type": type, "description": description, "category_name": category_name}
+            for id, account_id, date, amount, type, description, category_name in rows
+        ]
\ No newline at end of file
@@ -1,6 +1,14 @@
 import logging
 import sqlite3
 from finance.user import User
+from finance.report_cache import report_cache
+from .entity_cache import entity_cache
+from .paging import DEFAULT_PER_PAGE, fetch_page, order_by, prefix_range
+
+logger = logging.getLogger(__name__)
+
+# Admin list sort keys; each is backed by an index so a page is an index walk
+USER_SORTS = {"id": "id", "name": "name", "email": "email"}
 
 class UserOperations:
     def __init__(self, conn):
@@ -10,52 +18,89 @@ class UserOperations:
         user = User(None, name, email, hashed_password, is_admin)
         self._execute_query('INSERT INTO users (name, email, hashed_password, is_admin) VALUES (?, ?, ?, ?)',
                             (user.name, user.email, user.password, user.is_admin))
-        logging.info(f"User added: {user.name} with email: {user.email}, admin: {user.is_admin}")
+        logger.info("User added: %s, admin: %s", user.name, user.is_admin)
 
     def get_user(self, id):
-        row = self._fetch_user(id)
-        return User(*row) if row else None
+        # Cached per request and process-wide; callers must not mutate the result
+        return entity_cache.get("user", id, lambda: self._load_user(id))
 
     def get_user_by_name(self, name):
         row = self.conn.execute(
             "SELECT id, name, email, hashed_password, is_admin FROM users WHERE name = ?",
             (name,)
         ).fetchone()
-        return User(*row) if row else None
+        return User.from_row(row) if row else None
 
     def get_user_by_email(self, email):
         row = self.conn.execute(
             "SELECT id, name, email, hashed_password, is_admin FROM users WHERE email = ?",
             (email,)
         ).fetchone()
-        return User(*row) if row else None
+        return User.from_row(row) if row else None
+
+    def get_data_version(self, user_id):
+        # Moves whenever the user's accounts or budgets change, in any process
+        row = self.conn.execute("SELECT version FROM user_data_versions WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def email_exists(self, email):
+        return self.conn.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone() is not None
 
     def update_user(self, id, name=None, email=None, hashed_password=None, is_admin=None):
-        user = self.get_user(id)
+        user = self._load_user(id)
         if not user:
-            logging.error(f"User with id {id} not found.")
+            logger.error("User with id %s not found.", id)
             return
         if name:
             user.name = name
         if email:
             user.email = email
         if hashed_password:
-            user.hashed_password = hashed_password
+            user.password = hashed_password
         if is_admin is not None:
             user.is_admin = is_admin
         self._update_user(user)
-        logging.info(f"User {id} updated")
+        entity_cache.invalidate("user", user.id)
+        report_cache.invalidate_user(user.id)
+        logger.info("User %s updated", id)
+
+    def update_password_hash(self, id, hashed_password):
+        # Login rehashes on its own, without the read-modify-write of update_user
+        self._execute_query("UPDATE users SET hashed_password = ? WHERE id = ?", (hashed_password, id))
+        entity_cache.invalidate("user", id)
+        logger.info("Password hash upgraded for user %s", id)
 
     def delete_user(self, id):
+        account_ids = [row[0] for row in self.conn.execute("SELECT id FROM accounts WHERE user_id = ?", (id,))]
         with self.conn:
             self._delete_user_data(id)
-        logging.info(f"User {id} and all related data deleted")
+        entity_cache.invalidate("user", id)
+        for account_id in account_ids:
+            entity_cache.invalidate("account_owner", account_id)
+        report_cache.invalidate_user(id)
+        logger.info("User %s and all related data deleted", id)
 
-    def get_all_users(self):
-        rows = self.conn.execute("SELECT id, name, email, hashed_password, is_admin FROM users").fetchall()
-        return [User(*row) for row in rows]
+    def get_all_users(self, page=1, per_page=DEFAULT_PER_PAGE, sort="id", search=None, is_admin=None):
+        # One Page of users; search is a name or email prefix
+        sort, order = order_by(sort, USER_SORTS, "id")
+        conditions, params = [], []
+        if search:
+            conditions.append("((name >= ? AND name < ?) OR (email >= ? AND email < ?))")
+            params.extend(prefix_range(search) * 2)
+        if is_admin is not None:
+            conditions.append("is_admin = ?")
+            params.append(bool(is_admin))
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return fetch_page(
+            self.conn, "users", "id, name, email, hashed_password, is_admin", where, params,
+            page, per_page, sort, order, lambda rows: [User.from_row(row) for row in rows]
+        )
 
     # Helper methods
+    def _load_user(self, id):
+        row = self._fetch_user(id)
+        return User.from_row(row) if row else None
+
     def _fetch_user(self, id):
         return self.conn.execute(
             "SELECT id, name, email, hashed_password, is_admin FROM users WHERE id = ?",
@@ -65,26 +110,28 @@ class UserOperations:
     def _update_user(self, user):
         self.conn.execute(
             "UPDATE users SET name = ?, email = ?, hashed_password = ?, is_admin = ? WHERE id = ?",
-            (user.name, user.email, user.hashed_password, user.is_admin, user.id)
+            (user.name, user.email, user.password, user.is_admin, user.id)
         )
         self.conn.commit()
 
     def _delete_user_data(self, id):
-        tables = ['users', 'accounts', 'budgets']
-        for table in tables:
+        # Children first: transactions and daily rollups hang off accounts
+        for table in ('transactions', 'account_daily_rollups'):
+            self.conn.execute(
+                f"DELETE FROM {table} WHERE account_id IN (SELECT id FROM accounts WHERE user_id = ?)",
+                (id,)
+            )
+        for table in ('accounts', 'budgets'):
             self.conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (id,))
-        self.conn.execute(
-            "DELETE FROM transactions WHERE account_id IN (SELECT id FROM accounts WHERE user_id = ?)",
-            (id,)
-        )
+        self.conn.execute("DELETE FROM users WHERE id = ?", (id,))
 
     def _execute_query(self, query, params=()):
         try:
             with self.conn:
                 self.conn.execute(query, params)
         except sqlite3.IntegrityError as e:
-            logging.error(f"IntegrityError: {e}")
+            logger.error("IntegrityError: %s", e)
             raise
         except sqlite3.OperationalError as e:
-            logging.error(f"OperationalError: {e}")
+            logger.error("OperationalError: %s", e)
             raise
\ No newline at end of file
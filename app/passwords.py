@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = ("bcrypt", "pbkdf2")
+DEFAULT_BCRYPT_ROUNDS = 12
+DEFAULT_PBKDF2_ITERATIONS = 600000
+
+
+class HasherBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    # Hashing is deliberately slow, so it runs on a small dedicated pool:
+    # bcrypt releases the GIL, and capping the pool caps how many cores login
+    # storms can take from other requests. Callers wait for their result;
+    # past max_pending waiting callers, new ones are turned away.
+    def __init__(self, scheme="bcrypt", rounds=DEFAULT_BCRYPT_ROUNDS, iterations=DEFAULT_PBKDF2_ITERATIONS, threads=None, max_pending=64):
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+        self.configure(scheme, rounds, iterations, threads or min(4, os.cpu_count() or 1), max_pending)
+
+    def configure(self, scheme=None, rounds=None, iterations=None, threads=None, max_pending=None):
+        if scheme is not None and scheme not in SCHEMES:
+            raise ValueError(f"Unknown password hash scheme: {scheme}")
+        with self._lock:
+            if scheme is not None:
+                self.scheme = scheme
+            if rounds is not None:
+                self.rounds = rounds
+            if iterations is not None:
+                self.iterations = iterations
+            if threads is not None:
+                self.threads = threads
+            if max_pending is not None:
+                self.max_pending = max_pending
+            self._slots = threading.BoundedSemaphore(self.threads + self.max_pending)
+            self._dummy_hash = None
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, password, hashed):
+        # Unknown users are checked against a dummy hash so a miss costs as
+        # much as a wrong password and does not reveal which emails exist.
+        return self.check(password, hashed)[0]
+
+    def check(self, password, hashed):
+        # (valid, needs_rehash): a valid password's hash should be replaced
+        # if it uses an older scheme or cost, or bcrypt without pre-hashing
+        valid, legacy = self._run(self._verify, password, hashed)
+        return valid, valid and (legacy or self.needs_rehash(hashed))
+
+    def needs_rehash(self, hashed):
+        return _describe(_text(hashed)) != self._target()
+
+    # Helper methods
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusyError("Too many password checks in progress")
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="password-hash")
+                self._pid = os.getpid()
+            return self._pool
+
+    def _hash(self, password):
+        if self.scheme == "bcrypt":
+            return bcrypt.hashpw(_bcrypt_input(password), bcrypt.gensalt(self.rounds)).decode("ascii")
+        return generate_password_hash(password, method=f"pbkdf2:sha256:{self.iterations}")
+
+    def _verify(self, password, hashed):
+        # (valid, legacy); legacy is a bcrypt hash of the raw password
+        if not hashed:
+            self._verify(password, self._get_dummy_hash())
+            return False, False
+        hashed = _text(hashed)
+        if hashed.startswith("$2"):
+            try:
+                if bcrypt.checkpw(_bcrypt_input(password), hashed.encode("ascii")):
+                    return True, False
+                # Hashes stored before passwords were pre-hashed; bcrypt
+                # used to read only the first 72 bytes
+                return bcrypt.checkpw(password.encode("utf-8")[:72], hashed.encode("ascii")), True
+            except ValueError:
+                logger.error("Malformed bcrypt hash")
+                return False, False
+        # Anything else was made by werkzeug (pbkdf2 or scrypt)
+        return check_password_hash(hashed, password), False
+
+    def _get_dummy_hash(self):
+        if self._dummy_hash is None:
+            self._dummy_hash = self._hash(base64.b64encode(os.urandom(16)).decode("ascii"))
+        return self._dummy_hash
+
+    def _target(self):
+        return ("bcrypt", self.rounds) if self.scheme == "bcrypt" else ("pbkdf2", self.iterations)
+
+
+def _bcrypt_input(password):
+    # bcrypt only reads 72 bytes; hashing first keeps every byte of longer
+    # passwords significant
+    return base64.b64encode(hashlib.sha256(password.encode("utf-8")).digest())
+
+
+def _text(hashed):
+    # Older rows hold the hash as a BLOB
+    return hashed.decode("ascii") if isinstance(hashed, bytes) else hashed
+
+
+def _describe(hashed):
+    # ("bcrypt", rounds), ("pbkdf2", iterations) or None for other werkzeug methods
+    if hashed.startswith("$2"):
+        try:
+            return "bcrypt", int(hashed.split("$")[2])
+        except (IndexError, ValueError):
+            return None
+    method = hashed.split("$", 1)[0].split(":")
+    if method[0] == "pbkdf2" and len(method) == 3 and method[1] == "sha256":
+        return "pbkdf2", int(method[2])
+    return None
+
+
+password_hasher = PasswordHasher()
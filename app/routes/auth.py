@@ -1,16 +1,30 @@
+import logging
 import os
+import sqlite3
 from functools import wraps
 from flask import Blueprint, request, jsonify, flash, render_template, redirect, url_for, make_response, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, set_access_cookies, unset_jwt_cookies
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models.database import get_connection, UserOperations
 from app.forms.forms import RegistrationForm, LoginForm, AdminCreationForm
+from app.passwords import HasherBusyError, password_hasher
+
+logger = logging.getLogger(__name__)
 
 bp = Blueprint('auth', __name__)
 
 def get_db():
     return UserOperations(get_connection())
 
+def user_identity(user_id):
+    # JWT subjects must be strings; tokens carry the user id as one
+    return str(user_id)
+
+def identity_user_id(identity):
+    return None if identity is None else int(identity)
+
+def jwt_user_id():
+    return identity_user_id(get_jwt_identity())
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -22,7 +36,7 @@ def admin_required(f):
 
 @bp.route('/check_session')
 def check_session():
-    user_id = get_jwt_identity()
+    user_id = jwt_user_id()
     return jsonify({"user_id": user_id}), 200
 
 @bp.route('/login', methods=['GET', 'POST'])
@@ -31,8 +45,16 @@ def login():
     if form.validate_on_submit():
         db = get_db()
         user = db.get_user_by_email(form.email.data)
-        if user and check_password_hash(user.password, form.password.data):
-            access_token = create_access_token(identity=user.id)
+        try:
+            valid, rehash = password_hasher.check(form.password.data, user.password if user else None)
+        except HasherBusyError as e:
+            logger.warning("Login rejected: %s", e)
+            flash('Too many login attempts right now, please try again', 'error')
+            return render_template('login.html', form=form), 503
+        if valid:
+            if rehash:
+                _upgrade_password_hash(db, user, form.password.data)
+            access_token = create_access_token(identity=user_identity(user.id))
             resp = make_response(redirect(url_for('dashboard.dashboard')))
             set_access_cookies(resp, access_token)
             flash('Logged in successfully', 'success')
@@ -40,17 +62,30 @@ def login():
         flash('Invalid email or password', 'error')
     return render_template('login.html', form=form), 200 if request.method == 'GET' else 400
 
+def _upgrade_password_hash(db, user, password):
+    # Hashes made with an older scheme or cost are replaced while the
+    # plaintext is at hand; failing to do so must not fail the login.
+    try:
+        db.update_password_hash(user.id, password_hasher.hash(password))
+    except (HasherBusyError, sqlite3.Error) as e:
+        logger.warning("Could not upgrade password hash for user %s: %s", user.id, e)
+
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
     form = RegistrationForm()
     if form.validate_on_submit():
-        db = get_db()
-        if db.get_user_by_email(form.email.data):
+        try:
+            hashed_password = password_hasher.hash(form.password.data)
+        except HasherBusyError as e:
+            logger.warning("Registration rejected: %s", e)
+            flash('Too many requests right now, please try again', 'error')
+            return render_template('register.html', form=form), 503
+        try:
+            get_db().add_user(form.name.data, form.email.data, hashed_password)
+        except sqlite3.IntegrityError:
+            # Registered between the form's email check and this insert
             flash('Email already registered', 'error')
             return render_template('register.html', form=form), 400
-        
-        hashed_password = generate_password_hash(form.password.data)
-        db.add_user(form.name.data, form.email.data, hashed_password)
         flash('Registered successfully. Please log in.', 'success')
         return redirect(url_for('auth.login'))
     return render_template('register.html', form=form), 200 if request.method == 'GET' else 400
@@ -66,9 +101,9 @@ def logout():
 @bp.route('/profile')
 @jwt_required()
 def profile():
-    current_user_id = get_jwt_identity()
+    current_user_id = jwt_user_id()
     user = get_db().get_user(current_user_id)
-    return jsonify(user.__dict__) if request.is_json else render_template('profile.html', user=user)
+    return jsonify({key: value for key, value in user.to_dict().items() if key != 'hashed_password'}) if request.is_json else render_template('profile.html', user=user)
 
 @bp.route('/create_admin', methods=['GET', 'POST'])
 @admin_required
@@ -80,13 +115,13 @@ def create_admin():
             return render_template('create_admin.html', form=form), 400
         
         db = get_db()
-        hashed_password = generate_password_hash(form.password.data)
         try:
+            hashed_password = password_hasher.hash(form.password.data)
             db.add_user(form.name.data, form.email.data, hashed_password, is_admin=True)
             flash(f'Admin user {form.name.data} created successfully', 'success')
             return redirect(url_for('auth.login'))
         except Exception as e:
-            current_app.logger.error(f"Error creating admin user: {str(e)}")
+            current_app.logger.error("Error creating admin user: %s", e)
             flash('Error creating admin user', 'error')
             return render_template('create_admin.html', form=form), 400
     return render_template('create_admin.html', form=form)
\ No newline at end of file
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, flash, render_template, redirect, url_for, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
-from app.models.database import get_connection, BudgetOperations
+from flask_jwt_extended import jwt_required, get_jwt, verify_jwt_in_request
+from app.routes.auth import jwt_user_id
+from app.models.database import get_connection, AccountOperations, BudgetOperations
+from app.models.database.paging import DEFAULT_PER_PAGE
 from app.forms.forms import BudgetForm
+from finance.money import to_minor
 
 bp = Blueprint('budgets', __name__, url_prefix='/budgets')
 
@@ -13,9 +16,11 @@ def get_db():
 @jwt_required()
 def budget_management():
     current_app.logger.info("Entered budget_management function")
-    current_user_id = get_jwt_identity()
-    current_app.logger.info(f"User ID from JWT: {current_user_id}")
+    current_user_id = jwt_user_id()
+    current_app.logger.info("User ID from JWT: %s", current_user_id)
     db = get_db()
+    # Budget amounts are kept in minor units of the user's account currency
+    currency = AccountOperations(get_connection()).get_user_currency(current_user_id)
     
     form = BudgetForm()
     
@@ -23,28 +28,28 @@ def budget_management():
         if form.validate_on_submit():
             budget_name = form.budget_name.data
             initial_amount = form.initial_amount.data
-            current_app.logger.info(f"Attempting to add budget: {budget_name}, {initial_amount}")
+            current_app.logger.info("Attempting to add budget: %s, %s", budget_name, initial_amount)
             try:
-                db.set_budget(current_user_id, budget_name, initial_amount)
+                db.set_budget(current_user_id, budget_name, to_minor(initial_amount, currency))
                 flash(f"Budget {budget_name} added successfully!", "success")
                 return redirect(url_for('budgets.budget_management'))
             except Exception as e:
-                current_app.logger.error(f"Error adding budget: {str(e)}")
+                current_app.logger.error("Error adding budget: %s", e)
                 flash(str(e), "error")
         else:
-            current_app.logger.error(f"Form validation failed. Errors: {form.errors}")
+            current_app.logger.error("Form validation failed. Errors: %s", form.errors)
             for field, errors in form.errors.items():
                 for error in errors:
                     flash(f"{field}: {error}", "error")
     
     budgets = db.get_budgets(current_user_id)
-    return render_template('budgets.html', budgets=budgets, form=form)
+    return render_template('budgets.html', budgets=budgets, form=form, user_id=current_user_id, currency=currency)
 
     
 @bp.route('/delete', methods=['POST'])
 @jwt_required()
 def delete_budget():
-    current_user_id = get_jwt_identity()
+    current_user_id = jwt_user_id()
     form = BudgetForm()  # We use this just for CSRF validation
     if form.validate_on_submit():
         category_name = request.form.get('category_name')
@@ -88,11 +93,24 @@ def get_all_budgets():
     
     db = get_db()
     try:
-        budgets = db.get_all_budgets()
+        page = db.get_all_budgets(
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', DEFAULT_PER_PAGE, type=int),
+            sort=request.args.get('sort', 'id'),
+            user_id=request.args.get('user_id', type=int),
+            category=request.args.get('category') or None
+        )
+        currencies = AccountOperations(get_connection()).get_user_currencies(budget.user_id for budget in page.items)
         if request.headers.get('Content-Type') == 'application/json':
-            return jsonify(budgets=[budget.__dict__ for budget in budgets]), 200
+            return jsonify(budgets=[budget.to_dict(currencies[budget.user_id]) for budget in page.items], **page.meta()), 200
         else:
-            return render_template('admin_budgets.html', budgets=budgets)
+            return render_template('admin_budgets.html', page=page, budgets=page.items, currencies=currencies)
+    except ValueError as e:
+        if request.headers.get('Content-Type') == 'application/json':
+            return jsonify(error=str(e)), 400
+        else:
+            flash(str(e), "error")
+            return redirect(url_for('budgets.get_all_budgets'))
     except Exception as e:
         if request.headers.get('Content-Type') == 'application/json':
             return jsonify(error=str(e)), 500
@@ -0,0 +1,25 @@
+import os
+import sqlite3
+from flask import Blueprint, jsonify
+from app.models.database import get_connection
+from app.models.database.db_connection import get_pool
+from app.models.database.migrations import MIGRATIONS
+
+bp = Blueprint('health', __name__)
+
+@bp.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness: the worker is up and serving requests
+    return jsonify({"status": "ok", "pid": os.getpid()}), 200
+
+@bp.route('/readyz', methods=['GET'])
+def readyz():
+    # Readiness: the database answers and its schema is current
+    expected = MIGRATIONS[-1][0]
+    try:
+        version = get_connection().execute("SELECT MAX(version) FROM schema_migrations").fetchone()[0] or 0
+    except sqlite3.Error as e:
+        return jsonify({"status": "unavailable", "error": str(e), "pid": os.getpid()}), 503
+    status = "ok" if version >= expected else "schema_outdated"
+    body = {"status": status, "schema_version": version, "expected_schema_version": expected, "pool": get_pool().stats(), "pid": os.getpid()}
+    return jsonify(body), 200 if status == "ok" else 503
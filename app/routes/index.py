@@ -1,9 +1,11 @@
 import logging
 from flask import Blueprint, render_template, redirect, url_for, flash
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required
+from app.routes.auth import jwt_user_id
 from app.models.database import get_connection, UserOperations
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
 bp = Blueprint('dashboard', __name__, template_folder='templates')
 
 def get_db():
@@ -13,25 +15,21 @@ def get_db():
 @bp.route('/dashboard')
 @jwt_required()
 def dashboard():
-    logging.debug("Entering dashboard route")
+    logger.debug("Entering dashboard route")
     try:
-        current_user_id = get_jwt_identity()
-        logging.debug(f"Current user ID: {current_user_id}")
-        claims = get_jwt()
-        logging.debug(f"JWT claims: {claims}")
-        
+        current_user_id = jwt_user_id()
+        logger.debug("Current user ID: %s", current_user_id)
         user_ops = get_db()
         
         user = user_ops.get_user(current_user_id)
-        logging.debug(f"User retrieved: {user}")
         if not user:
-            logging.warning(f"User not found for ID: {current_user_id}")
+            logger.warning("User not found for ID: %s", current_user_id)
             flash("User not found", "error")
             return redirect(url_for('auth.login'))
 
-        logging.debug("Rendering dashboard template")
+        logger.debug("Rendering dashboard template")
         return render_template('dashboard.html', user=user)
     except Exception as e:
-        logging.error(f"Error in dashboard route: {str(e)}", exc_info=True)
+        logger.error("Error in dashboard route: %s", e, exc_info=True)
         flash(f"An error occurred: {str(e)}", "error")
         return redirect(url_for('auth.login'))
\ No newline at end of file
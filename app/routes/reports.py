@@ -1,17 +1,23 @@
 import logging
-from flask import Blueprint, request, jsonify, render_template
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from app.models.database import get_connection
+from flask import Blueprint, request, jsonify, render_template, current_app, send_file, url_for
+from flask_jwt_extended import jwt_required, get_jwt
+from app.routes.auth import jwt_user_id
+from app.jobs import FormatUnavailableError, job_queue
+from app.models.database import JobOperations, get_connection
+from app.models.database.job_operations import JOB_FORMATS, JobLimitError
 from finance.report_generator import ReportGenerator
+from finance.report_cache import report_cache
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 bp = Blueprint('report', __name__)
 
 @bp.route('/generate_report', methods=['GET'])
 @jwt_required()
 def generate_report():
-    logging.debug("Entered generate_report route")
-    current_user_id = get_jwt_identity()
+    logger.debug("Entered generate_report route")
+    current_user_id = jwt_user_id()
     claims = get_jwt()
     is_admin = claims.get("is_admin", False)
 
@@ -21,10 +27,10 @@ def generate_report():
         try:
             user_id = int(user_id)
             if not is_admin and user_id != current_user_id:
-                logging.error("Unauthorized access attempt")
+                logger.error("Unauthorized access attempt")
                 return jsonify({"error": "Unauthorized access"}), 403
         except ValueError:
-            logging.error("user_id must be an integer")
+            logger.error("user_id must be an integer")
             return jsonify({"error": "user_id must be an integer"}), 400
     else:
         user_id = current_user_id
@@ -35,7 +41,7 @@ def generate_report():
     if not end_date:
         end_date = datetime.now().strftime('%Y-%m-%d')
 
-    logging.debug(f"user_id: {user_id}, start_date: {start_date}, end_date: {end_date}")
+    logger.debug("user_id: %s, start_date: %s, end_date: %s", user_id, start_date, end_date)
     return _execute_report_generation(user_id, start_date, end_date)
 
 def _get_report_params():
@@ -45,36 +51,107 @@ def _get_report_params():
         request.args.get('end_date')
     )
 
+def wants_report_job(args):
+    # PDFs and charts are slow to build, so they always go to the job queue
+    return args.get('format', 'html') != 'html' or _flag(args.get('charts')) or _flag(args.get('async'))
+
 def _execute_report_generation(user_id, start_date, end_date):
+    if wants_report_job(request.args):
+        return _enqueue_report_job(user_id, start_date, end_date)
     conn = get_connection()
-    logging.debug(f"Database connection obtained: {conn}")
-    report_generator = ReportGenerator(conn)
+    engine = request.args.get('engine') or current_app.config.get('REPORT_ENGINE', 'sql')
+    try:
+        report_generator = ReportGenerator(conn, engine=engine, cache=report_cache)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     try:
         report = report_generator.generate_report(user_id, start_date, end_date)
-        logging.debug(f"Report generated successfully: {report}")
         return render_template('report.html', report=report)
     except Exception as e:
-        logging.error(f"Error generating report: {e}")
+        logger.error("Error generating report: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+def _enqueue_report_job(user_id, start_date, end_date):
+    format = request.args.get('format', 'html')
+    if format not in JOB_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(JOB_FORMATS)}"}), 400
+    params = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "engine": request.args.get('engine') or current_app.config.get('REPORT_ENGINE', 'sql'),
+        "charts": _flag(request.args.get('charts')),
+    }
+    try:
+        job_id = job_queue.enqueue(get_connection(), user_id, format, params)
+    except JobLimitError as e:
+        logger.warning("Report job rejected for user %s: %s", user_id, e)
+        return jsonify({"error": str(e)}), 429 if e.scope == "user" else 503
+    except FormatUnavailableError as e:
+        logger.warning("Report job rejected for user %s: %s", user_id, e)
+        return jsonify({"error": str(e)}), 501
+    except Exception as e:
+        logger.error("Error queueing report: %s", e)
         return jsonify({"error": str(e)}), 500
+    status_url = url_for('report.report_job_status', job_id=job_id)
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": status_url}), 202, {"Location": status_url}
+
+def _flag(value):
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+def _get_owned_job(job_id):
+    job = JobOperations(get_connection()).get_job(job_id)
+    if job is None:
+        return None, (jsonify({"error": "Report job not found"}), 404)
+    if job["user_id"] != jwt_user_id() and not get_jwt().get("is_admin", False):
+        logger.error("Unauthorized access attempt to report job %s", job_id)
+        return None, (jsonify({"error": "Unauthorized access"}), 403)
+    return job, None
+
+@bp.route('/reports/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def report_job_status(job_id):
+    job, error = _get_owned_job(job_id)
+    if error:
+        return error
+    body = {key: job[key] for key in ("status", "format", "error", "created_at", "started_at", "finished_at")}
+    body["job_id"] = job["id"]
+    if job["status"] == "done":
+        body["download_url"] = url_for('report.report_job_download', job_id=job_id)
+    return jsonify(body), 200
+
+@bp.route('/reports/jobs/<int:job_id>/download', methods=['GET'])
+@jwt_required()
+def report_job_download(job_id):
+    job, error = _get_owned_job(job_id)
+    if error:
+        return error
+    if job["status"] != "done":
+        return jsonify({"error": f"Report job is {job['status']}", "status": job["status"]}), 409
+    mimetype = "application/pdf" if job["format"] == "pdf" else "text/html"
+    try:
+        return send_file(job["result_path"], mimetype=mimetype, as_attachment=True, download_name=f"report-{job_id}.{job['format']}")
+    except FileNotFoundError:
+        logger.error("Report job %s file is missing: %s", job_id, job["result_path"])
+        return jsonify({"error": "Report file is no longer available"}), 410
 
 # Admin route to generate report for any user
 @bp.route('/admin/generate_report', methods=['GET'])
 @jwt_required()
 def admin_generate_report():
-    logging.debug("Entered admin_generate_report route")
+    logger.debug("Entered admin_generate_report route")
     claims = get_jwt()
     if not claims.get("is_admin", False):
         return jsonify({"error": "Admin access required"}), 403
 
     user_id, start_date, end_date = _get_report_params()
     if not user_id:
-        logging.error("user_id is required for admin report generation")
+        logger.error("user_id is required for admin report generation")
         return jsonify({"error": "user_id is required"}), 400
 
     try:
         user_id = int(user_id)
     except ValueError:
-        logging.error("user_id must be an integer")
+        logger.error("user_id must be an integer")
         return jsonify({"error": "user_id must be an integer"}), 400
 
     # Set default dates if not provided
@@ -83,5 +160,13 @@ def admin_generate_report():
     if not end_date:
         end_date = datetime.now().strftime('%Y-%m-%d')
 
-    logging.debug(f"user_id: {user_id}, start_date: {start_date}, end_date: {end_date}")
-    return _execute_report_generation(user_id, start_date, end_date)
\ No newline at end of file
+    logger.debug("user_id: %s, start_date: %s, end_date: %s", user_id, start_date, end_date)
+    return _execute_report_generation(user_id, start_date, end_date)
+
+@bp.route('/admin/report_cache', methods=['GET'])
+@jwt_required()
+def report_cache_stats():
+    claims = get_jwt()
+    if not claims.get("is_admin", False):
+        return jsonify({"error": "Admin access required"}), 403
+    return jsonify(report_cache.stats()), 200
@@ -1,11 +1,24 @@
 import datetime
-from flask import Blueprint, flash, request, jsonify, render_template, redirect, url_for
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+import io
+import json
+from flask import Blueprint, Response, flash, request, jsonify, render_template, redirect, stream_with_context, url_for
+from flask_jwt_extended import jwt_required, get_jwt
+from app.routes.auth import jwt_user_id
 from app.models.database import get_connection, TransactionOperations, AccountOperations
+from app.models.database.paging import DEFAULT_PER_PAGE, order_by
+from app.models.database.transaction_operations import TRANSACTION_SORTS, decode_cursor
 from app.forms.forms import TransactionForm, TransactionUpdateForm, TransactionDeleteForm
+from finance.money import DEFAULT_CURRENCY, from_minor, to_minor
+from finance.transaction_export import CONTENT_TYPES as EXPORT_CONTENT_TYPES, FORMATS as EXPORT_FORMATS, export_transactions as export_rows
+from finance.transaction_import import FORMATS as IMPORT_FORMATS, parse_records
 
 bp = Blueprint('transactions', __name__, url_prefix='/transactions')
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows per export chunk: one DataFrame and, for Parquet, one row group
+EXPORT_CHUNK_SIZE = 50000
+
 def get_db():
     conn = get_connection()
     return TransactionOperations(conn), AccountOperations(conn)
@@ -13,7 +26,7 @@ def get_db():
 @bp.route('/add', methods=['GET', 'POST'])
 @jwt_required()
 def add_transaction():
-    current_user_id = get_jwt_identity()
+    current_user_id = jwt_user_id()
     form = TransactionForm()
     
     if form.validate_on_submit():
@@ -22,7 +35,7 @@ def add_transaction():
                 lambda: db.add_transaction(
                     int(form.account_id.data),
                     form.date.data,
-                    form.amount.data,
+                    to_minor(form.amount.data, _get_account_currency(acc_db, int(form.account_id.data))),
                     form.type.data,
                     form.description.data,
                     form.category_name.data
@@ -37,26 +50,29 @@ def add_transaction():
 @bp.route('/update/<int:transaction_id>', methods=['GET', 'POST'])
 @jwt_required()
 def update_transaction(transaction_id):
-    current_user_id = get_jwt_identity()
+    owner_id = _owner_filter()
     db, acc_db = get_db()
     
-    transaction = db.get_transaction(transaction_id)
+    try:
+        transaction = db.get_transaction(transaction_id, user_id=owner_id)
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
     if not transaction:
         return jsonify({"error": f"Transaction {transaction_id} not found"}), 404
     
     form = TransactionUpdateForm(obj=transaction)
     
     if form.validate_on_submit():
+        # The ownership check runs again inside the update's write transaction
         return _execute_db_operation(
-            lambda db, acc_db: _check_transaction_ownership(db, acc_db, transaction_id, current_user_id, 
-                lambda: db.update_transaction(
-                    transaction_id,
-                    form.date.data,
-                    form.amount.data,
-                    form.type.data,
-                    form.description.data,
-                    form.category_name.data
-                )
+            lambda db, acc_db: db.update_transaction(
+                transaction_id,
+                form.date.data,
+                to_minor(form.amount.data, _get_account_currency(acc_db, transaction["account_id"])),
+                form.type.data,
+                form.description.data,
+                form.category_name.data,
+                user_id=owner_id
             ),
             success_message=f"Transaction {transaction_id} updated successfully!"
         )
@@ -66,14 +82,12 @@ def update_transaction(transaction_id):
 @bp.route('/delete/<int:transaction_id>', methods=['GET', 'POST'])
 @jwt_required()
 def delete_transaction(transaction_id):
-    current_user_id = get_jwt_identity()
+    owner_id = _owner_filter()
     form = TransactionDeleteForm()
     
     if form.validate_on_submit():
         return _execute_db_operation(
-            lambda db, acc_db: _check_transaction_ownership(db, acc_db, transaction_id, current_user_id, 
-                lambda: db.delete_transaction(transaction_id)
-            ),
+            lambda db, acc_db: db.delete_transaction(transaction_id, user_id=owner_id),
             success_message=f"Transaction {transaction_id} deleted successfully!"
         )
     
@@ -102,19 +116,21 @@ def _execute_db_operation(operation, success_message=None, success_handler=None,
 @bp.route('/get/<int:transaction_id>', methods=['GET'])
 @jwt_required()
 def get_transaction(transaction_id):
-    current_user_id = get_jwt_identity()
+    owner_id = _owner_filter()
     
     return _execute_db_operation(
-        lambda db, acc_db: _check_transaction_ownership(db, acc_db, transaction_id, current_user_id, 
-            lambda: db.get_transaction(transaction_id)
-        ),
-        success_handler=lambda transaction: jsonify(transaction.__dict__) if transaction else (jsonify({"error": "Transaction not found"}), 404)
+        lambda db, acc_db: _get_transaction_json(db, acc_db, transaction_id, owner_id),
+        success_handler=lambda transaction: jsonify(transaction) if transaction else (jsonify({"error": "Transaction not found"}), 404)
     )
 
+def wants_stream(args, accept_mimetypes):
+    # NDJSON streams every matching row instead of returning one page
+    return args.get('format') == 'ndjson' or accept_mimetypes.best == 'application/x-ndjson'
+
 @bp.route('/list', methods=['GET'])
 @jwt_required()
 def list_transactions():
-    current_user_id = get_jwt_identity()
+    current_user_id = jwt_user_id()
     
     # Get query parameters
     account_id = request.args.get('account_id', type=int)
@@ -122,14 +138,80 @@ def list_transactions():
     end_date = request.args.get('end_date')
     transaction_type = request.args.get('type')
     category = request.args.get('category')
+    cursor = request.args.get('cursor')
+    limit = min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    stream = wants_stream(request.args, request.accept_mimetypes)
     
-    # Convert date strings to datetime objects if provided
-    start_date = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
-    end_date = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+    if not _valid_dates(start_date, end_date):
+        return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
     
+    filters = dict(start_date=start_date, end_date=end_date, transaction_type=transaction_type, category=category, cursor=cursor)
+    if stream:
+        return _execute_db_operation(
+            lambda db, acc_db: _stream_user_transactions(db, acc_db, current_user_id, account_id, **filters),
+            success_handler=lambda rows: Response(stream_with_context(rows), mimetype='application/x-ndjson')
+        )
     return _execute_db_operation(
-        lambda db, acc_db: _get_user_transactions(db, acc_db, current_user_id, account_id, start_date, end_date, transaction_type, category),
-        success_handler=lambda transactions: jsonify([transaction.__dict__ for transaction in transactions])
+        lambda db, acc_db: _get_user_transactions(db, acc_db, current_user_id, account_id, limit=limit, **filters),
+        success_handler=lambda page: jsonify({"transactions": page[0], "next_cursor": page[1]})
+    )
+
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_transactions():
+    current_user_id = jwt_user_id()
+    account_id = request.args.get('account_id', type=int)
+    export_format = request.args.get('format', 'csv')
+    filters = dict(
+        start_date=request.args.get('start_date'),
+        end_date=request.args.get('end_date'),
+        transaction_type=request.args.get('type'),
+        category=request.args.get('category')
+    )
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if not _valid_dates(filters['start_date'], filters['end_date']):
+        return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
+
+    return _execute_db_operation(
+        lambda db, acc_db: _export_user_transactions(db, acc_db, current_user_id, account_id, export_format, **filters),
+        success_handler=lambda chunks: Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_CONTENT_TYPES[export_format],
+            headers={"Content-Disposition": f"attachment; filename=transactions.{export_format}"}
+        )
+    )
+
+@bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_transactions():
+    current_user_id = jwt_user_id()
+    account_id = request.form.get('account_id', type=int)
+    upload = request.files.get('file')
+    if not account_id or upload is None:
+        return jsonify({"error": "account_id and file are required"}), 400
+
+    import_format = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    if import_format not in IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(IMPORT_FORMATS)}"}), 400
+    batch_size = min(request.form.get('batch_size', 1000, type=int), 10000)
+
+    return _execute_db_operation(
+        lambda db, acc_db: _check_account_ownership(acc_db, account_id, current_user_id,
+            lambda: db.import_transactions(
+                parse_records(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''), import_format),
+                account_id=account_id,
+                batch_size=batch_size
+            )
+        ),
+        success_handler=lambda stats: (jsonify(stats), 201)
     )
 
 def _get_transaction_params(update=False):
@@ -145,31 +227,80 @@ def _get_transaction_params(update=False):
         params['transaction_id'] = request.form.get('transaction_id')
     return params
 
-def _get_user_transactions(db, acc_db, user_id, account_id=None, start_date=None, end_date=None, transaction_type=None, category=None):
-    # If account_id is provided, check ownership
+def _get_user_account_currencies(acc_db, user_id, account_id=None):
+    # {account_id: currency}; if account_id is provided, check ownership and
+    # use only that account
     if account_id:
-        _check_account_ownership(acc_db, account_id, user_id, lambda: None)
-    
-    # Get user's accounts
-    user_accounts = acc_db.get_accounts(user_id)
-    user_account_ids = [account.id for account in user_accounts]
-    
-    # If account_id is provided and valid, use only that account
-    if account_id and account_id in user_account_ids:
-        account_ids = [account_id]
-    else:
-        account_ids = user_account_ids
-    
-    # Get transactions
-    transactions = db.get_transactions(
-        account_ids=account_ids,
+        return _check_account_ownership(acc_db, account_id, user_id, lambda: {account_id: _get_account_currency(acc_db, account_id)})
+    return {account.id: account.currency for account in acc_db.get_user_accounts(user_id)}
+
+def _get_account_currency(acc_db, account_id):
+    owner = acc_db.get_account_owner(account_id)
+    return owner[1] if owner else DEFAULT_CURRENCY
+
+def _major_units(transaction, currencies):
+    # Amounts are stored in minor units; JSON carries major units
+    currency = currencies.get(transaction["account_id"], DEFAULT_CURRENCY)
+    return {**transaction, "amount": float(from_minor(transaction["amount"], currency))}
+
+def _get_transaction_json(db, acc_db, transaction_id, owner_id=None):
+    transaction = db.get_transaction(transaction_id, user_id=owner_id)
+    if transaction is None:
+        return None
+    return _major_units(transaction, {transaction["account_id"]: _get_account_currency(acc_db, transaction["account_id"])})
+
+def _get_user_transactions(db, acc_db, user_id, account_id=None, start_date=None, end_date=None, transaction_type=None, category=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    currencies = _get_user_account_currencies(acc_db, user_id, account_id)
+    if not currencies:
+        return [], None
+    transactions, next_cursor = db.get_transactions_page(
+        account_ids=list(currencies),
         start_date=start_date,
         end_date=end_date,
         transaction_type=transaction_type,
-        category=category
+        category=category,
+        limit=limit,
+        cursor=cursor
     )
-    
-    return transactions
+    return [_major_units(transaction, currencies) for transaction in transactions], next_cursor
+
+def _stream_user_transactions(db, acc_db, user_id, account_id=None, start_date=None, end_date=None, transaction_type=None, category=None, cursor=None):
+    currencies = _get_user_account_currencies(acc_db, user_id, account_id)
+    if not currencies:
+        return iter(())
+    rows = db.iter_transactions(
+        account_ids=list(currencies),
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=transaction_type,
+        category=category,
+        cursor=cursor
+    )
+    return (json.dumps(_major_units(row, currencies)) + "\n" for row in rows)
+
+def _export_user_transactions(db, acc_db, user_id, account_id, export_format, start_date=None, end_date=None, transaction_type=None, category=None):
+    currencies = _get_user_account_currencies(acc_db, user_id, account_id)
+    chunks = iter(())
+    if currencies:
+        chunks = db.iter_transaction_chunks(
+            account_ids=list(currencies),
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            category=category,
+            chunk_size=EXPORT_CHUNK_SIZE
+        )
+    return export_rows(chunks, currencies, export_format)
+
+def _valid_dates(*values):
+    # Dates are stored as YYYY-MM-DD text, so validate them but compare as strings
+    try:
+        for value in values:
+            if value:
+                datetime.datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
 
 
 def _get_and_validate_id(id_name):
@@ -182,18 +313,17 @@ def _get_and_validate_id(id_name):
         return jsonify({"error": f"{id_name} must be an integer"}), 400
 
 def _check_account_ownership(acc_db, account_id, user_id, operation):
-    account = acc_db.get_account(account_id)
-    if account is None:
+    owner = acc_db.get_account_owner(account_id)
+    if owner is None:
         raise ValueError(f"Account {account_id} not found")
-    if account.user_id != user_id and not get_jwt().get("is_admin", False):
+    if owner[0] != user_id and not get_jwt().get("is_admin", False):
         raise PermissionError("Unauthorized access to this account")
     return operation()
 
-def _check_transaction_ownership(db, acc_db, transaction_id, user_id, operation):
-    transaction = db.get_transaction(transaction_id)
-    if transaction is None:
-        raise ValueError(f"Transaction {transaction_id} not found")
-    return _check_account_ownership(acc_db, transaction.account_id, user_id, operation)
+def _owner_filter():
+    # Ownership-checked TransactionOperations calls take the user to check
+    # against; admins may act on any transaction
+    return None if get_jwt().get("is_admin", False) else jwt_user_id()
 
 def _execute_db_operation(operation, success_message=None, success_handler=None, status_code=200):
     db, acc_db = get_db()
@@ -217,7 +347,32 @@ def get_all_transactions():
     if not claims.get("is_admin", False):
         return jsonify({"error": "Admin access required"}), 403
 
+    try:
+        filters = dict(
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', DEFAULT_PER_PAGE, type=int),
+            sort=request.args.get('sort', '-date'),
+            user_id=request.args.get('user_id', type=int),
+            account_id=request.args.get('account_id', type=int),
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            transaction_type=request.args.get('type'),
+            category=request.args.get('category')
+        )
+        order_by(filters['sort'], TRANSACTION_SORTS, '-date')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     return _execute_db_operation(
-        lambda db, _: db.get_all_transactions(),
-        success_handler=lambda transactions: jsonify(transactions)
-    )
\ No newline at end of file
+        lambda db, acc_db: _get_all_transactions(db, acc_db, **filters),
+        success_handler=lambda page: jsonify({"transactions": page.items, **page.meta()})
+    )
+
+def _get_all_transactions(db, acc_db, **filters):
+    page = db.get_all_transactions(**filters)
+    currencies = {}
+    for transaction in page.items:
+        if transaction["account_id"] not in currencies:
+            currencies[transaction["account_id"]] = _get_account_currency(acc_db, transaction["account_id"])
+    page.items = [_major_units(transaction, currencies) for transaction in page.items]
+    return page
\ No newline at end of file
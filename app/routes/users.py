@@ -1,11 +1,13 @@
 import logging
 from flask import Blueprint, jsonify, render_template, redirect, url_for, flash, request
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt
+from app.routes.auth import jwt_user_id
 from app.models.database import get_connection, UserOperations
-from werkzeug.security import generate_password_hash
+from app.models.database.paging import DEFAULT_PER_PAGE
+from app.passwords import password_hasher
 from app.forms.forms import UpdateUserForm
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 bp = Blueprint('users', __name__, template_folder='templates')
 
@@ -16,8 +18,8 @@ def get_db():
 @bp.route('/update_user/<int:id>', methods=['GET', 'POST'])
 @jwt_required()
 def update_user(id):
-    logging.debug(f"Entering update_user route for user {id}")
-    current_user_id = get_jwt_identity()
+    logger.debug("Entering update_user route for user %s", id)
+    current_user_id = jwt_user_id()
     claims = get_jwt()
     is_admin = claims.get("is_admin", False)
 
@@ -37,9 +39,8 @@ def update_user(id):
         email = form.email.data
         password = form.password.data
 
-        hashed_password = generate_password_hash(password) if password else None
-
         try:
+            hashed_password = password_hasher.hash(password) if password else None
             db.update_user(id, name, email, hashed_password)
             flash(f"User {id} updated successfully!", "success")
             return redirect(url_for('users.get_all_users') if is_admin else url_for('auth.profile'))
@@ -51,7 +52,7 @@ def update_user(id):
 @bp.route('/delete_user/<int:id>', methods=['POST'])
 @jwt_required()
 def delete_user(id):
-    logging.debug(f"Entering delete_user route for user {id}")
+    logger.debug("Entering delete_user route for user %s", id)
     claims = get_jwt()
     is_admin = claims.get("is_admin", False)
 
@@ -76,10 +77,20 @@ def get_all_users():
         flash("Admin access required", "error")
         return redirect(url_for('auth.profile'))
 
+    is_admin = request.args.get('admin')
+    filters = dict(search=request.args.get('q') or None, is_admin=None if is_admin in (None, '') else is_admin == '1')
     db = get_db()
     try:
-        users = db.get_all_users()
-        return render_template('all_users.html', users=users)
+        page = db.get_all_users(
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', DEFAULT_PER_PAGE, type=int),
+            sort=request.args.get('sort', 'id'),
+            **filters
+        )
+        return render_template('all_users.html', page=page, users=page.items)
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for('users.get_all_users'))
     except Exception as e:
         flash(f"Error: {str(e)}", "error")
         return redirect(url_for('auth.profile'))
\ No newline at end of file
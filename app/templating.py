@@ -0,0 +1,82 @@
+import logging
+import os
+import time
+from flask import current_app, has_app_context
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from app.models.database import UserOperations, get_connection
+from finance.money import format_money
+from finance.report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+_env = None
+
+
+def bytecode_cache(directory=None):
+    # Compiled templates survive restarts and are shared by every worker;
+    # no directory means jinja's private per-user temp directory
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory or None)
+
+
+def init_app(app):
+    env = app.jinja_env
+    if app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        env.bytecode_cache = bytecode_cache(app.config.get('TEMPLATE_BYTECODE_CACHE_DIR'))
+    env.filters['money'] = format_money
+    env.globals['cached_fragment'] = cached_fragment
+    if app.config.get('TEMPLATE_PRECOMPILE', True):
+        # With preload_app the workers fork with every template already compiled
+        count = precompile(env)
+        logger.debug("Precompiled %s templates", count)
+
+
+def precompile(env):
+    # Loading fills the environment's template cache (and the bytecode cache)
+    count = 0
+    for name in env.list_templates(extensions=("html",)):
+        env.get_template(name)
+        count += 1
+    return count
+
+
+def template_env():
+    # For rendering outside a Flask app, e.g. report jobs in the process pool
+    global _env
+    if _env is None:
+        _env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(), bytecode_cache=bytecode_cache())
+        _env.filters["money"] = format_money
+    return _env
+
+
+def cached_fragment(name, user_id, account_ids=(), *vary, caller):
+    # {% call cached_fragment("account_list", user_id, account_ids) %}...{% endcall %}
+    # The block is rendered once per user and kept in report_cache, so any
+    # write that invalidates the user's reports (or one of account_ids) also
+    # drops it. The key carries the user's data version, which database
+    # triggers bump on every account or budget write, so writes made by other
+    # workers are seen too; only blocks built from those rows may be cached.
+    # Nothing per-session, like a CSRF token, may go inside.
+    if not has_app_context() or not current_app.config.get('TEMPLATE_FRAGMENT_CACHE', True):
+        return caller()
+    version = UserOperations(get_connection()).get_data_version(int(user_id))
+    key = (int(user_id), "fragment", name, version) + vary
+    html = report_cache.get(key)
+    registry = current_app.extensions.get('instrumentation')
+    if html is not None:
+        if registry is not None:
+            registry.record_fragment(name, hit=True)
+        return Markup(html)
+
+    generation = report_cache.generation()
+    started = time.perf_counter()
+    html = caller()
+    if registry is not None:
+        registry.record_fragment(name, hit=False)
+        registry.record_template(f"fragment:{name}", time.perf_counter() - started)
+    report_cache.set(key, str(html), generation, account_ids)
+    return Markup(html)
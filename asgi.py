@@ -0,0 +1,5 @@
+from app import create_app
+from app.asgi import AsyncAPI
+
+# Serve with an ASGI server, e.g. uvicorn asgi:app --port 8000
+app = AsyncAPI(create_app())
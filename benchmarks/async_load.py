@@ -0,0 +1,163 @@
+"""Load test: the JSON endpoints under the WSGI app vs the ASGI app (asgi.py).
+
+Seeds a database (see benchmarks.seed), starts each server in its own
+process, then drives every endpoint with --concurrency keep-alive clients
+and reports requests/sec and latency percentiles. The WSGI side is the
+threaded werkzeug server with --threads request threads; the ASGI side is
+uvicorn (pip install uvicorn) with --threads DB threads. Run with e.g.
+
+    python -m benchmarks.async_load --concurrency 32 --requests 2000
+    python -m benchmarks.async_load --servers asgi --threads 8 --output async.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from benchmarks.seed import add_scale_arguments, seed_database
+from benchmarks.suite import bench_token, create_bench_app, summarize
+
+SERVERS = ("wsgi", "asgi")
+
+
+def endpoints():
+    end = date.today().isoformat()
+    start = (date.today() - timedelta(days=365)).isoformat()
+    return {
+        "GET /transactions/list": "/transactions/list?account_id=1&limit=100",
+        "GET /transactions/get": "/transactions/get/1",
+        "GET /generate_report": f"/generate_report?start_date={start}&end_date={end}&engine=sql",
+    }
+
+
+def serve(server, db_name, port, threads):
+    app = create_bench_app(db_name)
+    if server == "wsgi":
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class KeepAliveHandler(WSGIRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+        make_server("127.0.0.1", port, app, threaded=True, request_handler=KeepAliveHandler).serve_forever()
+    else:
+        import uvicorn
+        from app.asgi import AsyncAPI
+        uvicorn.run(AsyncAPI(app, threads=threads), host="127.0.0.1", port=port, log_level="warning")
+
+
+def load(port, path, cookie, concurrency, requests):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(count):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        mine = []
+        for _ in range(count):
+            started = time.perf_counter()
+            conn.request("GET", path, headers={"Cookie": cookie})
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - started)
+            if response.status != 200:
+                errors.append(response.status)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    workers = [
+        threading.Thread(target=client, args=(requests // concurrency + (1 if n < requests % concurrency else 0),))
+        for n in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies)
+    result["requests_per_sec"] = round(len(latencies) / elapsed, 2)
+    result["errors"] = len(errors)
+    return result
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+def run_server(server, db_name, args, cookie):
+    port = free_port()
+    process = multiprocessing.get_context("spawn").Process(target=serve, args=(server, db_name, port, args.threads), daemon=True)
+    process.start()
+    try:
+        wait_for_port(port)
+        results = {}
+        for name, path in endpoints().items():
+            load(port, path, cookie, args.concurrency, min(args.requests, 50))  # warm caches and pools
+            results[name] = load(port, path, cookie, args.concurrency, args.requests)
+        return results
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous keep-alive clients")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--threads", type=int, default=8, help="WSGI request threads / ASGI DB threads")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+    if "asgi" in args.servers:
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            parser.error("the asgi server needs uvicorn: pip install uvicorn")
+
+    fd, db_name = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["DB_POOL_SIZE"] = str(args.threads)
+    try:
+        scale = seed_database(db_name, args.users, args.accounts, args.transactions, args.budgets, seed=args.seed)
+        cookie = f"access_token_cookie={bench_token(create_bench_app(db_name))}"
+        report = {
+            "scale": scale,
+            "concurrency": args.concurrency,
+            "threads": args.threads,
+            "cpus": os.cpu_count(),
+            "results": {server: run_server(server, db_name, args, cookie) for server in args.servers},
+        }
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_name + suffix):
+                os.remove(db_name + suffix)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Memory and time of hydrating transaction rows: before and after slotted objects.
+
+"row_dict" is the previous list path (sqlite3.Row per row, then a 7-key dict
+built by indexing); "tuple_dict" is TransactionOperations.get_transactions as
+it is now (plain tuples unpacked into dicts). "dict_objects" and
+"slotted_objects" compare the old __dict__-backed Transaction shape with
+finance.Transaction.from_row. Run with e.g.
+
+    python -m benchmarks.domain_objects --rows 100000
+"""
+import argparse
+import gc
+import json
+import sqlite3
+import time
+import tracemalloc
+from app.models.database import TransactionOperations
+from finance.transaction import Transaction
+
+QUERY = "SELECT id, account_id, date, amount, type, description, category_name FROM transactions"
+
+
+class DictTransaction:
+    # Shape of finance.Transaction before __slots__
+    def __init__(self, account_id, date, amount, type, description, category_name):
+        self.account_id = account_id
+        self.date = date
+        self.amount = amount
+        self.type = type
+        self.description = description
+        self.category_name = category_name
+
+
+def build_db(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY, account_id INTEGER, date TEXT, amount INTEGER, type TEXT, description TEXT, category_name TEXT)")
+    conn.executemany(
+        "INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (?, ?, ?, ?, ?, ?)",
+        ((i % 50, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", i, "Expense", f"row {i}", "Food") for i in range(rows))
+    )
+    return conn
+
+
+def row_dict(conn):
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(QUERY).fetchall()
+    return [{
+        "id": row[0], "account_id": row[1], "date": row[2], "amount": row[3],
+        "type": row[4], "description": row[5], "category_name": row[6],
+    } for row in rows]
+
+
+def tuple_dict(conn):
+    conn.row_factory = sqlite3.Row
+    return TransactionOperations(conn).get_transactions()
+
+
+def dict_objects(conn):
+    conn.row_factory = sqlite3.Row
+    return [DictTransaction(*row[1:]) for row in conn.execute(QUERY).fetchall()]
+
+
+def slotted_objects(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return [Transaction.from_row(row) for row in cursor.execute(QUERY).fetchall()]
+
+
+def run(fn, conn, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn(conn)
+        timings.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    result = fn(conn)
+    _, peak = tracemalloc.get_traced_memory()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_ms": round(min(timings) * 1000, 2),
+        "retained_bytes": current,
+        "peak_bytes": peak,
+        "bytes_per_row": round(current / len(result), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = build_db(args.rows)
+    results = {fn.__name__: run(fn, conn, args.repeat) for fn in (row_dict, tuple_dict, dict_objects, slotted_objects)}
+    results["rows"] = args.rows
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Per-request logging overhead: old synchronous DEBUG logging vs the queue pipeline.
+
+"legacy" reproduces the previous setup (root logger at DEBUG, a synchronous
+StreamHandler formatting every record on the request thread); "queued" uses
+app.logging_config as create_app configures it. Both write to a temp file so
+terminal speed does not skew the result. Run with e.g.
+
+    python -m benchmarks.logging_overhead --iterations 500
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+from benchmarks.seed import add_scale_arguments, seed_database
+from benchmarks.suite import measure
+
+ROUTES = {
+    "GET /accounts": "/accounts",
+    "GET /transactions/list": "/transactions/list?limit=100",
+    "GET /dashboard": "/dashboard",
+}
+
+
+def build_client(db_name, mode, log_path):
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    from flask_jwt_extended import create_access_token
+    from app import create_app, logging_config
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, JWT_COOKIE_CSRF_PROTECT=False)
+    for limiter in app.extensions.get("limiter", ()):
+        limiter.enabled = False
+
+    root = logging.getLogger()
+    if mode == "legacy":
+        logging_config.stop_logging()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+    else:
+        # Same pipeline, but the listener writes to the temp file
+        listener = logging_config._listener
+        listener.handlers = (logging.FileHandler(log_path),)
+        listener.handlers[0].setFormatter(logging_config.JsonFormatter())
+
+    client = app.test_client()
+    with app.app_context():
+        client.set_cookie("access_token_cookie", create_access_token(identity='1'))
+    return client
+
+
+def run(db_name, mode, iterations):
+    fd, log_path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    try:
+        client = build_client(db_name, mode, log_path)
+        results = {}
+        for name, url in ROUTES.items():
+            results[name] = measure(lambda: client.get(url).get_data(), iterations)
+        from app import logging_config
+        logging_config.stop_logging()
+        results["log_bytes"] = os.path.getsize(log_path)
+        return results
+    finally:
+        os.remove(log_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    fd, db_name = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        seed_database(db_name, args.users, args.accounts, args.transactions, args.budgets, seed=args.seed)
+        results = {mode: run(db_name, mode, args.iterations) for mode in ("legacy", "queued")}
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_name + suffix):
+                os.remove(db_name + suffix)
+
+    results["p50_saved_ms"] = {
+        name: round(results["legacy"][name]["p50_ms"] - results["queued"][name]["p50_ms"], 4)
+        for name in ROUTES
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
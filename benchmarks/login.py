@@ -0,0 +1,103 @@
+"""Login throughput: POST /login with bcrypt at each --rounds cost.
+
+Seeds --users users whose passwords are hashed at the given cost, then has
+--clients threads log in through the Flask test client for --seconds and
+reports logins/sec and logins/sec per core. Hashing runs on the app's
+bounded pool (PASSWORD_HASH_THREADS, here --hash-threads), so "per core" divides by
+min(hash threads, cpus): the number of cores hashing can actually use.
+Each extra bcrypt round doubles the cost. Run with e.g.
+
+    python -m benchmarks.login --rounds 10 12 --clients 16
+    python -m benchmarks.login --rounds 12 --hash-threads 2 --output login.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from app.models.database import get_connection
+from app.passwords import password_hasher
+from benchmarks.seed import seed_database
+from benchmarks.suite import create_bench_app, summarize
+
+PASSWORD = "benchmark-password"
+
+
+def bench_rounds(db_name, rounds, args):
+    app = create_bench_app(db_name)
+    password_hasher.configure(scheme="bcrypt", rounds=rounds, threads=args.hash_threads, max_pending=args.clients)
+    hashed = password_hasher.hash(PASSWORD)
+    # All users share one hash; verifying it costs the same as distinct ones
+    with app.app_context():
+        conn = get_connection()
+        conn.execute("UPDATE users SET hashed_password = ?", (hashed,))
+        conn.commit()
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def client(n):
+        http = app.test_client()
+        mine = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = http.post("/login", data={"email": f"user{n % args.users + 1}@example.com", "password": PASSWORD})
+            mine.append(time.perf_counter() - started)
+            if response.status_code != 302:
+                errors.append(response.status_code)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    cores = min(args.hash_threads, os.cpu_count() or 1)
+    result = summarize(latencies)
+    result["logins_per_sec"] = round(len(latencies) / elapsed, 2)
+    result["logins_per_sec_per_core"] = round(len(latencies) / elapsed / cores, 2)
+    result["errors"] = len(errors)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12], help="bcrypt cost factors to compare")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=2 * (os.cpu_count() or 1), help="concurrent login threads")
+    parser.add_argument("--hash-threads", type=int, default=os.cpu_count() or 1, help="password hashing pool size")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per cost factor")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    fd, db_name = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        seed_database(db_name, args.users, accounts_per_user=1, transactions_per_account=0, budgets_per_user=0)
+        report = {
+            "users": args.users,
+            "clients": args.clients,
+            "hash_threads": args.hash_threads,
+            "cpus": os.cpu_count(),
+            "results": {f"bcrypt rounds={rounds}": bench_rounds(db_name, rounds, args) for rounds in args.rounds},
+        }
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_name + suffix):
+                os.remove(db_name + suffix)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
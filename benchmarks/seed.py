@@ -0,0 +1,94 @@
+"""Seed a synthetic finance.db at a configurable scale.
+
+    python -m benchmarks.seed bench.db --users 50 --accounts 3 --transactions 2000 --budgets 5
+"""
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from app.models.database import RollupOperations, migrate
+
+CATEGORIES = ["Food", "Rent", "Transport", "Utilities", "Entertainment", "Health", "Travel", "Shopping", "Salary"]
+
+
+def seed_database(db_name, users=10, accounts_per_user=2, transactions_per_account=1000, budgets_per_user=4, days=365, seed=0):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    first_day = date.today() - timedelta(days=days)
+    conn = sqlite3.connect(db_name)
+    migrate(conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (id, name, email, hashed_password, is_admin) VALUES (?, ?, ?, ?, 0)",
+            [(user_id, f"User {user_id}", f"user{user_id}@example.com", "bench") for user_id in range(1, users + 1)]
+        )
+        accounts = [
+            ((user_id - 1) * accounts_per_user + n + 1, user_id, f"Account {n + 1}", 0)
+            for user_id in range(1, users + 1)
+            for n in range(accounts_per_user)
+        ]
+        conn.executemany("INSERT INTO accounts (id, user_id, name, balance) VALUES (?, ?, ?, ?)", accounts)
+        conn.executemany(
+            "INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (?, ?, ?, 0)",
+            [
+                (user_id, category, rng.randint(20000, 200000))
+                for user_id in range(1, users + 1)
+                for category in CATEGORIES[:budgets_per_user]
+            ]
+        )
+        for account_id, _, _, _ in accounts:
+            rows = []
+            for _ in range(transactions_per_account):
+                category = rng.choice(CATEGORIES)
+                type = "Income" if category == "Salary" else "Expense"
+                day = (first_day + timedelta(days=rng.randrange(days))).isoformat()
+                rows.append((account_id, day, rng.randint(100, 50000), type, f"{category} payment", category))
+            conn.executemany(
+                "INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        conn.execute('''
+            UPDATE accounts SET balance = COALESCE((
+                SELECT SUM(CASE WHEN type = 'Income' THEN amount ELSE -amount END)
+                FROM transactions WHERE account_id = accounts.id
+            ), 0)
+        ''')
+        conn.execute('''
+            UPDATE budgets SET amount_used = COALESCE((
+                SELECT SUM(t.amount) FROM transactions t JOIN accounts a ON a.id = t.account_id
+                WHERE a.user_id = budgets.user_id AND t.category_name = budgets.category_name AND t.type = 'Expense'
+            ), 0)
+        ''')
+        # Budgets sit a little above what was spent so later writes validate
+        conn.execute("UPDATE budgets SET amount = MAX(amount, amount_used * 5 / 4)")
+    RollupOperations(conn).rebuild()
+    conn.close()
+    return {
+        "users": users,
+        "accounts": users * accounts_per_user,
+        "transactions": users * accounts_per_user * transactions_per_account,
+        "budgets": users * budgets_per_user,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def add_scale_arguments(parser):
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=2, help="accounts per user")
+    parser.add_argument("--transactions", type=int, default=1000, help="transactions per account")
+    parser.add_argument("--budgets", type=int, default=4, help="budgets per user")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    print(json.dumps(seed_database(args.db, args.users, args.accounts, args.transactions, args.budgets, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
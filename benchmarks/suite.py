@@ -0,0 +1,220 @@
+"""Latency/throughput benchmarks for the database operations layer and routes.
+
+Seeds a synthetic database (see benchmarks.seed), times the operations
+classes and ReportGenerator directly, then the JSON routes through the Flask
+test client. Results are written as JSON; pass a previous results file with
+--baseline to flag regressions. Run with e.g.
+
+    python -m benchmarks.suite --users 20 --transactions 5000 --output results.json
+    python -m benchmarks.suite --output new.json --baseline results.json --threshold 0.25
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from app.models.database import AccountOperations, BudgetOperations, TransactionOperations
+from app.models.database.db_connection import get_connection
+from benchmarks.seed import CATEGORIES, add_scale_arguments, seed_database
+from finance.report_cache import ReportCache
+from finance.report_generator import ReportGenerator
+
+
+def measure(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(len(ordered) / total, 2) if total else None,
+    }
+
+
+def bench_operations(db_name, scale, iterations, rng):
+    conn = get_connection(db_name)
+    transactions = TransactionOperations(conn)
+    accounts = AccountOperations(conn)
+    budgets = BudgetOperations(conn)
+    account_ids = range(1, scale["accounts"] + 1)
+    user_ids = range(1, scale["users"] + 1)
+    end = date.today()
+    start = end - timedelta(days=30)
+    results = {}
+
+    added = []
+
+    def add():
+        category = rng.choice(CATEGORIES[:-1])
+        added.append(transactions.add_transaction(rng.choice(account_ids), end.isoformat(), 1250, "Expense", "bench", category))
+
+    results["transactions.add_transaction"] = measure(add, iterations)
+    results["transactions.get_transactions"] = measure(
+        lambda: transactions.get_transactions([rng.choice(account_ids)], start.isoformat(), end.isoformat()), iterations
+    )
+    results["transactions.get_transactions_page"] = measure(
+        lambda: transactions.get_transactions_page([rng.choice(account_ids)], limit=100), iterations
+    )
+    pending = iter(list(added))
+    results["transactions.delete_transaction"] = measure(lambda: transactions.delete_transaction(next(pending)), len(added) - 3)
+    results["accounts.get_user_accounts"] = measure(lambda: accounts.get_user_accounts(rng.choice(user_ids)), iterations)
+    results["budgets.set_budget"] = measure(
+        lambda: budgets.set_budget(rng.choice(user_ids), rng.choice(CATEGORIES[:-1]), rng.randint(1, 10) * 100_000_000), iterations
+    )
+
+    year_start = (end - timedelta(days=365)).isoformat()
+    for engine in ("sql", "pandas"):
+        generator = ReportGenerator(conn, engine=engine)
+        results[f"report.generate_report[{engine}]"] = measure(
+            lambda: generator.generate_report(rng.choice(user_ids), year_start, end.isoformat()), iterations
+        )
+    cached = ReportGenerator(conn, cache=ReportCache())
+    results["report.generate_report[cached]"] = measure(
+        lambda: cached.generate_report(1, year_start, end.isoformat()), iterations
+    )
+    conn.close()
+    return results
+
+
+def create_bench_app(db_name):
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    from app import create_app
+
+    app = create_app()
+    # /login issues integer identities, which newer PyJWT rejects as "sub"
+    app.config.update(WTF_CSRF_ENABLED=False, JWT_COOKIE_CSRF_PROTECT=False)
+    for limiter in app.extensions.get("limiter", ()):
+        limiter.enabled = False
+    # Keep request logging from dominating the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    return app
+
+
+def bench_token(app, identity=1):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        return create_access_token(identity=str(identity))
+
+
+def bench_routes(db_name, iterations):
+    app = create_bench_app(db_name)
+    client = app.test_client()
+    client.set_cookie("access_token_cookie", bench_token(app))
+
+    end = date.today().isoformat()
+    start = (date.today() - timedelta(days=365)).isoformat()
+    routes = {
+        "GET /accounts": "/accounts",
+        "GET /transactions/list": "/transactions/list?account_id=1&limit=100",
+        "GET /transactions/list[ndjson]": "/transactions/list?format=ndjson&limit=1000",
+        "GET /generate_report": f"/generate_report?start_date={start}&end_date={end}&engine=sql",
+    }
+    results = {}
+    for name, url in routes.items():
+        def request():
+            response = client.get(url)
+            response.get_data()
+            if response.status_code != 200:
+                raise RuntimeError(f"{name} returned {response.status_code}")
+        results[name] = measure(request, iterations)
+    return results
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, stats in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("p50_ms"):
+            continue
+        change = (stats["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"]
+        stats["p50_change"] = round(change, 4)
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="previous results file to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--keep-db", action="store_true", help="leave the seeded database in place")
+    args = parser.parse_args()
+
+    fd, db_name = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        scale = seed_database(db_name, args.users, args.accounts, args.transactions, args.budgets, seed=args.seed)
+        results = bench_operations(db_name, scale, args.iterations, random.Random(args.seed))
+        if not args.skip_routes:
+            results.update(bench_routes(db_name, args.iterations))
+    finally:
+        if not args.keep_db:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_name + suffix):
+                    os.remove(db_name + suffix)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scale": scale,
+        "iterations": args.iterations,
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report["regressions"] = regressions
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if args.keep_db:
+        print(f"Seeded database kept at {db_name}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+# Helper methods
+def _percentile(ordered, fraction):
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Reader/writer concurrency on finance.db under different storage profiles.
+
+One writer thread posts expenses through TransactionOperations.add_transaction
+while reader threads list transactions for the same account, as
+/transactions/list and /generate_report do. Run with e.g.
+
+    python -m benchmarks.wal_concurrency --profiles legacy production --seconds 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from app.models.database import TransactionOperations
+from app.models.database.db_connection import ConnectionPool, create_tables, get_storage_profile
+
+
+def seed(db_name, rows):
+    pool = ConnectionPool(db_name, size=1, pragmas=get_storage_profile("legacy"))
+    conn = pool.checkout()
+    create_tables(conn)
+    with conn:
+        conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'bench', 'bench@example.com', 'x')")
+        conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 0)")
+        conn.executemany(
+            "INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (1, ?, ?, 'Expense', 'seed', 'Food')",
+            [(f"2024-01-{i % 28 + 1:02d}", 100) for i in range(rows)]
+        )
+    pool.checkin(conn)
+    pool.close()
+
+
+def run_profile(profile, readers, seconds, rows):
+    fd, db_name = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        seed(db_name, rows)
+        pool = ConnectionPool(db_name, size=readers + 1, pragmas=get_storage_profile(profile))
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "busy_errors": 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def writer():
+            conn = pool.checkout()
+            ops = TransactionOperations(conn)
+            while not stop.is_set():
+                try:
+                    ops.add_transaction(1, "2024-02-01", 100, "Expense", "bench", "Food")
+                    with lock:
+                        counts["writes"] += 1
+                except Exception:
+                    with lock:
+                        counts["busy_errors"] += 1
+            pool.checkin(conn)
+
+        def reader():
+            conn = pool.checkout()
+            ops = TransactionOperations(conn)
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    ops.get_transactions(account_ids=[1], start_date="2024-01-10", end_date="2024-01-20")
+                except Exception:
+                    with lock:
+                        counts["busy_errors"] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                with lock:
+                    counts["reads"] += 1
+                    latencies.append(elapsed)
+            pool.checkin(conn)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        pool.close()
+
+        latencies.sort()
+        return {
+            "profile": profile,
+            "readers": readers,
+            "seconds": seconds,
+            "reads_per_sec": counts["reads"] / seconds,
+            "writes_per_sec": counts["writes"] / seconds,
+            "busy_errors": counts["busy_errors"],
+            "read_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+            "read_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+        }
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(db_name + suffix):
+                os.remove(db_name + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "production"])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args.readers, args.seconds, args.rows) for profile in args.profiles]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of the production WSGI server (gunicorn.conf.py) as workers grow.
+
+Seeds a database (see benchmarks.seed), then for each --workers count starts
+gunicorn with the repo's config (preloaded app, gthread workers with
+--threads threads each), waits for /readyz and drives the transaction and
+report routes with --concurrency keep-alive clients. "scaling" is requests/sec
+relative to one worker; on an N-core box expect it to track the worker
+count up to about N, after which SQLite write locking and the client itself
+flatten it. Needs gunicorn (pip install gunicorn). Run with e.g.
+
+    python -m benchmarks.wsgi_scaling --workers 1 2 4 8 --concurrency 64
+    python -m benchmarks.wsgi_scaling --transactions 5000 --output scaling.json
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from benchmarks.async_load import free_port, load
+from benchmarks.seed import add_scale_arguments, seed_database
+from benchmarks.suite import bench_token, create_bench_app
+
+
+def routes():
+    end = date.today().isoformat()
+    start = (date.today() - timedelta(days=365)).isoformat()
+    return {
+        "GET /transactions/list": "/transactions/list?account_id=1&limit=100",
+        "GET /generate_report": f"/generate_report?start_date={start}&end_date={end}&engine=sql",
+    }
+
+
+def run_gunicorn(db_name, workers, threads, cookie, args):
+    port = free_port()
+    env = dict(
+        os.environ,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_LOG_LEVEL="warning",
+        DB_POOL_SIZE=str(threads),
+    )
+    # The bench factory disables rate limiting and CSRF and relaxes "sub"
+    command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", f"benchmarks.suite:create_bench_app({db_name!r})"]
+    server = subprocess.Popen(command, env=env)
+    try:
+        _wait_until_ready(port)
+        results = {}
+        for name, path in routes().items():
+            load(port, path, cookie, args.concurrency, min(args.requests, 100))  # warm every worker
+            results[name] = load(port, path, cookie, args.concurrency, args.requests)
+        return results
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker")
+    parser.add_argument("--concurrency", type=int, default=32, help="simultaneous keep-alive clients")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route per worker count")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+    if shutil.which("gunicorn") is None:
+        parser.error("gunicorn is not installed: pip install gunicorn")
+
+    fd, db_name = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        scale = seed_database(db_name, args.users, args.accounts, args.transactions, args.budgets, seed=args.seed)
+        cookie = f"access_token_cookie={bench_token(create_bench_app(db_name))}"
+        results = {workers: run_gunicorn(db_name, workers, args.threads, cookie, args) for workers in args.workers}
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_name + suffix):
+                os.remove(db_name + suffix)
+
+    baseline = results[min(results)]
+    for workers, per_route in results.items():
+        for name, result in per_route.items():
+            result["scaling"] = round(result["requests_per_sec"] / baseline[name]["requests_per_sec"], 2)
+    report = {
+        "scale": scale,
+        "cpus": os.cpu_count(),
+        "threads_per_worker": args.threads,
+        "concurrency": args.concurrency,
+        "results": {str(workers): per_route for workers, per_route in results.items()},
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    for workers, per_route in results.items():
+        summary = ", ".join(f"{name} {result['requests_per_sec']} req/s (x{result['scaling']}, p99 {result['p99_ms']} ms)" for name, result in per_route.items())
+        print(f"{workers} workers: {summary}", file=sys.stderr)
+
+
+# Helper methods
+def _wait_until_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn on port {port} was not ready within {timeout}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,65 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your_secret_key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_jwt_secret_key')
     DB_NAME = os.getenv('DB_NAME', 'finance.db')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    # Threads running SQLite work for the ASGI server (asgi.py); 0 means DB_POOL_SIZE
+    ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', 0))
+    # One of db_connection.STORAGE_PROFILES: legacy, development, testing, production.
+    # Unset, FLASK_ENV=development or testing picks that profile; any other
+    # environment (staging, ...) runs production.
+    DB_STORAGE_PROFILE = os.getenv('DB_STORAGE_PROFILE') or (
+        os.getenv('FLASK_ENV') if os.getenv('FLASK_ENV') in ('development', 'testing') else 'production'
+    )
+    # 'sql' reads the rollup tables, 'pandas' uses finance.analytics
+    REPORT_ENGINE = os.getenv('REPORT_ENGINE', 'sql')
+    REPORT_CACHE_SIZE = int(os.getenv('REPORT_CACHE_SIZE', 256))
+    REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL', 300))
+    REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    # Process-wide cache of user rows and account ownership; writes in this
+    # process invalidate it, other processes see them within ENTITY_CACHE_TTL
+    ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 1024))
+    ENTITY_CACHE_TTL = float(os.getenv('ENTITY_CACHE_TTL', 60))
+    # Admin list totals are cached per filter for this many seconds (0 disables)
+    ADMIN_COUNT_CACHE_TTL = float(os.getenv('ADMIN_COUNT_CACHE_TTL', 30))
+    # Password hashing: 'bcrypt' (cost PASSWORD_HASH_ROUNDS) or 'pbkdf2'. Stored
+    # hashes made with other settings are upgraded on the next login.
+    PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'bcrypt')
+    PASSWORD_HASH_ROUNDS = int(os.getenv('PASSWORD_HASH_ROUNDS', 12))
+    PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 600000))
+    # Hashing threads per process (0 means min(4, cpus)) and how many more
+    # logins may wait for one before they are turned away with a 503
+    PASSWORD_HASH_THREADS = int(os.getenv('PASSWORD_HASH_THREADS', 0))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+    # Background report jobs (PDF, charts): pool processes per web process,
+    # queued/running jobs overall and per user, and where finished files go
+    REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_MAX_ACTIVE = int(os.getenv('REPORT_JOB_MAX_ACTIVE', 100))
+    REPORT_JOB_MAX_PER_USER = int(os.getenv('REPORT_JOB_MAX_PER_USER', 3))
+    REPORT_JOB_DIR = os.getenv('REPORT_JOB_DIR', 'report_jobs')
+    # Queued/running jobs older than REPORT_JOB_TIMEOUT seconds, or whose web
+    # process is gone, are failed; finished files are deleted after
+    # REPORT_JOB_RETENTION seconds. Both are checked on every enqueue.
+    REPORT_JOB_TIMEOUT = float(os.getenv('REPORT_JOB_TIMEOUT', 1800))
+    REPORT_JOB_RETENTION = float(os.getenv('REPORT_JOB_RETENTION', 86400))
+    # Templates are compiled once per process (at startup with
+    # TEMPLATE_PRECOMPILE) and their bytecode kept in TEMPLATE_BYTECODE_CACHE_DIR
+    # (empty: a private temp directory). Fragment caching keeps expensive
+    # blocks such as account lists in the report cache until the user's data changes.
+    TEMPLATE_PRECOMPILE = os.getenv('TEMPLATE_PRECOMPILE', 'true').lower() in ('1', 'true', 'yes')
+    TEMPLATE_BYTECODE_CACHE = os.getenv('TEMPLATE_BYTECODE_CACHE', 'true').lower() in ('1', 'true', 'yes')
+    TEMPLATE_BYTECODE_CACHE_DIR = os.getenv('TEMPLATE_BYTECODE_CACHE_DIR', '')
+    TEMPLATE_FRAGMENT_CACHE = os.getenv('TEMPLATE_FRAGMENT_CACHE', 'true').lower() in ('1', 'true', 'yes')
+    # Request instrumentation: Server-Timing header, /metrics and sampled cProfile dumps
+    INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_SLOW_REQUEST_MS = float(os.getenv('PROFILE_SLOW_REQUEST_MS', 500))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    # /metrics answers admins and requests carrying "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    METRICS_RATE_LIMIT = os.getenv('METRICS_RATE_LIMIT', '60 per minute')
+    # Root level plus per-logger overrides, e.g. LOG_LEVELS="app.routes=DEBUG,finance=WARNING"
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    # 'json' (one object per line) or 'text'
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
@@ -1,57 +1,14 @@
-import sqlite3
 import logging
+from app.models.database import get_connection, migrate
 
-logging.basicConfig(level=logging.INFO)
-
-def create_schema():
-    connection = sqlite3.connect('finance.db')
-    cursor = connection.cursor()
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT NOT NULL UNIQUE,
-        hashed_password TEXT NOT NULL
-    )
-    ''')
+logger = logging.getLogger(__name__)
 
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS accounts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        name TEXT NOT NULL,
-        balance REAL NOT NULL,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS transactions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        account_id INTEGER,
-        date TEXT NOT NULL,
-        amount REAL NOT NULL,
-        type TEXT NOT NULL,
-        description TEXT,
-        category_name TEXT,
-        FOREIGN KEY (account_id) REFERENCES accounts (id)
-    )
-    ''')
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS budgets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        category_name TEXT NOT NULL,
-        amount REAL NOT NULL,
-        amount_used REAL NOT NULL DEFAULT 0,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
+logging.basicConfig(level=logging.INFO)
 
-    logging.info('Database created.')
-    connection.commit()
+def create_schema(db_name='finance.db'):
+    connection = get_connection(db_name)
+    version = migrate(connection)
+    logger.info('Database schema at version %s.', version)
     connection.close()
 
 if __name__ == "__main__":
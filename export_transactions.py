@@ -0,0 +1,74 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from app.models.database import get_connection, AccountOperations, TransactionOperations
+from finance.transaction_export import FORMATS, export_transactions
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(level=logging.INFO)
+
+def export_file(path, user_id=None, account_ids=None, export_format=None, start_date=None, end_date=None, chunk_size=50000, db_name='finance.db'):
+    # path '-' writes to stdout; the format defaults to the file extension
+    export_format = export_format or path.rsplit('.', 1)[-1].lower()
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    started = time.perf_counter()
+    connection = get_connection(db_name)
+    accounts = AccountOperations(connection)
+    currencies = {}
+    if user_id is not None:
+        currencies.update((account.id, account.currency) for account in accounts.get_user_accounts(user_id))
+    for account_id in account_ids or []:
+        owner = accounts.get_account_owner(account_id)
+        if owner is None:
+            raise ValueError(f"Account {account_id} not found")
+        currencies[account_id] = owner[1]
+
+    stats = {"rows": 0, "bytes": 0}
+
+    def counted(chunks):
+        for rows in chunks:
+            stats["rows"] += len(rows)
+            yield rows
+
+    chunks = iter(())
+    if currencies:
+        chunks = TransactionOperations(connection).iter_transaction_chunks(
+            account_ids=list(currencies),
+            start_date=start_date,
+            end_date=end_date,
+            chunk_size=chunk_size
+        )
+    stream = sys.stdout.buffer if path == '-' else open(path, 'wb')
+    try:
+        for data in export_transactions(counted(chunks), currencies, export_format):
+            stream.write(data)
+            stats["bytes"] += len(data)
+    finally:
+        if stream is not sys.stdout.buffer:
+            stream.close()
+        connection.close()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] else None
+    logger.info("Exported %s transactions (%s bytes) as %s in %ss", stats["rows"], stats["bytes"], export_format, stats["seconds"])
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a user's or accounts' transactions as CSV or Parquet.")
+    parser.add_argument('path', help="output file, or - for stdout")
+    parser.add_argument('--user-id', type=int, help="export every account of this user")
+    parser.add_argument('--account-id', type=int, action='append', dest='account_ids', help='export this account (repeatable)')
+    parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+    parser.add_argument('--start-date', help='YYYY-MM-DD')
+    parser.add_argument('--end-date', help='YYYY-MM-DD')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='rows per chunk (and Parquet row group)')
+    parser.add_argument('--db', default='finance.db')
+    args = parser.parse_args()
+    if args.user_id is None and not args.account_ids:
+        parser.error('pass --user-id or --account-id')
+    stats = export_file(args.path, args.user_id, args.account_ids, args.format, args.start_date, args.end_date, args.chunk_size, args.db)
+    if args.path != '-':
+        print(json.dumps(stats, indent=2))
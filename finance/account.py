@@ -1,23 +1,39 @@
+from finance.money import DEFAULT_CURRENCY, from_minor
+
+
 class Account:
-    def __init__(self, id, user_id, name, balance):
+    __slots__ = ("id", "user_id", "name", "balance", "currency")
+
+    def __init__(self, id, user_id, name, balance, currency=DEFAULT_CURRENCY):
         self.id = id
         self.user_id = user_id
         self.name = name
-        self.balance = balance
+        self.balance = balance  # integer minor units of currency
+        self.currency = currency
+
+    @classmethod
+    def from_row(cls, row):
+        # Rows read back from the database were validated on the way in
+        account = cls.__new__(cls)
+        account.id, account.user_id, account.name, account.balance, account.currency = row
+        return account
 
     def to_dict(self):
         return {
             "id": self.id,
             "user_id": self.user_id,
             "name": self.name,
-            "balance": self.balance
+            "balance": float(from_minor(self.balance, self.currency)),
+            "currency": self.currency
         }
 
     def validate(self):
         if not self.name:
             raise ValueError("Account name cannot be empty")
+        if not isinstance(self.balance, int):
+            raise ValueError("Balance must be an integer number of minor units")
         if self.balance < 0:
             raise ValueError("Balance cannot be negative")
 
     def __str__(self):
-        return f"Account(id={self.id}, user_id={self.user_id}, name={self.name}, balance={self.balance})"
+        return f"Account(id={self.id}, user_id={self.user_id}, name={self.name}, balance={self.balance}, currency={self.currency})"
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+TRANSACTION_COLUMNS = ["id", "account_id", "date", "amount", "type", "description", "category_name"]
+
+
+class TransactionAnalytics:
+    def __init__(self, frame):
+        self.frame = frame
+
+    @classmethod
+    def load(cls, conn, user_id, start_date=None, end_date=None):
+        query = """
+            SELECT t.id, t.account_id, t.date, t.amount, t.type, t.description, t.category_name
+            FROM transactions t
+            JOIN accounts a ON a.id = t.account_id
+            WHERE a.user_id = ?
+        """
+        params = [user_id]
+
+        if start_date:
+            query += " AND t.date >= ?"
+            params.append(start_date)
+
+        if end_date:
+            query += " AND t.date <= ?"
+            params.append(end_date)
+
+        query += " ORDER BY t.date, t.id"
+        rows = conn.execute(query, params).fetchall()
+        return cls(cls.from_rows(rows))
+
+    @staticmethod
+    def from_rows(rows):
+        frame = pd.DataFrame.from_records([tuple(row) for row in rows], columns=TRANSACTION_COLUMNS)
+        frame["category_name"] = frame["category_name"].fillna("")
+        frame = frame.astype({
+            "id": "int64",
+            "account_id": "int64",
+            "amount": "int64",  # minor units: sums stay exact
+            "type": pd.CategoricalDtype(["Expense", "Income"]),
+            "description": "string",
+            "category_name": "category",
+        })
+        frame["date"] = pd.to_datetime(frame["date"], format="%Y-%m-%d")
+        frame["signed_amount"] = np.where(frame["type"] == "Income", frame["amount"], -frame["amount"].abs())
+        return frame
+
+    def cash_flow(self):
+        # Same shape as the SQL/rollup totals: one row per (date, type, category)
+        totals = (
+            self.frame
+            .groupby(["date", "type", "category_name"], observed=True, sort=True)["signed_amount"]
+            .sum()
+            .reset_index(name="total")
+        )
+        totals["date"] = totals["date"].dt.strftime("%Y-%m-%d")
+        return totals
+
+    def totals(self):
+        income = self.frame.loc[self.frame["type"] == "Income", "signed_amount"].sum()
+        expense = self.frame.loc[self.frame["type"] == "Expense", "signed_amount"].sum()
+        return {"income": int(income), "expense": int(expense), "net": int(income + expense)}
+
+    def category_breakdown(self):
+        breakdown = (
+            self.frame
+            .groupby(["type", "category_name"], observed=True)["signed_amount"]
+            .agg(total="sum", count="size")
+            .reset_index()
+        )
+        type_totals = breakdown.groupby("type", observed=True)["total"].transform("sum")
+        breakdown["share"] = (breakdown["total"] / type_totals.replace(0, np.nan)).fillna(0.0)
+        return breakdown
+
+    def running_balances(self, opening_balances=None):
+        frame = self.frame[["id", "account_id", "date", "signed_amount"]].copy()
+        opening = frame["account_id"].map(opening_balances or {}).fillna(0).astype("int64")
+        frame["balance"] = opening + frame.groupby("account_id")["signed_amount"].cumsum()
+        return frame
+
+    def month_over_month(self):
+        monthly = (
+            self.frame
+            .groupby([self.frame["date"].dt.to_period("M"), "type"], observed=True)["signed_amount"]
+            .sum()
+            .unstack("type", fill_value=0)
+            .reindex(columns=["Income", "Expense"], fill_value=0)
+        )
+        monthly.columns = ["income", "expense"]
+        monthly["net"] = monthly["income"] + monthly["expense"]
+        monthly["net_change"] = monthly["net"].diff()
+        monthly["net_change_pct"] = monthly["net"].pct_change(fill_method=None).replace([np.inf, -np.inf], np.nan)
+        monthly.index = monthly.index.astype(str)
+        return monthly.reset_index(names="month")
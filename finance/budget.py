@@ -1,4 +1,9 @@
+from finance.money import DEFAULT_CURRENCY, from_minor
+
+
 class Budget:
+    __slots__ = ("id", "user_id", "category_name", "amount", "amount_used")
+
     def __init__(self, id, user_id, category_name, amount, amount_used):
         self.id = id
         self.user_id = user_id
@@ -6,18 +11,27 @@ class Budget:
         self.amount = amount
         self.amount_used = amount_used
 
-    def to_dict(self):
+    @classmethod
+    def from_row(cls, row):
+        # Rows read back from the database were validated on the way in
+        budget = cls.__new__(cls)
+        budget.id, budget.user_id, budget.category_name, budget.amount, budget.amount_used = row
+        return budget
+
+    def to_dict(self, currency=DEFAULT_CURRENCY):
         return {
             'id': self.id,
             'user_id': self.user_id,
             'category_name': self.category_name,
-            'amount': self.amount,
-            'amount_used': self.amount_used
+            'amount': float(from_minor(self.amount, currency)),
+            'amount_used': float(from_minor(self.amount_used, currency))
         }
 
     def validate(self):
         if not self.category_name:
             raise ValueError("Category name cannot be empty")
+        if not isinstance(self.amount, int) or not isinstance(self.amount_used, int):
+            raise ValueError("Budget amounts must be integer numbers of minor units")
         if self.amount < 0:
             raise ValueError("Budget amount cannot be negative")
         if self.amount_used < 0:
@@ -1,13 +1,18 @@
+from finance.money import DEFAULT_CURRENCY, format_money
+
+
 class CashFlow:
-    def __init__(self):
+    # Amounts are integer minor units, so totals are exact
+    def __init__(self, currency=DEFAULT_CURRENCY):
+        self.currency = currency
         self.inflows = []
         self.outflows = []
 
     def add_inflow(self, amount, description, date):
-        self.inflows.append((amount, description, date))
+        self.inflows.append((int(amount), description, date))
 
     def add_outflow(self, amount, description, date):
-        self.outflows.append((amount, description, date))  # Store outflows as positive values
+        self.outflows.append((int(amount), description, date))  # Store outflows as positive values
 
     def calculate_net_cash_flow(self):
         total_inflows = sum(amount for amount, _, _ in self.inflows)
@@ -20,10 +25,10 @@ class CashFlow:
         report += "-" * 40 + "\n"
         report += "Inflows:\n"
         for amount, description, date in self.inflows:
-            report += f"{date} - {description}: {amount}\n"
+            report += f"{date} - {description}: {format_money(amount, self.currency)}\n"
         report += "Outflows:\n"
         for amount, description, date in self.outflows:
-            report += f"{date} - {description}: {amount}\n"  # Display outflows as positive
+            report += f"{date} - {description}: {format_money(amount, self.currency)}\n"  # Display outflows as positive
         net_cash_flow = self.calculate_net_cash_flow()
-        report += f"Net Cash Flow: {net_cash_flow}\n"
+        report += f"Net Cash Flow: {format_money(net_cash_flow, self.currency)}\n"
         return report
@@ -0,0 +1,25 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+
+DEFAULT_CURRENCY = "USD"
+# ISO 4217 minor-unit exponents; anything not listed has two decimal places
+MINOR_UNITS = {"JPY": 0, "KRW": 0, "ISK": 0, "BHD": 3, "KWD": 3, "JOD": 3, "TND": 3}
+
+
+def exponent(currency=DEFAULT_CURRENCY):
+    return MINOR_UNITS.get((currency or DEFAULT_CURRENCY).upper(), 2)
+
+
+def to_minor(amount, currency=DEFAULT_CURRENCY):
+    # Major units in (12.5, "12.50", Decimal), integer minor units out
+    # (1250). Floats go through str() so 0.1 becomes 10 exactly.
+    value = Decimal(str(amount)) if isinstance(amount, float) else Decimal(amount)
+    return int(value.scaleb(exponent(currency)).quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+
+def from_minor(minor, currency=DEFAULT_CURRENCY):
+    return Decimal(int(minor)).scaleb(-exponent(currency))
+
+
+def format_money(minor, currency=DEFAULT_CURRENCY):
+    places = exponent(currency)
+    return f"{from_minor(minor, currency):.{places}f}"
@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReportCache:
+    def __init__(self, max_entries=256, ttl=300, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._account_users = {}
+        self._generation = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def configure(self, max_entries=None, ttl=None, max_bytes=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl is not None:
+                self.ttl = ttl
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, generation=None, account_ids=()):
+        # Keys start with the user id so a write can drop every entry for that
+        # user; account_ids lets writes that only know the account do the same.
+        # Pass the generation read before building the value: if any write
+        # landed in between, the value may be stale and is not stored.
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._user_keys.setdefault(key[0], set()).add(key)
+            for account_id in account_ids:
+                self._account_users[account_id] = key[0]
+            self._bytes += size
+            self._evict()
+
+    def invalidate_user(self, user_id):
+        user_id = _normalize_user_id(user_id)
+        with self._lock:
+            self._generation += 1
+            keys = self._user_keys.pop(user_id, ())
+            for key in list(keys):
+                self._remove(key)
+            if keys:
+                self._counters["invalidations"] += len(keys)
+
+    def invalidate_account(self, account_id):
+        with self._lock:
+            user_id = self._account_users.get(account_id)
+        if user_id is None:
+            # No cached report covers this account, only fence in-flight builds
+            with self._lock:
+                self._generation += 1
+        else:
+            self.invalidate_user(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self._account_users.clear()
+            self._generation += 1
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes,
+                        max_entries=self.max_entries, max_bytes=self.max_bytes, ttl=self.ttl)
+
+    # Helper methods
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+
+def _normalize_user_id(user_id):
+    # JWT identities may arrive as strings while report keys use ints
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return user_id
+
+
+def _estimate_size(value):
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+report_cache = ReportCache()
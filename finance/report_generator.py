@@ -1,24 +1,37 @@
-from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
 from finance.cashflow import CashFlow
+from finance.money import DEFAULT_CURRENCY, format_money
+
+ENGINES = ("sql", "pandas")
+# Bump when the report layout changes so cached reports are not reused
+REPORT_VERSION = 2
 
 class ReportGenerator:
-    def __init__(self, db):
+    def __init__(self, db, engine="sql", cache=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown report engine: {engine}")
         self.db = db
-        self.env = Environment(loader=FileSystemLoader('templates'))  # Adjust the path if needed
+        self.engine = engine
+        self.cache = cache
 
     def generate_balance_sheet(self, user):
         from app.models.database import AccountOperations
         accounts_db = AccountOperations(self.db)
         
-        accounts = accounts_db.get_accounts(user.id)
-        total_balance = sum(account.balance for account in accounts)
+        accounts = accounts_db.get_user_accounts(user.id)
+        totals = {}
+        for account in accounts:
+            totals[account.currency] = totals.get(account.currency, 0) + account.balance
         report_lines = [
             f"Balance Sheet for {user.name}",
             "-" * 40
         ]
-        report_lines += [f"Account {account.name}: {account.balance}" for account in accounts]
-        report_lines.append(f"Total Balance: {total_balance}")
+        report_lines += [f"Account {account.name}: {format_money(account.balance, account.currency)}" for account in accounts]
+        if len(totals) > 1:
+            # Balances in different currencies are totalled separately
+            report_lines += [f"Total Balance ({currency}): {format_money(total, currency)}" for currency, total in sorted(totals.items())]
+        else:
+            currency, total = next(iter(totals.items()), (DEFAULT_CURRENCY, 0))
+            report_lines.append(f"Total Balance: {format_money(total, currency)}")
         return "\n".join(report_lines)
 
     def generate_budget_report(self, user):
@@ -26,41 +39,68 @@ class ReportGenerator:
         budgets_db = BudgetOperations(self.db)
 
         budgets = budgets_db.conn.execute("SELECT category_name, amount, amount_used FROM budgets WHERE user_id = ?", (user.id,)).fetchall()
+        currency = self._user_currency(user)
         report_lines = [
             "Budget Report",
             "-" * 40
         ]
         for budget in budgets:
             amount_used = budget["amount_used"] if budget["amount_used"] else 0
-            percentage_used = (amount_used / budget["amount"]) * 100 if budget["amount"] else 0
-            report_lines.append(f"Category {budget['category_name']}: amount used: {amount_used}, which is {percentage_used:.2f}% of budget, Limit {budget['amount']}")
+            percentage_used = (amount_used * 100 / budget["amount"]) if budget["amount"] else 0
+            report_lines.append(
+                f"Category {budget['category_name']}: amount used: {format_money(amount_used, currency)}, "
+                f"which is {percentage_used:.2f}% of budget, Limit {format_money(budget['amount'], currency)}"
+            )
         return "\n".join(report_lines)
 
     def generate_cash_flow_statement(self, user, start_date=None, end_date=None):
-        from app.models.database import AccountOperations, TransactionOperations
-        accounts_db = AccountOperations(self.db)
-        transaction_db = TransactionOperations(self.db)
+        if self.engine == "pandas":
+            return self._generate_cash_flow_statement_pandas(user, start_date, end_date)
+
+        from app.models.database import RollupOperations
+        rollups_db = RollupOperations(self.db)
         
-        cash_flow = CashFlow()
-        accounts = accounts_db.get_accounts(user.id)
+        cash_flow = CashFlow(self._user_currency(user))
+        # Daily rollups are maintained with every transaction write, so the
+        # cost here depends on the number of days, not transactions.
+        for date, type, category_name, total in rollups_db.get_daily_totals(user.id, start_date, end_date):
+            if type == "Income":
+                cash_flow.add_inflow(total, category_name, date)
+            else:
+                cash_flow.add_outflow(total, category_name, date)
+        return cash_flow.generate_cash_flow_report()
 
-        start_date = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
-        end_date = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
-        for account in accounts:
-            transactions = transaction_db.get_transactions(account.id)
-            for transaction in transactions:
-                transaction_date = datetime.strptime(transaction['date'], '%Y-%m-%d')
-                if start_date and transaction_date < start_date:
-                    continue
-                if end_date and transaction_date > end_date:
-                    continue
-                if transaction['amount'] > 0:
-                    cash_flow.add_inflow(transaction['amount'], transaction['description'], transaction['date'])
-                else:
-                    cash_flow.add_outflow(transaction['amount'], transaction['description'], transaction['date'])
+    def _generate_cash_flow_statement_pandas(self, user, start_date=None, end_date=None):
+        from finance.analytics import TransactionAnalytics
+        analytics = TransactionAnalytics.load(self.db, user.id, start_date, end_date)
+
+        cash_flow = CashFlow(self._user_currency(user))
+        for date, type, category_name, total in analytics.cash_flow().itertuples(index=False):
+            if type == "Income":
+                cash_flow.add_inflow(total, category_name, date)
+            else:
+                cash_flow.add_outflow(total, category_name, date)
         return cash_flow.generate_cash_flow_report()
 
     def generate_report(self, user_id, start_date=None, end_date=None):
+        if self.cache is None:
+            return self._build_report(user_id, start_date, end_date)
+
+        from app.models.database import AccountOperations, UserOperations
+        # The data version moves with every write to the user's data, in any
+        # process; invalidation only reaches this process's cache
+        data_version = UserOperations(self.db).get_data_version(int(user_id))
+        key = (int(user_id), start_date, end_date, self.engine, REPORT_VERSION, data_version)
+        report = self.cache.get(key)
+        if report is None:
+            generation = self.cache.generation()
+            report = self._build_report(user_id, start_date, end_date)
+            if isinstance(report, dict):
+                account_ids = [account.id for account in AccountOperations(self.db).get_user_accounts(user_id)]
+                self.cache.set(key, report, generation, account_ids)
+        return report
+
+    def _build_report(self, user_id, start_date=None, end_date=None):
         from app.models.database import UserOperations
         users_db = UserOperations(self.db)
         
@@ -74,3 +114,8 @@ class ReportGenerator:
             "cash_flow_statement": self.generate_cash_flow_statement(user, start_date, end_date)
         }
         return report
+
+    # Helper methods
+    def _user_currency(self, user):
+        from app.models.database import AccountOperations
+        return AccountOperations(self.db).get_user_currency(user.id)
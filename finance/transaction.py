@@ -1,5 +1,14 @@
+from finance.money import DEFAULT_CURRENCY, from_minor
+
+# Column order of every transactions SELECT and of from_row()
+FIELDS = ("id", "account_id", "date", "amount", "type", "description", "category_name")
+
+
 class Transaction:
+    __slots__ = FIELDS
+
     def __init__(self, account_id, date, amount, type, description, category_name):
+        self.id = None
         self.account_id = account_id
         self.date = date
         self.amount = amount
@@ -8,11 +17,20 @@ class Transaction:
         self.category_name = category_name
         self.validate()
 
-    def to_dict(self):
+    @classmethod
+    def from_row(cls, row):
+        # Rows read back from the database were validated on the way in
+        transaction = cls.__new__(cls)
+        (transaction.id, transaction.account_id, transaction.date, transaction.amount,
+         transaction.type, transaction.description, transaction.category_name) = row
+        return transaction
+
+    def to_dict(self, currency=DEFAULT_CURRENCY):
         return {
+            "id": self.id,
             "account_id": self.account_id,
             "date": self.date,
-            "amount": self.amount,
+            "amount": float(from_minor(self.amount, currency)),
             "type": self.type,
             "description": self.description,
             "category_name": self.category_name
@@ -21,6 +39,8 @@ class Transaction:
     def validate(self):
         if not self.description:
             raise ValueError("Description cannot be empty")
+        if not isinstance(self.amount, int):
+            raise ValueError("Amount must be an integer number of minor units")
         if self.type not in ["Income", "Expense"]:
             raise ValueError("Transaction type must be either 'Income' or 'Expense'")
 
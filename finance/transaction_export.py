@@ -0,0 +1,103 @@
+import io
+import pandas as pd
+from finance.money import DEFAULT_CURRENCY, exponent
+
+FORMATS = ("csv", "parquet")
+CONTENT_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+# Amounts are exported in major units next to their currency, as the JSON API does
+COLUMNS = ["id", "account_id", "date", "amount", "currency", "type", "description", "category_name"]
+_ROW_COLUMNS = ["id", "account_id", "date", "amount", "type", "description", "category_name"]
+
+
+def export_transactions(chunks, currencies, format):
+    # chunks are lists of plain transaction tuples (see
+    # TransactionOperations.iter_transaction_chunks); currencies maps
+    # account_id to currency. Returns an iterator of bytes that holds one
+    # chunk in memory at a time.
+    if format == "csv":
+        return _export_csv(_frames(chunks, currencies))
+    if format == "parquet":
+        return _export_parquet(_frames(chunks, currencies))
+    raise ValueError(f"Unsupported export format: {format}")
+
+
+def _frames(chunks, currencies):
+    currencies = {account_id: currency or DEFAULT_CURRENCY for account_id, currency in currencies.items()}
+    scales = {account_id: 10 ** exponent(currency) for account_id, currency in currencies.items()}
+    for rows in chunks:
+        frame = pd.DataFrame.from_records(rows, columns=_ROW_COLUMNS)
+        frame["currency"] = frame["account_id"].map(currencies).fillna(DEFAULT_CURRENCY)
+        # int / 10**n is correctly rounded, so the shortest float repr is the exact amount
+        frame["amount"] = frame["amount"] / frame["account_id"].map(scales).fillna(100)
+        yield frame[COLUMNS]
+
+
+def _export_csv(frames):
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header, lineterminator="\n").encode()
+        header = False
+    if header:
+        yield (",".join(COLUMNS) + "\n").encode()
+
+
+def _export_parquet(frames):
+    # Imported here so CSV exports work without pyarrow installed; done
+    # before the first chunk so a missing install fails the request, not
+    # the middle of the stream
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("account_id", pa.int64()),
+        ("date", pa.date32()),
+        ("amount", pa.float64()),
+        ("currency", pa.string()),
+        ("type", pa.string()),
+        ("description", pa.string()),
+        ("category_name", pa.string()),
+    ])
+
+    def generate():
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            # One row group per chunk
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                table = table.set_column(2, "date", pc.cast(table["date"], pa.date32()))
+                writer.write_table(table.cast(schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    return generate()
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file for ParquetWriter that hands back what was written
+    # since the last drain. tell() keeps counting from the start so the
+    # offsets in the footer stay right.
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
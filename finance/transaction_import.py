@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+FORMATS = ("csv", "jsonl", "ofx")
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+class InvalidRecord:
+    # Yielded by a parser in place of a record it could not read, so the
+    # importer skips and reports that row instead of aborting the file
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def normalize_record(record):
+    # The amount stays an exact Decimal in major units; the caller converts
+    # it to minor units once it knows the account's currency.
+    if isinstance(record, InvalidRecord):
+        raise ValueError(record.error)
+    amount = _parse_amount(record["amount"])
+    type = (record.get("type") or "").strip().capitalize()
+    if not type:
+        type = "Income" if amount >= 0 else "Expense"
+    elif type == "Income" and amount < 0:
+        # Bank exports sign expenses, but a negative income is contradictory
+        raise ValueError(f"Negative amount for Income: {record['amount']}")
+    return {
+        "account_id": int(record["account_id"]) if record.get("account_id") not in (None, "") else None,
+        "date": _normalize_date(record["date"]),
+        "amount": abs(amount),
+        "type": type,
+        "description": (record.get("description") or "").strip(),
+        "category_name": (record.get("category_name") or "").strip() or None,
+    }
+
+
+def parse_csv(stream):
+    # Header row must name the columns: date, amount, description and
+    # optionally type, category_name, account_id.
+    yield from csv.DictReader(stream)
+
+
+def parse_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield InvalidRecord(f"Invalid JSON: {e}")
+
+
+def parse_ofx(stream):
+    for block in _OFX_TRANSACTION.findall(stream.read()):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(block)}
+        missing = [name for name in ("DTPOSTED", "TRNAMT") if not fields.get(name)]
+        if missing:
+            yield InvalidRecord(f"Missing OFX field: {', '.join(missing)}")
+            continue
+        yield {
+            "date": fields["DTPOSTED"][:8],
+            "amount": fields["TRNAMT"],
+            "description": fields.get("NAME") or fields.get("MEMO"),
+            "category_name": None,
+        }
+
+
+def parse_records(stream, format):
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.StringIO(stream.decode("utf-8-sig"))
+    elif isinstance(stream, str):
+        stream = io.StringIO(stream)
+    parsers = {"csv": parse_csv, "jsonl": parse_jsonl, "ofx": parse_ofx}
+    if format not in parsers:
+        raise ValueError(f"Unsupported import format: {format}")
+    return parsers[format](stream)
+
+
+def _parse_amount(value):
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
+        raise ValueError(f"Unrecognized amount: {value}")
+    return amount
+
+
+def _normalize_date(value):
+    value = str(value).strip()
+    for pattern in ("%Y-%m-%d", "%Y%m%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, pattern).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
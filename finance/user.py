@@ -1,4 +1,6 @@
 class User:
+    __slots__ = ("id", "name", "email", "password", "is_admin")
+
     def __init__(self, id, name, email, password, is_admin):
         self.id = id
         self.name = name
@@ -7,6 +9,13 @@ class User:
         self.is_admin = is_admin
         self.validate()
 
+    @classmethod
+    def from_row(cls, row):
+        # Rows read back from the database were validated on the way in
+        user = cls.__new__(cls)
+        user.id, user.name, user.email, user.password, user.is_admin = row
+        return user
+
     def to_dict(self):
         return {
             "id": self.id,
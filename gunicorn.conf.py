@@ -0,0 +1,44 @@
+# Production WSGI server settings; gunicorn reads this file from the working
+# directory, so `gunicorn` alone serves run:app. Every setting can be
+# overridden from the environment.
+#
+# Reloading: `kill -HUP <master pid>` starts fresh workers with the new
+# settings and retires the old ones once their requests finish (within
+# graceful_timeout). With preload_app the code is loaded once in the master,
+# so a code deploy needs USR2 (start a new master), then TERM the old one,
+# or a plain restart.
+import multiprocessing
+import os
+
+wsgi_app = os.getenv("GUNICORN_APP", "run:app")
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# SQLite work is short and mostly I/O bound, so each worker also runs a few
+# threads; size DB_POOL_SIZE to at least the thread count.
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# create_app runs once in the master and workers fork from it. Connection
+# pools and the logging listener are per process (see db_connection.get_pool
+# and logging_config), so nothing opened before fork is shared.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def worker_exit(server, worker):
+    from app.jobs import job_queue
+    from app.models.database.db_connection import close_pools
+    # Lets running report jobs finish so they are not left "running"
+    job_queue.shutdown()
+    close_pools()
@@ -0,0 +1,29 @@
+import argparse
+import json
+import logging
+from app.models.database import get_connection, TransactionOperations
+from finance.transaction_import import FORMATS, parse_records
+
+logging.basicConfig(level=logging.INFO)
+
+def import_file(path, account_id=None, import_format=None, batch_size=1000, db_name='finance.db'):
+    import_format = import_format or path.rsplit('.', 1)[-1].lower()
+    connection = get_connection(db_name)
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        stats = TransactionOperations(connection).import_transactions(
+            parse_records(stream, import_format),
+            account_id=account_id,
+            batch_size=batch_size
+        )
+    connection.close()
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk import transactions from CSV, JSON lines or OFX.')
+    parser.add_argument('path')
+    parser.add_argument('--account-id', type=int, help='Import every row into this account')
+    parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--db', default='finance.db')
+    args = parser.parse_args()
+    print(json.dumps(import_file(args.path, args.account_id, args.format, args.batch_size, args.db), indent=2))
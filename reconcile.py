@@ -0,0 +1,33 @@
+import argparse
+import logging
+import sys
+from app.models.database import get_connection, AccountOperations
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(level=logging.INFO)
+
+def reconcile(db_name, account_ids=None, user_id=None, repair=False):
+    connection = get_connection(db_name)
+    accounts = AccountOperations(connection)
+    if user_id is not None:
+        account_ids = (account_ids or []) + [account.id for account in accounts.get_user_accounts(user_id)]
+    if repair:
+        mismatches = accounts.repair_balances(account_ids)
+    else:
+        mismatches = accounts.check_balances(account_ids)
+        for mismatch in mismatches:
+            logger.warning('Account %(account_id)s: balance %(balance)s, transactions say %(expected)s', mismatch)
+    connection.close()
+    logger.info('%s account balances %s.', len(mismatches), 'repaired' if repair else 'out of line')
+    return repair or not mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check account balances against their transactions.')
+    parser.add_argument('--db', default='finance.db')
+    parser.add_argument('--account-id', type=int, action='append', dest='account_ids', help='only check this account (repeatable)')
+    parser.add_argument('--user-id', type=int, help="only check this user's accounts")
+    parser.add_argument('--repair', action='store_true', help='set mismatched balances to the value the transactions give')
+    args = parser.parse_args()
+    if not reconcile(args.db, args.account_ids, args.user_id, args.repair):
+        sys.exit(1)
@@ -0,0 +1,32 @@
+import argparse
+import logging
+import sys
+from app.models.database import get_connection, RollupOperations
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(level=logging.INFO)
+
+def rebuild(db_name):
+    connection = get_connection(db_name)
+    RollupOperations(connection).rebuild()
+    connection.close()
+
+def check(db_name):
+    connection = get_connection(db_name)
+    mismatches = RollupOperations(connection).check_consistency()
+    connection.close()
+    for table, row in mismatches:
+        logger.warning('%s: %s', table, row)
+    logger.info('%s mismatched rollup rows.', len(mismatches))
+    return not mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Maintain the reporting rollup tables.')
+    parser.add_argument('command', choices=['rebuild', 'check'])
+    parser.add_argument('--db', default='finance.db')
+    args = parser.parse_args()
+    if args.command == 'rebuild':
+        rebuild(args.db)
+    elif not check(args.db):
+        sys.exit(1)
@@ -1,6 +1,8 @@
+import os
 from app import create_app
 
 app = create_app()
 
+# Development server only; production runs gunicorn with gunicorn.conf.py
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=os.getenv('FLASK_DEBUG', '0') == '1')
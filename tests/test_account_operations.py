@@ -2,7 +2,7 @@ import unittest
 from unittest.mock import MagicMock, patch
 import sqlite3
 from finance.account import Account
-from app.models.database import AccountOperations
+from app.models.database import AccountOperations, migrate
 
 class TestAccountOperations(unittest.TestCase):
     def setUp(self):
@@ -13,23 +13,24 @@ class TestAccountOperations(unittest.TestCase):
     def test_add_account(self, mock_validate):
         self.account_operations.add_account(1, 'Savings', 1000)
         self.conn.execute.assert_called_with(
-            'INSERT INTO accounts (user_id, name, balance) VALUES (?, ?, ?)',
-            (1, 'Savings', 1000)
+            'INSERT INTO accounts (user_id, name, balance, currency) VALUES (?, ?, ?, ?)',
+            (1, 'Savings', 1000, 'USD')
         )
 
     def test_get_account(self):
-        mock_account_data = (1, 1, 'Savings', 1000)
+        mock_account_data = (1, 1, 'Savings', 1000, 'USD')
         self.conn.execute.return_value.fetchone.return_value = mock_account_data
         account = self.account_operations.get_account(1)
         self.assertEqual(account.id, 1)
         self.assertEqual(account.user_id, 1)
         self.assertEqual(account.name, 'Savings')
         self.assertEqual(account.balance, 1000)
+        self.assertEqual(account.currency, 'USD')
 
     def test_get_accounts(self):
         mock_accounts_data = [
-            (1, 1, 'Savings', 1000),
-            (2, 1, 'Checking', 2000)
+            (1, 1, 'Savings', 1000, 'USD'),
+            (2, 1, 'Checking', 2000, 'USD')
         ]
         self.conn.execute.return_value.fetchall.return_value = mock_accounts_data
         accounts = self.account_operations.get_accounts(1)
@@ -40,7 +41,7 @@ class TestAccountOperations(unittest.TestCase):
     @patch('finance.account.Account.validate')
     def test_update_account(self, mock_validate):
         mock_account = Account(1, 1, 'Savings', 1000)
-        self.conn.execute.return_value.fetchone.return_value = (1, 1, 'Savings', 1000)
+        self.conn.execute.return_value.fetchone.return_value = (1, 1, 'Savings', 1000, 'USD')
         self.account_operations.update_account(1, 'New Savings', 1500)
         self.conn.execute.assert_called_with(
             "UPDATE accounts SET name = ?, balance = ? WHERE id = ?",
@@ -53,5 +54,44 @@ class TestAccountOperations(unittest.TestCase):
         self.conn.execute.assert_any_call("DELETE FROM accounts WHERE id = ?", (1,))
         self.conn.execute.assert_any_call("DELETE FROM transactions WHERE id = ?", (1,))
 
+class TestReconcileBalances(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.account_operations = AccountOperations(self.conn)
+        self.account_operations.add_account(1, 'Checking', 1000)
+        self.account_operations.add_account(1, 'Savings', 50)
+        self.conn.executemany(
+            "INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (?, '2024-06-28', ?, ?, 'x', 'Food')",
+            [(1, 100, 'Expense'), (1, 40, 'Income')]
+        )
+        self.conn.execute("UPDATE accounts SET balance = balance - 60 WHERE id = 1")
+        self.conn.commit()
+
+    def test_consistent_balances(self):
+        self.assertEqual(self.account_operations.check_balances(), [])
+
+    def test_drift_detected_and_repaired(self):
+        self.conn.execute("UPDATE accounts SET balance = 2000 WHERE id = 1")
+        self.conn.commit()
+        mismatches = self.account_operations.check_balances()
+        self.assertEqual([(m['account_id'], m['expected']) for m in mismatches], [(1, 940)])
+        self.assertEqual(self.account_operations.check_balances(account_ids=[2]), [])
+
+        self.account_operations.repair_balances([1])
+        self.assertEqual(self.account_operations.get_account(1).balance, 940)
+        self.assertEqual(self.account_operations.check_balances(), [])
+
+    def test_manual_balance_edit_is_not_drift(self):
+        self.account_operations.update_account(2, 'Savings', 75)
+        self.assertEqual(self.account_operations.check_balances(), [])
+
+    def test_reconcile_uses_covering_index(self):
+        plan = " ".join(row[3] for row in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(amount) FROM transactions WHERE account_id = 1 GROUP BY type"
+        ))
+        self.assertIn("COVERING INDEX idx_transactions_account_type_amount", plan)
+
 if __name__ == '__main__':
     unittest.main()
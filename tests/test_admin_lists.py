@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.models.database import BudgetOperations, TransactionOperations, UserOperations, migrate
+from app.models.database.db_connection import close_pools
+from app.models.database.paging import CountCache, count_cache
+
+def seed(conn):
+    migrate(conn)
+    for n in range(1, 8):
+        conn.execute("INSERT INTO users (id, name, email, hashed_password, is_admin) VALUES (?, ?, ?, 'x', ?)",
+                     (n, f"user{n}", f"user{n}@example.com", n == 1))
+        conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (?, ?, 'Checking', 0, ?)",
+                     (n, n, 'JPY' if n == 2 else 'USD'))
+        conn.execute("INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (?, ?, ?, 0)",
+                     (n, 'Food' if n % 2 else 'Rent', n * 1000))
+    conn.commit()
+    transactions = TransactionOperations(conn)
+    for n in range(1, 8):
+        transactions.add_transaction(n, f"2024-01-0{n}", 500, 'Income', 'Pay', 'Salary')
+
+class TestAdminListQueries(unittest.TestCase):
+    def setUp(self):
+        count_cache.clear()
+        self.conn = sqlite3.connect(':memory:')
+        seed(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_users_paged_sorted_and_filtered(self):
+        users = UserOperations(self.conn)
+        page = users.get_all_users(page=2, per_page=3, sort='-name')
+        self.assertEqual([user.name for user in page.items], ['user4', 'user3', 'user2'])
+        self.assertEqual((page.total, page.pages, page.has_prev, page.has_next), (7, 3, True, True))
+        self.assertEqual([user.id for user in users.get_all_users(search='user1').items], [1])
+        self.assertEqual(users.get_all_users(is_admin=False).total, 6)
+        with self.assertRaises(ValueError):
+            users.get_all_users(sort='hashed_password')
+
+    def test_budgets_paged_sorted_and_filtered(self):
+        budgets = BudgetOperations(self.conn)
+        page = budgets.get_all_budgets(per_page=2, sort='-amount')
+        self.assertEqual([budget.amount for budget in page.items], [7000, 6000])
+        self.assertEqual(page.total, 7)
+        self.assertEqual(budgets.get_all_budgets(category='Re').total, 3)
+        self.assertEqual([budget.user_id for budget in budgets.get_all_budgets(user_id=5).items], [5])
+
+    def test_transactions_paged_sorted_and_filtered(self):
+        transactions = TransactionOperations(self.conn)
+        page = transactions.get_all_transactions(per_page=2)
+        self.assertEqual([transaction['date'] for transaction in page.items], ['2024-01-07', '2024-01-06'])
+        self.assertEqual(transactions.get_all_transactions(user_id=3).total, 1)
+        self.assertEqual(transactions.get_all_transactions(start_date='2024-01-05', sort='id').items[0]['account_id'], 5)
+
+    def test_page_past_the_end_is_empty(self):
+        page = UserOperations(self.conn).get_all_users(page=9, per_page=5)
+        self.assertEqual((page.items, page.total, page.has_next), ([], 7, False))
+
+class TestCountCache(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.conn = sqlite3.connect(self.db_name)
+        seed(self.conn)
+        self.queries = []
+        self.conn.set_trace_callback(self.queries.append)
+
+    def tearDown(self):
+        self.conn.close()
+        os.remove(self.db_name)
+
+    def counts(self):
+        return sum(1 for query in self.queries if 'COUNT(*)' in query)
+
+    def test_totals_are_cached_per_filter(self):
+        cache = CountCache(ttl=30)
+        self.assertEqual(cache.count(self.conn, 'users', '', []), 7)
+        self.assertEqual(cache.count(self.conn, 'users', '', []), 7)
+        self.assertEqual(cache.count(self.conn, 'users', 'WHERE is_admin = ?', [True]), 1)
+        self.assertEqual(self.counts(), 2)
+        with patch('app.models.database.paging.time.monotonic', return_value=float('inf')):
+            cache.count(self.conn, 'users', '', [])
+        self.assertEqual(self.counts(), 3)
+
+    def test_short_page_skips_the_count(self):
+        count_cache.clear()
+        users = UserOperations(self.conn)
+        self.assertEqual(users.get_all_users(per_page=5, page=2).total, 7)
+        self.assertEqual(users.get_all_users(per_page=5).total, 7)
+        self.assertEqual(self.counts(), 0)
+
+class TestAdminListRoutes(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        conn = sqlite3.connect(self.db_name)
+        seed(conn)
+        conn.close()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            token = create_access_token(identity='1', additional_claims={'is_admin': True})
+        self.client.set_cookie('access_token_cookie', token)
+
+    def tearDown(self):
+        close_pools()
+        self.env.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_users_page(self):
+        response = self.client.get('/admin/all_users?per_page=2&sort=-id&page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'user5@example.com', response.data)
+        self.assertNotIn(b'user7@example.com', response.data)
+        self.assertIn(b'Page 2 of 4', response.data)
+        self.assertIn(b'page=3', response.data)
+
+    def test_budgets_json(self):
+        response = self.client.get('/budgets/admin/all?per_page=3&sort=amount', headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 200)
+        # Budgets are in the user's account currency: user 2's is JPY
+        self.assertEqual([budget['amount'] for budget in response.json['budgets']], [10.0, 2000.0, 30.0])
+        self.assertEqual((response.json['total'], response.json['pages']), (7, 3))
+        response = self.client.get('/budgets/admin/all?sort=nope', headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_budgets_page(self):
+        response = self.client.get('/budgets/admin/all?category=Food')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Page 1 of 1 (4 total)', response.data)
+        response = self.client.get('/budgets/admin/all?user_id=2')
+        self.assertIn(b'2000 JPY', response.data)
+
+    def test_budget_added_in_user_currency(self):
+        self.app.config.update(WTF_CSRF_ENABLED=False, JWT_COOKIE_CSRF_PROTECT=False)
+        with self.app.app_context():
+            self.client.set_cookie('access_token_cookie', create_access_token(identity='2'))
+        response = self.client.post('/budgets/management', data={'budget_name': 'Travel', 'initial_amount': '1000'}, follow_redirects=True)
+        self.assertIn(b'Travel: 1000 JPY', response.data)
+        conn = sqlite3.connect(self.db_name)
+        self.assertEqual(conn.execute("SELECT amount FROM budgets WHERE category_name = 'Travel'").fetchone()[0], 1000)
+        conn.close()
+
+    def test_transactions_json(self):
+        response = self.client.get('/transactions/admin/all?per_page=10&sort=date')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['total'], 7)
+        # JPY has no minor units, so its 500 stays 500
+        self.assertEqual([transaction['amount'] for transaction in response.json['transactions'][:2]], [5.0, 500.0])
+        self.assertEqual(self.client.get('/transactions/admin/all?sort=description').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
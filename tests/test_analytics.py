@@ -0,0 +1,67 @@
+import sqlite3
+import unittest
+from app.models.database import TransactionOperations, migrate
+from finance.analytics import TransactionAnalytics
+from finance.report_generator import ReportGenerator
+
+class TestTransactionAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 0)")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (2, 1, 'Savings', 0)")
+        self.conn.commit()
+        transaction_operations = TransactionOperations(self.conn)
+        for account_id, date, amount, type, category_name in [
+            (1, '2024-01-01', 1000, 'Income', 'Salary'),
+            (1, '2024-01-02', 30, 'Expense', 'Food'),
+            (2, '2024-01-02', 20, 'Expense', 'Food'),
+            (1, '2024-02-03', 1200, 'Income', 'Salary'),
+            (1, '2024-02-04', 100, 'Expense', 'Transport'),
+            (2, '2024-02-05', 50, 'Expense', None),
+        ]:
+            transaction_operations.add_transaction(account_id, date, amount, type, 'entry', category_name)
+        self.analytics = TransactionAnalytics.load(self.conn, 1)
+
+    def test_frame_dtypes(self):
+        dtypes = self.analytics.frame.dtypes
+        self.assertEqual(str(dtypes['type']), 'category')
+        self.assertEqual(str(dtypes['category_name']), 'category')
+        self.assertTrue(str(dtypes['date']).startswith('datetime64'))
+
+    def test_cash_flow_matches_rollups(self):
+        totals = [tuple(row) for row in self.analytics.cash_flow().itertuples(index=False)]
+        from app.models.database import RollupOperations
+        self.assertEqual(totals, [tuple(row) for row in RollupOperations(self.conn).get_daily_totals(1)])
+
+    def test_category_breakdown_and_totals(self):
+        breakdown = self.analytics.category_breakdown().set_index(['type', 'category_name'])
+        self.assertEqual(breakdown.loc[('Expense', 'Food'), 'total'], -50)
+        self.assertEqual(breakdown.loc[('Expense', 'Food'), 'count'], 2)
+        self.assertAlmostEqual(breakdown.loc[('Expense', 'Transport'), 'share'], 0.5)
+        self.assertEqual(self.analytics.totals(), {'income': 2200.0, 'expense': -200.0, 'net': 2000.0})
+
+    def test_running_balances(self):
+        balances = self.analytics.running_balances({1: 10})
+        checking = balances[balances['account_id'] == 1]['balance'].tolist()
+        self.assertEqual(checking, [1010, 980, 2180, 2080])
+
+    def test_month_over_month(self):
+        monthly = self.analytics.month_over_month()
+        self.assertEqual(monthly['month'].tolist(), ['2024-01', '2024-02'])
+        self.assertEqual(monthly['net'].tolist(), [950, 1050])
+        self.assertEqual(monthly['net_change'].tolist()[1], 100)
+
+    def test_pandas_engine_report_matches_sql_engine(self):
+        sql_report = ReportGenerator(self.conn).generate_report(1, '2024-01-01', '2024-02-28')
+        pandas_report = ReportGenerator(self.conn, engine='pandas').generate_report(1, '2024-01-01', '2024-02-28')
+        self.assertEqual(sql_report, pandas_report)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            ReportGenerator(self.conn, engine='spark')
+
+if __name__ == '__main__':
+    unittest.main()
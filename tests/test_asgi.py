@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token, create_refresh_token
+from app import create_app
+from config import Config
+from app.asgi import AsyncAPI
+from app.models.database import TransactionOperations, migrate
+from app.models.database.db_connection import close_pools
+
+def send_request(app, path, query_string=b'', cookie=None, method='GET', headers=(), body_chunks=(b'',)):
+    # Every ASGI message sent back; the body arrives in body_chunks
+    headers = list(headers) + ([(b'cookie', cookie.encode())] if cookie else [])
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string, 'headers': headers}
+    incoming = [{'type': 'http.request', 'body': chunk, 'more_body': True} for chunk in body_chunks]
+    incoming[-1]['more_body'] = False
+    messages = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+def call(app, path, query_string=b'', cookie=None, method='GET', headers=()):
+    messages = send_request(app, path, query_string, cookie, method, headers)
+    return messages[0]['status'], b''.join(message.get('body', b'') for message in messages[1:])
+
+class TestAsyncAPI(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        conn = sqlite3.connect(self.db_name)
+        migrate(conn)
+        conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (2, 'Jane', 'jane@example.com', 'x')")
+        conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (1, 1, 'Checking', 100000, 'USD')")
+        conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (2, 2, 'Yen', 0, 'JPY')")
+        conn.commit()
+        operations = TransactionOperations(conn)
+        operations.add_transaction(1, '2024-01-02', 1250, 'Expense', 'Lunch', 'Food')
+        operations.add_transaction(2, '2024-01-03', 500, 'Income', 'Gift', 'Gifts')
+        conn.close()
+
+        self.flask_app = create_app()
+        self.app = AsyncAPI(self.flask_app, threads=2)
+        with self.flask_app.app_context():
+            self.cookie = f"access_token_cookie={create_access_token(identity='1')}"
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+        close_pools()
+        self.env.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_requires_token(self):
+        status, _ = call(self.app, '/transactions/list')
+        self.assertEqual(status, 401)
+
+    def test_list_transactions_matches_wsgi_route(self):
+        status, body = call(self.app, '/transactions/list', b'limit=10', self.cookie)
+        self.assertEqual(status, 200)
+        page = json.loads(body)
+        self.assertEqual([transaction['amount'] for transaction in page['transactions']], [12.5])
+
+        client = self.flask_app.test_client()
+        client.set_cookie('access_token_cookie', self.cookie.split('=', 1)[1])
+        self.assertEqual(client.get('/transactions/list?limit=10').json, page)
+
+    def test_list_rejects_bad_arguments(self):
+        self.assertEqual(call(self.app, '/transactions/list', b'start_date=01/02/2024', self.cookie)[0], 400)
+        self.assertEqual(call(self.app, '/transactions/list', b'limit=x', self.cookie)[0], 400)
+
+    def test_get_transaction_checks_ownership(self):
+        status, body = call(self.app, '/transactions/get/1', cookie=self.cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['description'], 'Lunch')
+        self.assertEqual(call(self.app, '/transactions/get/2', cookie=self.cookie)[0], 403)
+        self.assertEqual(call(self.app, '/transactions/get/99', cookie=self.cookie)[0], 404)
+
+        client = self.flask_app.test_client()
+        client.set_cookie('access_token_cookie', self.cookie.split('=', 1)[1])
+        self.assertEqual(client.get('/transactions/get/1').json, json.loads(body))
+        self.assertEqual(client.get('/transactions/get/2').status_code, 403)
+        self.assertEqual(client.get('/transactions/get/99').status_code, 404)
+
+    def test_admin_budgets_require_admin(self):
+        json_request = [(b'content-type', b'application/json')]
+        self.assertEqual(call(self.app, '/budgets/admin/all', cookie=self.cookie, headers=json_request)[0], 403)
+        # Browsers go to the Flask page, which redirects non-admins
+        self.assertEqual(call(self.app, '/budgets/admin/all', cookie=self.cookie)[0], 302)
+
+        with self.flask_app.app_context():
+            admin = f"access_token_cookie={create_access_token(identity='2', additional_claims={'is_admin': True})}"
+        status, body = call(self.app, '/budgets/admin/all', cookie=admin, headers=json_request)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['budgets'], [])
+        status, body = call(self.app, '/budgets/admin/all', cookie=admin)
+        self.assertEqual(status, 200)
+        self.assertIn(b'<html', body.lower())
+
+    def test_rejects_refresh_tokens(self):
+        with self.flask_app.app_context():
+            refresh = f"access_token_cookie={create_refresh_token(identity='1')}"
+        self.assertEqual(call(self.app, '/transactions/get/1', cookie=refresh)[0], 401)
+
+    def test_flask_hooks_and_limits_apply(self):
+        messages = send_request(self.app, '/transactions/get/1', cookie=self.cookie)
+        cookies = [value for name, value in messages[0]['headers'] if name == b'set-cookie']
+        self.assertTrue(any(cookie.startswith(b'csrf_token=') for cookie in cookies))
+        for _ in range(49):
+            self.assertEqual(call(self.app, '/transactions/get/1', cookie=self.cookie)[0], 200)
+        self.assertEqual(call(self.app, '/transactions/get/1', cookie=self.cookie)[0], 429)
+
+    def test_requests_are_instrumented(self):
+        with patch.object(Config, 'INSTRUMENTATION_ENABLED', True):
+            app = AsyncAPI(create_app(), threads=1)
+        try:
+            messages = send_request(app, '/transactions/get/1', cookie=self.cookie)
+        finally:
+            app.executor.shutdown()
+        self.assertIn(b'server-timing', dict(messages[0]['headers']))
+        metrics = app.flask_app.extensions['instrumentation'].render()
+        self.assertIn('finance_request_duration_seconds_count{endpoint="transactions.get_transaction",method="GET",status="200"} 1', metrics)
+        self.assertIn('finance_request_sql_queries_total{endpoint="transactions.get_transaction",method="GET",status="200"} 2', metrics)
+
+    def test_generate_report(self):
+        status, body = call(self.app, '/generate_report', b'start_date=2024-01-01&end_date=2024-01-31', self.cookie)
+        self.assertEqual(status, 200)
+        self.assertIn(b'Total Balance: 987.50', body)
+        self.assertEqual(call(self.app, '/generate_report', b'user_id=2', self.cookie)[0], 403)
+
+    def test_queued_reports_go_to_flask(self):
+        with patch('app.routes.reports.job_queue.enqueue', return_value=7) as enqueue:
+            status, body = call(self.app, '/generate_report', b'format=pdf', self.cookie)
+        self.assertEqual(status, 202)
+        self.assertEqual(json.loads(body)['job_id'], 7)
+        self.assertEqual(enqueue.call_args[0][2], 'pdf')
+
+    def test_other_paths_go_to_flask(self):
+        status, body = call(self.app, '/accounts', cookie=self.cookie)
+        self.assertEqual(status, 200)
+        self.assertIn(b'Checking', body)
+
+    def test_ndjson_lists_go_to_flask(self):
+        status, body = call(self.app, '/transactions/list', b'format=ndjson', self.cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body.splitlines()[0])['description'], 'Lunch')
+        status, body = call(self.app, '/transactions/list', cookie=self.cookie, headers=[(b'accept', b'application/x-ndjson')])
+        self.assertEqual(json.loads(body.splitlines()[0])['description'], 'Lunch')
+
+    def test_flask_responses_are_streamed(self):
+        with patch('app.routes.transactions.EXPORT_CHUNK_SIZE', 1):
+            conn = sqlite3.connect(self.db_name)
+            TransactionOperations(conn).add_transaction(1, '2024-01-04', 300, 'Expense', 'Tea', 'Food')
+            conn.close()
+            messages = send_request(self.app, '/transactions/export', cookie=self.cookie)
+        self.assertEqual(messages[0]['status'], 200)
+        bodies = [message for message in messages[1:] if message['body']]
+        self.assertGreater(len(bodies), 1)
+        self.assertTrue(all(message['more_body'] for message in bodies))
+        self.assertFalse(messages[-1].get('more_body', False))
+
+    def test_request_body_is_read_in_chunks(self):
+        self.flask_app.config.update(WTF_CSRF_ENABLED=False, JWT_COOKIE_CSRF_PROTECT=False)
+        body = (
+            b'--b\r\nContent-Disposition: form-data; name="account_id"\r\n\r\n1\r\n'
+            b'--b\r\nContent-Disposition: form-data; name="file"; filename="t.csv"\r\n\r\n'
+            b'date,amount,type,description\n2024-01-05,10,Expense,Bus\n2024-01-06,20,Income,Refund\n\r\n--b--\r\n'
+        )
+        # No Content-Length, as with a chunked upload
+        headers = [(b'content-type', b'multipart/form-data; boundary=b')]
+        messages = send_request(self.app, '/transactions/import', cookie=self.cookie, method='POST',
+                                headers=headers, body_chunks=[body[:40], body[40:90], body[90:]])
+        self.assertEqual(messages[0]['status'], 201)
+        self.assertEqual(json.loads(b''.join(message['body'] for message in messages[1:]))['imported'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from app.models.database import TransactionOperations, migrate
+from app.models.database.db_connection import get_connection
+
+WORKERS = 4
+EXPENSES_PER_WORKER = 25
+AMOUNT = 125  # cents
+
+def post_expenses(db_name, start):
+    start.wait()
+    conn = get_connection(db_name, profile='production')
+    ops = TransactionOperations(conn)
+    for _ in range(EXPENSES_PER_WORKER):
+        ops.add_transaction(1, '2024-06-28', AMOUNT, 'Expense', 'Lunch', 'Food')
+    conn.close()
+
+class TestBudgetConcurrency(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        conn = get_connection(self.db_name, profile='production')
+        migrate(conn)
+        with conn:
+            conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+            conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 100000)")
+            conn.execute("INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (1, 'Food', 1000000, 0)")
+        conn.close()
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_concurrent_expenses_update_budget_exactly(self):
+        context = multiprocessing.get_context('spawn')
+        start = context.Event()
+        workers = [context.Process(target=post_expenses, args=(self.db_name, start)) for _ in range(WORKERS)]
+        for worker in workers:
+            worker.start()
+        start.set()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        conn = get_connection(self.db_name)
+        expected = WORKERS * EXPENSES_PER_WORKER * AMOUNT
+        amount_used = conn.execute("SELECT amount_used FROM budgets WHERE user_id = 1 AND category_name = 'Food'").fetchone()[0]
+        balance = conn.execute("SELECT balance FROM accounts WHERE id = 1").fetchone()[0]
+        count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        conn.close()
+        self.assertEqual(count, WORKERS * EXPENSES_PER_WORKER)
+        self.assertEqual(amount_used, expected)
+        self.assertEqual(balance, 100000 - expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from app import create_app
+from config import Config
+from app.models.database import db_connection
+from app.models.database.db_connection import ConnectionPool, PoolTimeoutError
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.pool = ConnectionPool(self.db_name, size=2, timeout=0.1)
+
+    def tearDown(self):
+        self.pool.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_checkout_reuses_returned_connection(self):
+        conn = self.pool.checkout()
+        self.pool.checkin(conn)
+        self.assertIs(self.pool.checkout(), conn)
+        stats = self.pool.stats()
+        self.assertEqual(stats['open'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+
+    def test_pragmas_applied_once_per_connection(self):
+        conn = self.pool.checkout()
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+        self.assertIs(conn.row_factory, sqlite3.Row)
+
+    def test_storage_profile_applied(self):
+        pool = ConnectionPool(self.db_name, size=1, pragmas=db_connection.get_storage_profile('production'))
+        conn = pool.checkout()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)
+        pool.checkin(conn)
+        pool.close()
+
+    def test_unknown_storage_profile(self):
+        with self.assertRaises(ValueError):
+            db_connection.get_storage_profile('turbo')
+
+    def test_config_profile_from_flask_env(self):
+        def profile(**env):
+            environ = {k: v for k, v in os.environ.items() if k not in ('DB_STORAGE_PROFILE', 'FLASK_ENV')}
+            with patch.dict(os.environ, dict(environ, **env), clear=True):
+                spec = importlib.util.spec_from_file_location('fresh_config', sys.modules[Config.__module__].__file__)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            return module.Config.DB_STORAGE_PROFILE
+        self.assertEqual(profile(), 'production')
+        self.assertEqual(profile(FLASK_ENV='development'), 'development')
+        self.assertEqual(profile(FLASK_ENV='staging'), 'production')
+        self.assertEqual(profile(FLASK_ENV='development', DB_STORAGE_PROFILE='legacy'), 'legacy')
+
+    def test_checkout_times_out_when_exhausted(self):
+        self.pool.checkout()
+        self.pool.checkout()
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.checkout()
+        stats = self.pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['in_use'], 2)
+
+    def test_waiter_receives_checked_in_connection(self):
+        self.pool.timeout = 5
+        first = self.pool.checkout()
+        self.pool.checkout()
+        received = []
+        waiter = threading.Thread(target=lambda: received.append(self.pool.checkout()))
+        waiter.start()
+        self.pool.checkin(first)
+        waiter.join()
+        self.assertIs(received[0], first)
+
+    def test_checkin_rolls_back_open_transaction(self):
+        conn = self.pool.checkout()
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        self.pool.checkin(conn)
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+
+class TestAppContextConnection(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.app = Flask(__name__)
+        self.app.config['DB_NAME'] = self.db_name
+        db_connection.init_app(self.app)
+
+    def tearDown(self):
+        db_connection.close_pools()
+        os.remove(self.db_name)
+
+    def test_connection_shared_within_context_and_returned(self):
+        pool = db_connection.get_pool(self.db_name)
+        with self.app.app_context():
+            first = db_connection.get_connection(self.db_name)
+            self.assertIs(db_connection.get_connection(self.db_name), first)
+            self.assertEqual(pool.stats()['in_use'], 1)
+        self.assertEqual(pool.stats()['in_use'], 0)
+        with self.app.app_context():
+            self.assertIs(db_connection.get_connection(self.db_name), first)
+
+    def test_pools_inherited_from_parent_process_are_not_closed(self):
+        inherited = ConnectionPool(self.db_name, size=1)
+        conn = inherited.checkout()
+        inherited.checkin(conn)
+        db_connection._pools[(os.getpid() + 1, self.db_name)] = inherited
+        own = db_connection.get_pool(self.db_name)
+        self.assertIsNot(own, inherited)
+        db_connection.close_pools()
+        self.assertEqual(conn.execute('SELECT 1').fetchone()[0], 1)
+        self.assertEqual(db_connection._pools, {})
+        inherited.close()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs fork")
+    def test_worker_forked_after_create_app_keeps_pool_settings(self):
+        env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        with env, patch.object(Config, 'DB_POOL_SIZE', 3), patch.object(Config, 'DB_STORAGE_PROFILE', 'development'):
+            create_app()
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                # Child: like a gunicorn worker, it opens its own pool on first use
+                try:
+                    os.close(read_end)
+                    pool = db_connection.get_pool()
+                    conn = pool.checkout()
+                    result = {
+                        'own_pool': (os.getpid(), self.db_name) in db_connection._pools,
+                        'size': pool.size,
+                        'cache_size': conn.execute('PRAGMA cache_size').fetchone()[0],
+                        'mmap_size': conn.execute('PRAGMA mmap_size').fetchone()[0],
+                    }
+                    os.write(write_end, json.dumps(result).encode())
+                finally:
+                    os._exit(0)
+            os.close(write_end)
+            with os.fdopen(read_end) as f:
+                result = json.loads(f.read())
+            os.waitpid(pid, 0)
+        self.assertEqual(result, {'own_pool': True, 'size': 3, 'cache_size': -16000, 'mmap_size': 0})
+
+if __name__ == '__main__':
+    unittest.main()
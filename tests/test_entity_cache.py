@@ -0,0 +1,110 @@
+import sqlite3
+import unittest
+from unittest.mock import Mock, patch
+from flask import Flask
+from app.models.database import AccountOperations, TransactionOperations, UserOperations, migrate
+from app.models.database.entity_cache import EntityCache, entity_cache
+
+class TestEntityCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = EntityCache(max_entries=2, ttl=60)
+        self.app = Flask(__name__)
+
+    def test_request_scope_loads_once(self):
+        loader = Mock(return_value='row')
+        with self.app.app_context():
+            self.assertEqual(self.cache.get('transaction', 1, loader), 'row')
+            self.assertEqual(self.cache.get('transaction', '1', loader), 'row')
+        with self.app.app_context():
+            self.cache.get('transaction', 1, loader)
+        # Transaction rows are never shared between requests
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(self.cache.stats()['request_hits'], 1)
+
+    def test_shared_kinds_outlive_the_request(self):
+        loader = Mock(return_value=(1, 'USD'))
+        with self.app.app_context():
+            self.cache.get('account_owner', 5, loader)
+        self.assertEqual(self.cache.get('account_owner', 5, loader), (1, 'USD'))
+        self.assertEqual(loader.call_count, 1)
+        self.cache.invalidate('account_owner', 5)
+        self.cache.get('account_owner', 5, loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_missing_rows_are_not_shared(self):
+        loader = Mock(return_value=None)
+        self.cache.get('user', 1, loader)
+        self.cache.get('user', 1, loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_ttl_and_eviction(self):
+        loader = Mock(side_effect=lambda: 'row')
+        with patch('app.models.database.entity_cache.time.monotonic', return_value=0):
+            self.cache.get('user', 1, loader)
+        with patch('app.models.database.entity_cache.time.monotonic', return_value=61):
+            self.cache.get('user', 1, loader)
+        self.assertEqual(loader.call_count, 2)
+        self.cache.get('user', 2, loader)
+        self.cache.get('user', 3, loader)
+        self.assertEqual(self.cache.stats()['entries'], 2)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_load_racing_a_write_is_not_stored(self):
+        def load():
+            self.cache.invalidate('user', 1)
+            return 'stale'
+        self.assertEqual(self.cache.get('user', 1, load), 'stale')
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+class TestOperationsUseEntityCache(unittest.TestCase):
+    def setUp(self):
+        entity_cache.clear()
+        self.conn = sqlite3.connect(':memory:')
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (1, 1, 'Checking', 100000, 'EUR')")
+        self.conn.commit()
+        self.transaction_id = TransactionOperations(self.conn).add_transaction(1, '2024-01-02', 1250, 'Expense', 'Lunch', 'Food')
+        self.queries = []
+        self.conn.set_trace_callback(self.queries.append)
+        self.app = Flask(__name__)
+
+    def tearDown(self):
+        entity_cache.clear()
+        self.conn.close()
+
+    def count(self, table):
+        return sum(1 for query in self.queries if query.strip().startswith('SELECT') and f'FROM {table}' in query)
+
+    def test_each_row_read_once_per_request(self):
+        transactions = TransactionOperations(self.conn)
+        accounts = AccountOperations(self.conn)
+        with self.app.app_context():
+            for _ in range(3):
+                transactions.get_transaction(self.transaction_id)
+                self.assertEqual(accounts.get_account_owner(1), (1, 'EUR'))
+        self.assertEqual(self.count('transactions'), 1)
+        self.assertEqual(self.count('accounts'), 1)
+
+    def test_user_updates_invalidate(self):
+        users = UserOperations(self.conn)
+        self.assertEqual(users.get_user(1).name, 'John')
+        self.assertEqual(users.get_user(1).name, 'John')
+        self.assertEqual(self.count('users'), 1)
+        users.update_user(1, name='Johnny')
+        self.assertEqual(users.get_user(1).name, 'Johnny')
+        users.delete_user(1)
+        self.assertIsNone(users.get_user(1))
+        self.assertIsNone(AccountOperations(self.conn).get_account_owner(1))
+
+    def test_transaction_writes_refresh_the_request_copy(self):
+        transactions = TransactionOperations(self.conn)
+        with self.app.app_context():
+            transactions.get_transaction(self.transaction_id)
+            transactions.update_transaction(self.transaction_id, '2024-01-03', 2000, 'Expense', 'Dinner', 'Food')
+            self.assertEqual(transactions.get_transaction(self.transaction_id)['amount'], 2000)
+            transactions.delete_transaction(self.transaction_id)
+            self.assertIsNone(transactions.get_transaction(self.transaction_id))
+
+if __name__ == '__main__':
+    unittest.main()
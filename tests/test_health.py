@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from app.models.database import db_connection, migrate
+from app.models.database.migrations import MIGRATIONS
+from app.routes import health
+
+class TestHealthRoutes(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name})
+        self.env.start()
+        self.app = Flask(__name__)
+        db_connection.init_app(self.app)
+        self.app.register_blueprint(health.bp)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db_connection.close_pools()
+        self.env.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_healthz(self):
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'status': 'ok', 'pid': os.getpid()})
+
+    def test_readyz_when_migrated(self):
+        conn = sqlite3.connect(self.db_name)
+        migrate(conn)
+        conn.close()
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'ok')
+        self.assertEqual(response.json['schema_version'], MIGRATIONS[-1][0])
+        self.assertIn('in_use', response.json['pool'])
+
+    def test_readyz_schema_outdated(self):
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE TABLE schema_migrations (version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at TEXT NOT NULL)")
+        conn.execute("INSERT INTO schema_migrations (version, description, applied_at) VALUES (1, 'initial', '2024-01-01')")
+        conn.commit()
+        conn.close()
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json['status'], 'schema_outdated')
+
+    def test_readyz_unavailable_without_schema(self):
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json['status'], 'unavailable')
+
+if __name__ == '__main__':
+    unittest.main()
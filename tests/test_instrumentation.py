@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import Flask, jsonify, render_template_string
+from flask_jwt_extended import create_access_token
+from app import create_app, instrumentation
+from config import Config
+from app.models.database import db_connection
+from app.instrumentation import InstrumentedConnection, MetricsRegistry, normalize_sql
+
+class TestNormalizeSql(unittest.TestCase):
+    def test_literals_and_whitespace_collapsed(self):
+        sql = "SELECT *\n  FROM transactions WHERE account_id = 42 AND category_name = 'Food'"
+        self.assertEqual(normalize_sql(sql), "SELECT * FROM transactions WHERE account_id = ? AND category_name = ?")
+
+    def test_placeholder_lists_collapsed(self):
+        self.assertEqual(
+            normalize_sql("SELECT id FROM accounts WHERE id IN (?, ?, ?)"),
+            normalize_sql("SELECT id FROM accounts WHERE id IN (?,?)")
+        )
+
+class TestInstrumentedApp(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.app = Flask(__name__)
+        self.app.config.update(DB_NAME=self.db_name, INSTRUMENTATION_ENABLED=True, METRICS_TOKEN='scrape-token')
+        db_connection.init_app(self.app)
+        self.registry = instrumentation.init_app(self.app)
+
+        @self.app.route('/count')
+        def count():
+            conn = db_connection.get_connection(self.db_name)
+            conn.execute("CREATE TABLE IF NOT EXISTS t (x INTEGER)")
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM t WHERE x > 5")
+            return jsonify(count=cursor.fetchone()[0])
+
+        @self.app.route('/page')
+        def page():
+            return render_template_string("<p>{{ n }}</p>", n=1)
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db_connection.close_pools()
+        os.remove(self.db_name)
+
+    def test_disabled_by_default(self):
+        app = Flask(__name__)
+        self.assertIsNone(instrumentation.init_app(app))
+        self.assertNotIn('metrics', app.view_functions)
+
+    def test_server_timing_counts_queries(self):
+        response = self.client.get('/count')
+        self.assertEqual(response.json, {"count": 0})
+        timing = response.headers['Server-Timing']
+        self.assertIn('app;dur=', timing)
+        self.assertIn('desc="2 queries"', timing)
+
+    def test_connection_wrapped_and_pool_gets_raw_connection(self):
+        pool = db_connection.get_pool(self.db_name)
+        with self.app.app_context():
+            conn = db_connection.get_connection(self.db_name)
+            self.assertIsInstance(conn, InstrumentedConnection)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+    def test_template_time_recorded(self):
+        response = self.client.get('/page')
+        self.assertIn('tpl;dur=', response.headers['Server-Timing'])
+        self.assertIn('finance_template_render_seconds_count{template="<string>"} 1', self.registry.render())
+
+    def test_fetches_timed_without_counting_queries(self):
+        with self.app.test_request_context():
+            conn = db_connection.get_connection(self.db_name)
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(600)])
+            rows = list(conn.execute("SELECT x FROM t"))
+            self.assertEqual(len(rows), 600)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 600)
+        count, seconds = self.registry._queries[("unmatched", "SELECT x FROM t")]
+        self.assertEqual(count, 1)
+        self.assertGreater(seconds, 0)
+
+    def test_metrics_require_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+
+    def test_metrics_endpoint_prometheus_text(self):
+        self.client.get('/count')
+        body = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}).get_data(as_text=True)
+        self.assertIn('finance_request_duration_seconds_count{endpoint="count",method="GET",status="200"} 1', body)
+        self.assertIn('finance_request_sql_queries_total{endpoint="count",method="GET",status="200"} 2', body)
+        self.assertIn('query="SELECT COUNT(*) FROM t WHERE x > ?"', body)
+
+class TestMetricsAccess(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        with patch.object(Config, 'INSTRUMENTATION_ENABLED', True), patch.object(Config, 'METRICS_RATE_LIMIT', '3 per minute'):
+            self.app = create_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db_connection.close_pools()
+        self.env.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_admin_login_and_rate_limit(self):
+        with self.app.app_context():
+            user_token = create_access_token(identity='2')
+            admin_token = create_access_token(identity='1', additional_claims={'is_admin': True})
+        self.client.set_cookie('access_token_cookie', user_token)
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.client.set_cookie('access_token_cookie', admin_token)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.assertEqual(self.client.get('/metrics').status_code, 429)
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_buckets_cumulative(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.record_request("e", "GET", 200, 0.5, 0.1, 3, 0.0)
+        body = registry.render()
+        self.assertIn('le="0.1"} 0', body)
+        self.assertIn('le="1.0"} 1', body)
+        self.assertIn('le="+Inf"} 1', body)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import logging
+import unittest
+from flask import Flask
+from app import logging_config
+from app.logging_config import JsonFormatter, RequestQueueHandler, parse_levels
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+class TestLoggingConfig(unittest.TestCase):
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved_handlers = self.root.handlers[:]
+        # Without pytest's capture handlers, which render every record too
+        self.root.handlers[:] = []
+        self.saved_level = self.root.level
+        self.app = Flask(__name__)
+        self.app.config.update(LOG_LEVEL='INFO', LOG_LEVELS='tests.noisy=ERROR,tests.chatty=DEBUG')
+
+    def tearDown(self):
+        logging_config.stop_logging()
+        self.root.handlers[:] = self.saved_handlers
+        self.root.setLevel(self.saved_level)
+        for name in ('tests.noisy', 'tests.chatty'):
+            logging.getLogger(name).setLevel(logging.NOTSET)
+
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels(' app.routes=debug, finance=WARNING '), {'app.routes': 'DEBUG', 'finance': 'WARNING'})
+        self.assertEqual(parse_levels(''), {})
+        with self.assertRaises(ValueError):
+            parse_levels('app.routes')
+
+    def test_records_go_through_queue_with_per_logger_levels(self):
+        host = CollectingHandler()
+        self.root.addHandler(host)
+        logging_config.configure_logging(self.app)
+        listener = logging_config.configure_logging(self.app)
+        collector = CollectingHandler()
+        listener.handlers = (collector,)
+        # Host handlers are kept; a second call replaces the first's handler
+        self.assertIn(host, self.root.handlers)
+        self.assertEqual(len([h for h in self.root.handlers if isinstance(h, RequestQueueHandler)]), 1)
+
+        logging.getLogger('tests.noisy').warning('dropped')
+        logging.getLogger('tests.chatty').debug('kept %s', 1)
+        logging.getLogger('tests.other').debug('dropped')
+        logging.getLogger('tests.other').info('kept %s', 2)
+        logging_config.stop_logging()
+
+        self.assertEqual([r.getMessage() for r in collector.records], ['kept 1', 'kept 2'])
+
+    def test_message_rendered_once_on_calling_thread(self):
+        class Lazy:
+            calls = 0
+            def __str__(self):
+                Lazy.calls += 1
+                return 'lazy'
+
+        listener = logging_config.configure_logging(self.app)
+        collector = CollectingHandler()
+        listener.handlers = (collector,)
+        logging.getLogger('tests.other').debug('filtered %s', Lazy())
+        self.assertEqual(Lazy.calls, 0)
+        logging.getLogger('tests.other').info('queued %s', Lazy())
+        self.assertEqual(Lazy.calls, 1)
+        # Later changes to mutable args do not reach the logged message
+        errors = {'amount': ['required']}
+        logging.getLogger('tests.other').info('errors: %s', errors)
+        errors.clear()
+        logging_config.stop_logging()
+        self.assertEqual([r.getMessage() for r in collector.records], ['queued lazy', "errors: {'amount': ['required']}"])
+        self.assertEqual(Lazy.calls, 1)
+
+    def test_json_formatter_includes_request_fields(self):
+        handler = RequestQueueHandler(None)
+        record = logging.LogRecord('app.routes', logging.INFO, __file__, 1, 'user %s', (7,), None)
+        with self.app.test_request_context('/transactions/list', method='GET'):
+            handler.prepare(record)
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry['message'], 'user 7')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['method'], 'GET')
+        self.assertEqual(entry['path'], '/transactions/list')
+
+if __name__ == '__main__':
+    unittest.main()
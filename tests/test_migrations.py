@@ -0,0 +1,77 @@
+import sqlite3
+import unittest
+from app.models.database import migrate, get_schema_version
+from app.models.database.migrations import MIGRATIONS
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _indexes(self, table):
+        return {row[1] for row in self.conn.execute(f"PRAGMA index_list({table})")}
+
+    def test_migrate_fresh_database(self):
+        version = migrate(self.conn)
+        self.assertEqual(version, MIGRATIONS[-1][0])
+        self.assertEqual(get_schema_version(self.conn), version)
+        self.assertIn('idx_transactions_account_date', self._indexes('transactions'))
+        self.assertIn('idx_budgets_user_category', self._indexes('budgets'))
+        self.assertIn('idx_accounts_user', self._indexes('accounts'))
+
+    def test_migrate_is_idempotent(self):
+        migrate(self.conn)
+        migrate(self.conn)
+        count = self.conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0]
+        self.assertEqual(count, len(MIGRATIONS))
+
+    def test_migrate_upgrades_legacy_users_table(self):
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+        self.conn.execute("INSERT INTO users (name) VALUES ('John Doe')")
+        self.conn.commit()
+        migrate(self.conn)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(users)")}
+        self.assertTrue({'email', 'hashed_password', 'is_admin'} <= columns)
+        self.assertEqual(self.conn.execute("SELECT is_admin FROM users").fetchone()[0], 0)
+
+    def test_migrate_to_target_version(self):
+        self.assertEqual(migrate(self.conn, target=1), 1)
+        self.assertNotIn('idx_transactions_account_date', self._indexes('transactions'))
+
+    def test_old_migrations_keep_their_schema(self):
+        def total_type():
+            return {row[1]: row[2] for row in self.conn.execute("PRAGMA table_info(account_daily_rollups)")}['total']
+        migrate(self.conn, target=4)
+        self.assertEqual(total_type(), 'REAL')
+        migrate(self.conn)
+        self.assertEqual(total_type(), 'INTEGER')
+
+    def test_money_columns_converted_to_minor_units(self):
+        migrate(self.conn, target=5)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 100.1)")
+        self.conn.execute("INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (1, '2024-01-02', 0.1, 'Expense', 'x', 'Food')")
+        self.conn.execute("INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (1, '2024-01-02', 0.2, 'Expense', 'y', 'Food')")
+        self.conn.execute("INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (1, 'Food', 50, 0.3)")
+        self.conn.commit()
+        migrate(self.conn)
+        self.assertEqual(self.conn.execute("SELECT balance, opening_balance, currency FROM accounts").fetchone(), (10010, 10010, 'USD'))
+        self.assertEqual(self.conn.execute("SELECT SUM(amount) FROM transactions").fetchone()[0], 30)
+        self.assertEqual(self.conn.execute("SELECT amount, amount_used FROM budgets").fetchone(), (5000, 30))
+        self.assertEqual(self.conn.execute("SELECT total FROM account_daily_rollups").fetchone()[0], -30)
+        self.assertIn('idx_transactions_account_type_amount', self._indexes('transactions'))
+        self.conn.execute("INSERT INTO accounts (user_id, name, balance) VALUES (1, 'Savings', 500)")
+        self.assertEqual(self.conn.execute("SELECT opening_balance FROM accounts WHERE name = 'Savings'").fetchone()[0], 500)
+
+    def test_transaction_query_uses_index(self):
+        migrate(self.conn)
+        plan = self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE account_id IN (?, ?) AND date >= ? AND date <= ?",
+            (1, 2, '2024-01-01', '2024-12-31')
+        ).fetchall()
+        self.assertTrue(any('idx_transactions_account_date' in row[3] for row in plan))
+
+if __name__ == '__main__':
+    unittest.main()
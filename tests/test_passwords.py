@@ -0,0 +1,73 @@
+import threading
+import unittest
+import bcrypt
+from werkzeug.security import generate_password_hash
+from app.passwords import HasherBusyError, PasswordHasher
+
+class TestPasswordHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=4, iterations=1000, threads=2)
+
+    def test_bcrypt_round_trip(self):
+        hashed = self.hasher.hash('secret password')
+        self.assertTrue(hashed.startswith('$2b$04$'))
+        self.assertTrue(self.hasher.verify('secret password', hashed))
+        self.assertFalse(self.hasher.verify('wrong password', hashed))
+        self.assertFalse(self.hasher.needs_rehash(hashed))
+
+    def test_long_passwords_use_every_byte(self):
+        hashed = self.hasher.hash('x' * 80 + 'a')
+        self.assertFalse(self.hasher.verify('x' * 80 + 'b', hashed))
+
+    def test_unknown_user_is_never_valid(self):
+        self.assertFalse(self.hasher.verify('anything', None))
+
+    def test_needs_rehash_on_cost_or_scheme_change(self):
+        hashed = self.hasher.hash('secret')
+        self.hasher.configure(rounds=5)
+        self.assertTrue(self.hasher.needs_rehash(hashed))
+        self.assertTrue(self.hasher.verify('secret', hashed))
+        self.assertTrue(self.hasher.needs_rehash(generate_password_hash('secret')))
+
+    def test_legacy_werkzeug_hashes_verify(self):
+        legacy = generate_password_hash('secret')
+        self.assertTrue(self.hasher.verify('secret', legacy))
+        self.assertFalse(self.hasher.verify('other', legacy))
+
+    def test_plain_bcrypt_hashes_verify_and_need_rehash(self):
+        for hashed in (bcrypt.hashpw(b'secret', bcrypt.gensalt(4)), bcrypt.hashpw(b'secret', bcrypt.gensalt(4)).decode('ascii')):
+            self.assertEqual(self.hasher.check('secret', hashed), (True, True))
+            self.assertEqual(self.hasher.check('other', hashed), (False, False))
+            self.assertFalse(self.hasher.needs_rehash(hashed))
+        self.assertEqual(self.hasher.check('secret', self.hasher.hash('secret')), (True, False))
+
+    def test_pbkdf2_scheme(self):
+        self.hasher.configure(scheme='pbkdf2')
+        hashed = self.hasher.hash('secret')
+        self.assertTrue(hashed.startswith('pbkdf2:sha256:1000$'))
+        self.assertTrue(self.hasher.verify('secret', hashed))
+        self.assertFalse(self.hasher.needs_rehash(hashed))
+        with self.assertRaises(ValueError):
+            self.hasher.configure(scheme='md5')
+
+    def test_rejects_callers_past_max_pending(self):
+        self.hasher.configure(threads=1, max_pending=0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block(password):
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        self.hasher._hash = block
+        holder = threading.Thread(target=self.hasher.hash, args=('secret',))
+        holder.start()
+        started.wait(5)
+        with self.assertRaises(HasherBusyError):
+            self.hasher.hash('secret')
+        release.set()
+        holder.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+from app.models.database import BudgetOperations, TransactionOperations, UserOperations, migrate
+from finance.report_cache import ReportCache, report_cache
+from finance.report_generator import ReportGenerator
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ReportCache(max_entries=2, ttl=60, max_bytes=10_000)
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get((1, 'a')))
+        self.cache.set((1, 'a'), {'x': 'y'})
+        self.assertEqual(self.cache.get((1, 'a')), {'x': 'y'})
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_lru_eviction(self):
+        self.cache.set((1, 'a'), 'a')
+        self.cache.set((1, 'b'), 'b')
+        self.cache.get((1, 'a'))
+        self.cache.set((1, 'c'), 'c')
+        self.assertIsNone(self.cache.get((1, 'b')))
+        self.assertEqual(self.cache.get((1, 'a')), 'a')
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_memory_cap(self):
+        self.cache.max_entries = 100
+        self.cache.set((1, 'a'), 'x' * 6000)
+        self.cache.set((1, 'b'), 'x' * 6000)
+        self.assertEqual(len(self.cache), 1)
+        self.cache.set((1, 'c'), 'x' * 20000)
+        self.assertIsNone(self.cache.get((1, 'c')))
+
+    def test_ttl_expiry(self):
+        with patch('finance.report_cache.time.monotonic', return_value=1000):
+            self.cache.set((1, 'a'), 'a')
+        with patch('finance.report_cache.time.monotonic', return_value=1061):
+            self.assertIsNone(self.cache.get((1, 'a')))
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_invalidate_user_and_account(self):
+        self.cache.max_entries = 10
+        self.cache.set((1, 'a'), 'a', account_ids=[10])
+        self.cache.set((2, 'a'), 'b', account_ids=[20])
+        self.cache.invalidate_account(10)
+        self.assertIsNone(self.cache.get((1, 'a')))
+        self.assertEqual(self.cache.get((2, 'a')), 'b')
+        self.cache.invalidate_user('2')
+        self.assertIsNone(self.cache.get((2, 'a')))
+
+    def test_write_during_build_is_not_cached(self):
+        generation = self.cache.generation()
+        self.cache.invalidate_account(99)
+        self.cache.set((1, 'a'), 'stale', generation)
+        self.assertIsNone(self.cache.get((1, 'a')))
+
+class TestCachedReportGenerator(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 100)")
+        self.conn.commit()
+        report_cache.clear()
+        self.report_generator = ReportGenerator(self.conn, cache=report_cache)
+
+    def tearDown(self):
+        report_cache.clear()
+
+    def test_mutations_invalidate_cached_report(self):
+        first = self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')
+        self.assertIs(self.report_generator.generate_report(1, '2024-01-01', '2024-01-31'), first)
+
+        TransactionOperations(self.conn).add_transaction(1, '2024-01-05', 40, 'Expense', 'Lunch', 'Food')
+        second = self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')
+        self.assertIsNot(second, first)
+        self.assertIn('Total Balance: 0.60', second['balance_sheet'])
+
+        BudgetOperations(self.conn).set_budget(1, 'Food', 500)
+        third = self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')
+        self.assertIn('Category Food', third['budget_report'])
+
+    def test_writes_from_other_processes_are_seen(self):
+        TransactionOperations(self.conn).add_transaction(1, '2024-01-05', 40, 'Expense', 'Lunch', 'Food')
+        first = self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')
+        self.assertIs(self.report_generator.generate_report(1, '2024-01-01', '2024-01-31'), first)
+        # Another worker's writes never reach this process's report_cache
+        with patch.object(report_cache, 'invalidate_account'), patch.object(report_cache, 'invalidate_user'):
+            TransactionOperations(self.conn).update_transaction(1, '2024-01-05', 40, 'Expense', 'Lunch', 'Dining')
+            self.assertIn('Dining', self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')['cash_flow_statement'])
+            UserOperations(self.conn).update_user(1, name='Johnny')
+            self.assertIn('Johnny', self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')['balance_sheet'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import sqlite3
+import unittest
+from app.models.database import RollupOperations, migrate
+from finance.report_generator import ReportGenerator
+
+class TestReportGenerator(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (2, 'Jane', 'jane@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 100000)")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (2, 1, 'Savings', 50000)")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (3, 2, 'Checking', 10000)")
+        self.conn.executemany(
+            "INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (1, '2024-01-01', 100000, 'Income', 'Salary', 'Salary'),
+                (1, '2024-01-02', 3000, 'Expense', 'Lunch', 'Food'),
+                (2, '2024-01-02', 2000, 'Expense', 'Dinner', 'Food'),
+                (1, '2024-01-03', 5000, 'Expense', 'Bus', 'Transport'),
+                (1, '2023-12-31', 99900, 'Expense', 'Old', 'Food'),
+                (3, '2024-01-02', 7000, 'Expense', 'Other user', 'Food'),
+            ]
+        )
+        self.conn.commit()
+        RollupOperations(self.conn).rebuild()
+        self.report_generator = ReportGenerator(self.conn)
+
+    def test_daily_totals_grouped_per_day_type_category(self):
+        rows = RollupOperations(self.conn).get_daily_totals(1, '2024-01-01', '2024-01-31')
+        self.assertEqual(
+            [tuple(row) for row in rows],
+            [
+                ('2024-01-01', 'Income', 'Salary', 100000),
+                ('2024-01-02', 'Expense', 'Food', -5000),
+                ('2024-01-03', 'Expense', 'Transport', -5000),
+            ]
+        )
+
+    def test_generate_cash_flow_statement(self):
+        report = self.report_generator.generate_report(1, '2024-01-01', '2024-01-31')
+        statement = report['cash_flow_statement']
+        self.assertIn('2024-01-01 - Salary: 1000.00', statement)
+        self.assertIn('2024-01-02 - Food: -50.00', statement)
+        self.assertNotIn('2023-12-31', statement)
+        self.assertIn('Net Cash Flow: 900.00', statement)
+
+    def test_generate_balance_sheet(self):
+        report = self.report_generator.generate_report(1)
+        self.assertIn('Total Balance: 1500.00', report['balance_sheet'])
+
+if __name__ == '__main__':
+    unittest.main()
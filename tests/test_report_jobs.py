@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.jobs import _render_charts, job_queue, run_report_job
+from app.models.database import JobOperations, TransactionOperations, migrate
+from app.models.database.db_connection import close_pools
+from app.models.database.job_operations import JobLimitError
+
+PARAMS = {"start_date": "2024-01-01", "end_date": "2024-01-31", "engine": "sql", "charts": False}
+
+def seed(db_name):
+    conn = sqlite3.connect(db_name)
+    migrate(conn)
+    conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+    conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (2, 'Jane', 'jane@example.com', 'x')")
+    conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (1, 1, 'Checking', 100000, 'USD')")
+    conn.commit()
+    TransactionOperations(conn).add_transaction(1, '2024-01-02', 1250, 'Expense', 'Lunch', 'Food')
+    TransactionOperations(conn).add_transaction(1, '2024-01-05', 30000, 'Income', 'Salary', 'Salary')
+    return conn
+
+class TestJobOperations(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        migrate(self.conn)
+        self.jobs = JobOperations(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_job_lifecycle(self):
+        job_id = self.jobs.create_job(1, 'html', PARAMS)
+        self.assertEqual(self.jobs.get_job(job_id)['status'], 'queued')
+        self.assertEqual(self.jobs.get_job(job_id)['params'], PARAMS)
+        self.assertTrue(self.jobs.start_job(job_id))
+        self.assertFalse(self.jobs.start_job(job_id))
+        self.assertTrue(self.jobs.finish_job(job_id, '/tmp/report-1.html'))
+        job = self.jobs.get_job(job_id)
+        self.assertEqual((job['status'], job['result_path']), ('done', '/tmp/report-1.html'))
+        self.assertFalse(self.jobs.fail_job(job_id, 'too late'))
+        self.assertIsNone(self.jobs.get_job(job_id + 1))
+
+    def test_limits(self):
+        self.jobs.create_job(1, 'html', PARAMS, max_active=2, max_active_per_user=1)
+        with self.assertRaises(JobLimitError) as raised:
+            self.jobs.create_job(1, 'pdf', PARAMS, max_active=2, max_active_per_user=1)
+        self.assertEqual(raised.exception.scope, 'user')
+        self.jobs.create_job(2, 'html', PARAMS, max_active=2, max_active_per_user=1)
+        with self.assertRaises(JobLimitError) as raised:
+            self.jobs.create_job(3, 'html', PARAMS, max_active=2, max_active_per_user=1)
+        self.assertEqual(raised.exception.scope, 'queue')
+        self.assertEqual(self.jobs.count_active(), 2)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.jobs.create_job(1, 'docx', PARAMS)
+
+    def test_abandoned_jobs_are_failed(self):
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        orphan = self.jobs.create_job(1, 'html', PARAMS, max_active_per_user=3, owner_pid=child.pid)
+        old = self.jobs.create_job(1, 'html', PARAMS, max_active_per_user=3, owner_pid=os.getpid())
+        self.conn.execute("UPDATE report_jobs SET created_at = '2000-01-01T00:00:00+00:00' WHERE id = ?", (old,))
+        live = self.jobs.create_job(1, 'html', PARAMS, max_active_per_user=3, owner_pid=os.getpid())
+        self.assertEqual(self.jobs.fail_stale_jobs(max_age=60), 2)
+        self.assertEqual([self.jobs.get_job(job_id)['status'] for job_id in (orphan, old, live)], ['failed', 'failed', 'queued'])
+        self.assertEqual(self.jobs.count_active(1), 1)
+
+class TestRunReportJob(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.output_dir = tempfile.mkdtemp()
+        self.conn = seed(self.db_name)
+        self.jobs = JobOperations(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.output_dir)
+        os.remove(self.db_name)
+
+    def test_html_report_with_charts(self):
+        job_id = self.jobs.create_job(1, 'html', dict(PARAMS, charts=True))
+        path = run_report_job(self.db_name, job_id, self.output_dir)
+        self.assertEqual(self.jobs.get_job(job_id)['status'], 'done')
+        with open(path) as f:
+            html = f.read()
+        self.assertIn('Total Balance: 1287.50', html)
+        self.assertEqual(html.count('data:image/png;base64,'), 2)
+
+    def test_charts_per_currency(self):
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (2, 1, 'Yen', 0, 'JPY')")
+        self.conn.commit()
+        TransactionOperations(self.conn).add_transaction(2, '2024-01-03', 500, 'Expense', 'Tea', 'Food')
+        with patch('app.jobs._png', side_effect=lambda figure, pyplot: figure.axes[0].get_title()):
+            charts = _render_charts(self.conn, 1, PARAMS)
+        self.assertEqual(charts, [
+            'Expenses by category (JPY)', 'Net cash flow per day (JPY)',
+            'Expenses by category (USD)', 'Net cash flow per day (USD)',
+        ])
+
+    def test_pdf_report(self):
+        job_id = self.jobs.create_job(1, 'pdf', PARAMS)
+        with patch('pdfkit.from_string') as from_string:
+            path = run_report_job(self.db_name, job_id, self.output_dir)
+        self.assertTrue(path.endswith(f'report-{job_id}.pdf'))
+        self.assertIn('Financial Report', from_string.call_args[0][0])
+        self.assertEqual(self.jobs.get_job(job_id)['status'], 'done')
+
+    def test_sweep_deletes_expired_results(self):
+        job_id = self.jobs.create_job(1, 'html', PARAMS)
+        path = run_report_job(self.db_name, job_id, self.output_dir)
+        job_queue.sweep(self.conn)
+        self.assertTrue(os.path.exists(path))
+        self.conn.execute("UPDATE report_jobs SET finished_at = '2000-01-01T00:00:00+00:00' WHERE id = ?", (job_id,))
+        job_queue.sweep(self.conn)
+        self.assertFalse(os.path.exists(path))
+        job = self.jobs.get_job(job_id)
+        self.assertEqual((job['status'], job['result_path']), ('expired', None))
+
+    def test_failure_is_recorded(self):
+        job_id = self.jobs.create_job(99, 'html', PARAMS)
+        self.assertIsNone(run_report_job(self.db_name, job_id, self.output_dir))
+        job = self.jobs.get_job(job_id)
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('User with ID 99 not found', job['error'])
+
+class TestReportJobRoutes(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.output_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        seed(self.db_name).close()
+        self.app = create_app()
+        self.app.config.update(RATELIMIT_ENABLED=False)
+        job_queue.configure(db_name=self.db_name, workers=1, output_dir=self.output_dir)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.client.set_cookie('access_token_cookie', create_access_token(identity='1'))
+            self.other_token = create_access_token(identity='2')
+
+    def tearDown(self):
+        job_queue.shutdown()
+        close_pools()
+        self.env.stop()
+        shutil.rmtree(self.output_dir)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_queued_report_can_be_downloaded(self):
+        response = self.client.get('/generate_report?start_date=2024-01-01&end_date=2024-01-31&async=1')
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json['status_url']
+        self.assertEqual(response.headers['Location'], status_url)
+
+        deadline = time.monotonic() + 60
+        status = self.client.get(status_url).json
+        while status['status'] in ('queued', 'running') and time.monotonic() < deadline:
+            time.sleep(0.1)
+            status = self.client.get(status_url).json
+        self.assertEqual(status['status'], 'done', status)
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn(b'Total Balance: 1287.50', download.data)
+
+        self.client.set_cookie('access_token_cookie', self.other_token)
+        self.assertEqual(self.client.get(status_url).status_code, 403)
+
+    def test_download_before_done(self):
+        conn = sqlite3.connect(self.db_name)
+        job_id = JobOperations(conn).create_job(1, 'pdf', PARAMS)
+        conn.close()
+        response = self.client.get(f'/reports/jobs/{job_id}/download')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['status'], 'queued')
+        self.assertEqual(self.client.get('/reports/jobs/999').status_code, 404)
+
+    def test_rejected_when_limits_reached(self):
+        with patch.object(job_queue, 'enqueue', side_effect=JobLimitError('too many', 'user')):
+            self.assertEqual(self.client.get('/generate_report?format=pdf').status_code, 429)
+        with patch.object(job_queue, 'enqueue', side_effect=JobLimitError('full', 'queue')):
+            self.assertEqual(self.client.get('/generate_report?format=pdf').status_code, 503)
+        self.assertEqual(self.client.get('/generate_report?format=docx').status_code, 400)
+
+    def test_pdf_needs_wkhtmltopdf(self):
+        with patch('app.jobs.shutil.which', return_value=None):
+            response = self.client.get('/generate_report?format=pdf')
+        self.assertEqual(response.status_code, 501)
+        self.assertIn('wkhtmltopdf', response.json['error'])
+        self.assertEqual(self.client.get('/reports/jobs/1').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import sqlite3
+import unittest
+from app.models.database import RollupOperations, TransactionOperations, migrate
+
+class TestRollupOperations(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 1000)")
+        self.conn.commit()
+        self.transaction_operations = TransactionOperations(self.conn)
+        self.rollup_operations = RollupOperations(self.conn)
+
+    def _daily(self):
+        return [tuple(row) for row in self.rollup_operations.get_daily_totals(1)]
+
+    def test_add_transaction_updates_rollups(self):
+        self.transaction_operations.add_transaction(1, '2024-01-05', 100, 'Income', 'Salary', 'Salary')
+        self.transaction_operations.add_transaction(1, '2024-01-05', 30, 'Expense', 'Lunch', 'Food')
+        self.transaction_operations.add_transaction(1, '2024-01-05', 20, 'Expense', 'Dinner', 'Food')
+        self.assertEqual(self._daily(), [('2024-01-05', 'Expense', 'Food', -50), ('2024-01-05', 'Income', 'Salary', 100)])
+        self.assertEqual(self.rollup_operations.check_consistency(), [])
+
+    def test_update_and_delete_keep_rollups_consistent(self):
+        transaction_id = self.transaction_operations.add_transaction(1, '2024-01-05', 30, 'Expense', 'Lunch', 'Food')
+        self.transaction_operations.update_transaction(transaction_id, '2024-02-01', 40, 'Expense', 'Lunch', 'Dining')
+        self.assertEqual(self._daily(), [('2024-02-01', 'Expense', 'Dining', -40)])
+        self.transaction_operations.delete_transaction(transaction_id)
+        self.assertEqual(self._daily(), [])
+        self.assertEqual(self.rollup_operations.check_consistency(), [])
+
+    def test_check_consistency_detects_drift_and_rebuild_repairs(self):
+        self.transaction_operations.add_transaction(1, '2024-01-05', 30, 'Expense', 'Lunch', 'Food')
+        self.conn.execute("INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (1, '2024-01-06', 10, 'Expense', 'Raw', 'Food')")
+        self.conn.commit()
+        mismatches = self.rollup_operations.check_consistency()
+        self.assertEqual({table for table, _ in mismatches}, {'account_daily_rollups'})
+        self.rollup_operations.rebuild()
+        self.assertEqual(self.rollup_operations.check_consistency(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+import bcrypt
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.models.database import migrate
+from app.models.database.db_connection import close_pools
+from app.passwords import HasherBusyError, password_hasher
+
+class TestAuthRoutes(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        conn = sqlite3.connect(self.db_name)
+        migrate(conn)
+        conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', ?)", (generate_password_hash('secret1'),))
+        conn.commit()
+        conn.close()
+        self.app = create_app()
+        self.app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False)
+        password_hasher.configure(rounds=4)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        close_pools()
+        self.env.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def stored_hash(self, email):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            row = conn.execute("SELECT hashed_password FROM users WHERE email = ?", (email,)).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def test_login_upgrades_legacy_hash(self):
+        response = self.client.post('/login', data={'email': 'john@example.com', 'password': 'secret1'})
+        self.assertEqual(response.status_code, 302)
+        upgraded = self.stored_hash('john@example.com')
+        self.assertTrue(upgraded.startswith('$2b$04$'))
+
+        response = self.client.post('/login', data={'email': 'john@example.com', 'password': 'secret1'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.stored_hash('john@example.com'), upgraded)
+
+    def test_login_upgrades_plain_bcrypt_blob(self):
+        # As stored before passwords were pre-hashed: the raw password, as a BLOB
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            conn.execute("UPDATE users SET hashed_password = ? WHERE id = 1", (bcrypt.hashpw(b'secret1', bcrypt.gensalt(4)),))
+        conn.close()
+        self.assertEqual(self.client.post('/login', data={'email': 'john@example.com', 'password': 'wrong'}).status_code, 400)
+        response = self.client.post('/login', data={'email': 'john@example.com', 'password': 'secret1'})
+        self.assertEqual(response.status_code, 302)
+        upgraded = self.stored_hash('john@example.com')
+        self.assertIsInstance(upgraded, str)
+        self.assertEqual(password_hasher.check('secret1', upgraded), (True, False))
+
+    def test_login_token_identifies_the_user(self):
+        self.client.post('/login', data={'email': 'john@example.com', 'password': 'secret1'})
+        response = self.client.get('/profile', headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json['id'], response.json['email']), (1, 'john@example.com'))
+
+    def test_expired_token_logs_only_subject_and_jti(self):
+        with self.app.app_context():
+            token = create_access_token(identity='1', expires_delta=timedelta(seconds=-1), additional_claims={'is_admin': True})
+        self.client.set_cookie('access_token_cookie', token)
+        with self.assertLogs('app', level='INFO') as logs:
+            response = self.client.get('/profile', headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertIn('subject 1', logs.output[0])
+        self.assertNotIn('is_admin', logs.output[0])
+
+    def test_login_rejects_bad_credentials(self):
+        self.assertEqual(self.client.post('/login', data={'email': 'john@example.com', 'password': 'wrong'}).status_code, 400)
+        self.assertEqual(self.client.post('/login', data={'email': 'nobody@example.com', 'password': 'secret1'}).status_code, 400)
+
+    def test_login_busy(self):
+        with patch.object(password_hasher, 'check', side_effect=HasherBusyError('busy')):
+            response = self.client.post('/login', data={'email': 'john@example.com', 'password': 'secret1'})
+        self.assertEqual(response.status_code, 503)
+
+    def test_register_checks_email_once(self):
+        form = {'name': 'Jane', 'email': 'jane@example.com', 'password': 'secret2', 'confirm_password': 'secret2'}
+        with patch('app.models.database.user_operations.UserOperations.get_user_by_email') as get_user_by_email:
+            response = self.client.post('/register', data=form)
+        self.assertEqual(response.status_code, 302)
+        get_user_by_email.assert_not_called()
+        self.assertTrue(self.stored_hash('jane@example.com').startswith('$2b$04$'))
+
+        self.assertEqual(self.client.post('/register', data=form).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import Flask, render_template_string
+from flask_jwt_extended import create_access_token
+from app import create_app, templating
+from app.instrumentation import MetricsRegistry
+from app.models.database import TransactionOperations, get_connection, migrate
+from app.models.database.db_connection import close_pools
+from finance.report_cache import report_cache
+
+class TestTemplateEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_precompiled_with_bytecode_cache(self):
+        app = Flask(__name__, template_folder=templating.TEMPLATE_DIR)
+        app.config.update(TEMPLATE_BYTECODE_CACHE_DIR=self.cache_dir)
+        templating.init_app(app)
+        self.assertIn('report.html', [name for _, name in app.jinja_env.cache.keys()])
+        self.assertTrue(os.listdir(self.cache_dir))
+        self.assertEqual(app.jinja_env.filters['money'](1250), '12.50')
+
+    def test_template_env_renders_outside_flask(self):
+        html = templating.template_env().get_template('report.html').render(
+            report={'balance_sheet': '<b>', 'budget_report': '', 'cash_flow_statement': ''}
+        )
+        self.assertIn('&lt;b&gt;', html)
+        self.assertIs(templating.template_env(), templating.template_env())
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        conn = sqlite3.connect(self.db_name)
+        migrate(conn)
+        conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (1, 1, 'Checking', 100000, 'USD')")
+        conn.commit()
+        conn.close()
+        self.app = create_app()
+        self.registry = self.app.extensions['instrumentation'] = MetricsRegistry()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.client.set_cookie('access_token_cookie', create_access_token(identity='1'))
+
+    def tearDown(self):
+        report_cache.clear()
+        close_pools()
+        self.env.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_name + suffix):
+                os.remove(self.db_name + suffix)
+
+    def test_account_list_cached_until_a_write(self):
+        self.assertIn(b'1000.00 USD', self.client.get('/accounts').data)
+        self.assertIn(b'1000.00 USD', self.client.get('/accounts').data)
+        self.assertIn('finance_template_fragment_cache_total{fragment="account_list",result="hit"} 1', self.registry.render())
+
+        with self.app.app_context():
+            TransactionOperations(get_connection()).add_transaction(1, '2024-01-02', 1250, 'Expense', 'Lunch', 'Food')
+        self.assertIn(b'987.50 USD', self.client.get('/accounts').data)
+        self.assertIn('finance_template_fragment_cache_total{fragment="account_list",result="miss"} 2', self.registry.render())
+
+    def test_write_from_another_process_is_seen(self):
+        self.assertIn(b'1000.00 USD', self.client.get('/accounts').data)
+        # Another worker's write never reaches this process's report_cache
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            conn.execute("UPDATE accounts SET balance = 50000 WHERE id = 1")
+        conn.close()
+        self.assertIn(b'500.00 USD', self.client.get('/accounts').data)
+
+    def test_fragments_are_per_user(self):
+        template = '{% call cached_fragment("greeting", user_id) %}{{ name }}{% endcall %}'
+        with self.app.test_request_context():
+            self.assertEqual(render_template_string(template, user_id=1, name='John'), 'John')
+            self.assertEqual(render_template_string(template, user_id=1, name='Stale'), 'John')
+            self.assertEqual(render_template_string(template, user_id=2, name='Jane'), 'Jane')
+            report_cache.invalidate_user(1)
+            self.assertEqual(render_template_string(template, user_id=1, name='Johnny'), 'Johnny')
+            self.app.config['TEMPLATE_FRAGMENT_CACHE'] = False
+            self.assertEqual(render_template_string(template, user_id=2, name='Janet'), 'Janet')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.models.database import TransactionOperations, migrate
+from app.models.database.db_connection import close_pools
+from export_transactions import export_file
+from finance.transaction_export import COLUMNS, export_transactions
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+def seed(conn):
+    migrate(conn)
+    conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+    conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (2, 'Jane', 'jane@example.com', 'x')")
+    conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (1, 1, 'Checking', 100000, 'USD')")
+    conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (2, 1, 'Yen', 0, 'JPY')")
+    conn.execute("INSERT INTO accounts (id, user_id, name, balance, currency) VALUES (3, 2, 'Other', 0, 'USD')")
+    conn.commit()
+    operations = TransactionOperations(conn)
+    operations.add_transaction(1, '2024-01-03', 1250, 'Expense', 'Lunch', 'Food')
+    operations.add_transaction(2, '2024-01-01', 500, 'Income', 'Gift', 'Gifts')
+    operations.add_transaction(1, '2024-01-02', 10, 'Expense', 'Gum', None)
+    operations.add_transaction(2, '2024-01-03', 700, 'Expense', 'Tea', 'Food')
+    operations.add_transaction(3, '2024-01-02', 99, 'Expense', 'Not mine', 'Food')
+
+class TestTransactionExport(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        seed(self.conn)
+        self.operations = TransactionOperations(self.conn)
+        self.currencies = {1: 'USD', 2: 'JPY'}
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_chunks_merge_accounts_in_date_order(self):
+        chunks = list(self.operations.iter_transaction_chunks(account_ids=[1, 2], chunk_size=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+        self.assertEqual([(row[2], row[0]) for chunk in chunks for row in chunk],
+                         [('2024-01-01', 2), ('2024-01-02', 3), ('2024-01-03', 1), ('2024-01-03', 4)])
+        rows = self.operations.iter_transaction_chunks(account_ids=[1, 2], start_date='2024-01-02', end_date='2024-01-02')
+        self.assertEqual([row[0] for chunk in rows for row in chunk], [3])
+
+    def test_csv(self):
+        chunks = self.operations.iter_transaction_chunks(account_ids=[1, 2], chunk_size=2)
+        frame = pd.read_csv(io.BytesIO(b''.join(export_transactions(chunks, self.currencies, 'csv'))))
+        self.assertEqual(list(frame.columns), COLUMNS)
+        self.assertEqual(list(frame['amount']), [500.0, 0.1, 12.5, 700.0])
+        self.assertEqual(list(frame['currency']), ['JPY', 'USD', 'USD', 'JPY'])
+        self.assertEqual(b''.join(export_transactions(iter(()), {}, 'csv')).decode(), ','.join(COLUMNS) + '\n')
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_has_a_row_group_per_chunk(self):
+        import pyarrow.parquet as pq
+        chunks = self.operations.iter_transaction_chunks(account_ids=[1, 2], chunk_size=2)
+        data = b''.join(export_transactions(chunks, self.currencies, 'parquet'))
+        parquet = pq.ParquetFile(io.BytesIO(data))
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column_names, COLUMNS)
+        self.assertEqual(str(table.schema.field('date').type), 'date32[day]')
+        self.assertEqual(table.column('amount').to_pylist(), [500.0, 0.1, 12.5, 700.0])
+        self.assertEqual(table.column('category_name').to_pylist()[1], None)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_transactions(iter(()), {}, 'xlsx')
+
+class TestExportRouteAndCli(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.env = patch.dict(os.environ, {'DB_NAME': self.db_name, 'JWT_SECRET_KEY': 'test-secret-key-test-secret-key!', 'SECRET_KEY': 'test'})
+        self.env.start()
+        conn = sqlite3.connect(self.db_name)
+        seed(conn)
+        conn.close()
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.client.set_cookie('access_token_cookie', create_access_token(identity='1'))
+
+    def tearDown(self):
+        close_pools()
+        self.env.stop()
+        for path in (self.db_name, self.db_name + '-wal', self.db_name + '-shm', self.db_name + '.csv'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_export_route(self):
+        response = self.client.get('/transactions/export?start_date=2024-01-02')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        frame = pd.read_csv(io.BytesIO(response.data))
+        self.assertEqual(list(frame['id']), [3, 1, 4])
+
+        response = self.client.get('/transactions/export?account_id=2')
+        self.assertEqual(list(pd.read_csv(io.BytesIO(response.data))['id']), [2, 4])
+
+    def test_export_route_rejects_bad_requests(self):
+        self.assertEqual(self.client.get('/transactions/export?format=xlsx').status_code, 400)
+        self.assertEqual(self.client.get('/transactions/export?end_date=01/02/2024').status_code, 400)
+        self.assertEqual(self.client.get('/transactions/export?account_id=3').status_code, 403)
+
+    def test_cli(self):
+        stats = export_file(self.db_name + '.csv', account_ids=[3], db_name=self.db_name)
+        self.assertEqual(stats['rows'], 1)
+        frame = pd.read_csv(self.db_name + '.csv')
+        self.assertEqual(list(frame['description']), ['Not mine'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import sqlite3
+import unittest
+from app.models.database import RollupOperations, TransactionOperations, migrate
+from finance.transaction_import import parse_records
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240105120000<TRNAMT>1500.00<NAME>Payroll</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240106<TRNAMT>-42.50<NAME>Grocer</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+class TestTransactionImport(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 10000)")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (2, 1, 'Savings', 0)")
+        self.conn.execute("INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (1, 'Food', 50000, 1000)")
+        self.conn.commit()
+        self.transaction_operations = TransactionOperations(self.conn)
+
+    def _balance(self, account_id):
+        return self.conn.execute("SELECT balance FROM accounts WHERE id = ?", (account_id,)).fetchone()[0]
+
+    def test_csv_import_applies_net_deltas(self):
+        csv_data = (
+            "account_id,date,amount,type,description,category_name\n"
+            "1,2024-01-01,1000,Income,Salary,Salary\n"
+            "1,2024-01-02,30,Expense,Lunch,Food\n"
+            "2,2024-01-02,-20,,Dinner,Food\n"
+            "1,2024-01-03,15,Expense,Snack,Food\n"
+        )
+        stats = self.transaction_operations.import_transactions(parse_records(csv_data, 'csv'), batch_size=2)
+        self.assertEqual(stats['imported'], 4)
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(self._balance(1), (100 + 1000 - 30 - 15) * 100)
+        self.assertEqual(self._balance(2), -2000)
+        amount_used = self.conn.execute("SELECT amount_used FROM budgets WHERE category_name = 'Food'").fetchone()[0]
+        self.assertEqual(amount_used, (10 + 30 + 20 + 15) * 100)
+        self.assertEqual(RollupOperations(self.conn).check_consistency(), [])
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        records = [
+            {"date": "2024-01-01", "amount": "5", "type": "Expense", "description": "ok", "category_name": "Food"},
+            {"date": "2024-01-01", "amount": "5", "type": "Expense", "description": "", "category_name": "Food"},
+            {"date": "2024-01-01", "amount": "5", "type": "Refund", "description": "x"},
+            {"date": "2024-01-01", "amount": "5", "type": "Expense", "description": "x", "account_id": 99},
+            {"date": "2024-01-01", "amount": "-5", "type": "Income", "description": "x", "account_id": 1},
+        ]
+        stats = self.transaction_operations.import_transactions(records, account_id=None)
+        self.assertEqual(stats['imported'], 0)
+        self.assertEqual([error['row'] for error in stats['errors']], [1, 2, 3, 4, 5])
+        stats = self.transaction_operations.import_transactions(records[:1], account_id=1)
+        self.assertEqual(stats['imported'], 1)
+
+    def test_jsonl_and_ofx_parsers(self):
+        jsonl = io.StringIO('{"date": "2024-01-01", "amount": 5, "type": "income", "description": "Gift"}\n\n')
+        self.assertEqual(list(parse_records(jsonl, 'jsonl'))[0]['description'], 'Gift')
+        stats = self.transaction_operations.import_transactions(parse_records(OFX, 'ofx'), account_id=1)
+        self.assertEqual(stats['imported'], 2)
+        rows = self.conn.execute("SELECT date, amount, type FROM transactions ORDER BY id").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [('2024-01-05', 150000, 'Income'), ('2024-01-06', 4250, 'Expense')])
+
+    def test_unreadable_lines_are_skipped_after_earlier_batches(self):
+        jsonl = (
+            '{"date": "2024-01-01", "amount": 5, "type": "Income", "description": "One"}\n'
+            '{"date": "2024-01-02", "amount": 5, "type": "Income", "description": "Two"}\n'
+            '{"date": "2024-01-03", "amount": \n'
+            '{"date": "2024-01-04", "amount": 5, "type": "Income", "description": "Four"}\n'
+        )
+        stats = self.transaction_operations.import_transactions(parse_records(jsonl, 'jsonl'), account_id=1, batch_size=1)
+        self.assertEqual((stats['imported'], stats['skipped']), (3, 1))
+        self.assertEqual(stats['errors'][0]['row'], 3)
+        self.assertIn('Invalid JSON', stats['errors'][0]['error'])
+
+        ofx = OFX.replace('<TRNAMT>1500.00', '')
+        stats = self.transaction_operations.import_transactions(parse_records(ofx, 'ofx'), account_id=1)
+        self.assertEqual((stats['imported'], stats['skipped']), (1, 1))
+        self.assertEqual(stats['errors'], [{'row': 1, 'error': 'Missing OFX field: TRNAMT'}])
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            parse_records("", 'xls')
+
+if __name__ == '__main__':
+    unittest.main()
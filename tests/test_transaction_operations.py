@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import sqlite3
-from app.models.database import TransactionOperations
+from app.models.database import AccountOperations, RollupOperations, TransactionOperations, migrate
 
 class TestTransactionOperations(unittest.TestCase):
     def setUp(self):
@@ -30,7 +30,7 @@ class TestTransactionOperations(unittest.TestCase):
         mock_transaction = MockTransaction.return_value
         mock_transaction.type = 'Expense'
         mock_transaction.amount = 100
-        mock_budget = {'amount': 500, 'amount_used': 200}
+        mock_budget = {'user_id': 1, 'amount': 500, 'amount_used': 300}
         self.conn.execute.return_value.fetchone.side_effect = [mock_budget]
 
         self.transaction_operations.add_transaction(1, '2024-06-28', 100, 'Expense', 'Groceries', 'Food')
@@ -44,8 +44,8 @@ class TestTransactionOperations(unittest.TestCase):
             (100, 1)
         )
         self.conn.execute.assert_any_call(
-            'UPDATE budgets SET amount_used = ? WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ?',
-            (300, 1, 'Food')
+            'UPDATE budgets SET amount_used = amount_used + ? WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ? RETURNING user_id, amount, amount_used',
+            (100, 1, 'Food')
         )
 
     @patch('finance.transaction.Transaction')
@@ -69,7 +69,7 @@ class TestTransactionOperations(unittest.TestCase):
 
     def test_delete_transaction_expense(self):
         mock_transaction = {'account_id': 1, 'amount': 100, 'type': 'Expense', 'category_name': 'Food'}
-        mock_budget = {'amount': 500, 'amount_used': 200}
+        mock_budget = {'user_id': 1, 'amount': 500, 'amount_used': 300}
         self.conn.execute.return_value.fetchone.side_effect = [mock_transaction, mock_budget]
 
         self.transaction_operations.delete_transaction(1)
@@ -77,8 +77,8 @@ class TestTransactionOperations(unittest.TestCase):
         self.conn.execute.assert_any_call("DELETE FROM transactions WHERE id = ?", (1,))
         self.conn.execute.assert_any_call('UPDATE accounts SET balance = balance + ? WHERE id = ?', (100, 1))
         self.conn.execute.assert_any_call(
-            'UPDATE budgets SET amount_used = ? WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ?',
-            (100, 1, 'Food')
+            'UPDATE budgets SET amount_used = amount_used + ? WHERE user_id = (SELECT user_id FROM accounts WHERE id = ?) AND category_name = ? RETURNING user_id, amount, amount_used',
+            (-100, 1, 'Food')
         )
 
     def test_get_transactions(self):
@@ -103,5 +103,144 @@ class TestTransactionOperations(unittest.TestCase):
         self.assertEqual(transaction['amount'], 500)
         self.assertEqual(transaction['description'], 'Salary')
 
+
+class TestTransactionPagination(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 0)")
+        self.conn.executemany(
+            "INSERT INTO transactions (account_id, date, amount, type, description, category_name) VALUES (1, ?, 10, 'Expense', 'Lunch', 'Food')",
+            [('2024-01-02',), ('2024-01-01',), ('2024-01-02',), ('2024-01-03',), ('2024-01-01',)]
+        )
+        self.conn.commit()
+        self.transaction_operations = TransactionOperations(self.conn)
+
+    def test_pages_follow_date_then_id_order(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = self.transaction_operations.get_transactions_page(account_ids=[1], limit=2, cursor=cursor)
+            seen.extend((t['date'], t['id']) for t in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len(seen), 5)
+
+    def test_last_page_has_no_cursor(self):
+        page, cursor = self.transaction_operations.get_transactions_page(account_ids=[1], limit=5)
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(cursor)
+
+    def test_iter_transactions_resumes_from_cursor(self):
+        _, cursor = self.transaction_operations.get_transactions_page(account_ids=[1], limit=3)
+        rest = list(self.transaction_operations.iter_transactions(account_ids=[1], cursor=cursor, chunk_size=1))
+        self.assertEqual([t['date'] for t in rest], ['2024-01-02', '2024-01-03'])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.transaction_operations.get_transactions_page(account_ids=[1], cursor='not-a-cursor')
+
+class TestUpdateTransactionDeltas(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 1000)")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (2, 1, 'Savings', 500)")
+        self.conn.execute("INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (1, 'Food', 1000, 0)")
+        self.conn.execute("INSERT INTO budgets (user_id, category_name, amount, amount_used) VALUES (1, 'Rent', 1000, 0)")
+        self.conn.commit()
+        self.transaction_operations = TransactionOperations(self.conn)
+        self.transaction_id = self.transaction_operations.add_transaction(1, '2024-06-28', 100, 'Expense', 'Groceries', 'Food')
+
+    def balance(self, account_id):
+        return self.conn.execute("SELECT balance FROM accounts WHERE id = ?", (account_id,)).fetchone()[0]
+
+    def amount_used(self, category_name):
+        return self.conn.execute("SELECT amount_used FROM budgets WHERE category_name = ?", (category_name,)).fetchone()[0]
+
+    def assertLedgerConsistent(self):
+        self.assertEqual(AccountOperations(self.conn).check_balances(), [])
+        self.assertEqual(RollupOperations(self.conn).check_consistency(), [])
+
+    def test_amount_change(self):
+        self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 150, 'Expense', 'Groceries', 'Food')
+        self.assertEqual(self.balance(1), 850)
+        self.assertEqual(self.amount_used('Food'), 150)
+        self.assertLedgerConsistent()
+
+    def test_category_change(self):
+        self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 100, 'Expense', 'Rent', 'Rent')
+        self.assertEqual(self.amount_used('Food'), 0)
+        self.assertEqual(self.amount_used('Rent'), 100)
+        self.assertLedgerConsistent()
+
+    def test_type_change(self):
+        self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 100, 'Income', 'Refund', 'Food')
+        self.assertEqual(self.balance(1), 1100)
+        self.assertEqual(self.amount_used('Food'), 0)
+        self.assertLedgerConsistent()
+
+    def test_account_change(self):
+        self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 100, 'Expense', 'Groceries', 'Food', account_id=2)
+        self.assertEqual(self.balance(1), 1000)
+        self.assertEqual(self.balance(2), 400)
+        self.assertEqual(self.amount_used('Food'), 100)
+        self.assertEqual(self.transaction_operations.get_transaction(self.transaction_id)['account_id'], 2)
+        self.assertLedgerConsistent()
+
+class TestOwnershipCheckedTransactions(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        migrate(self.conn)
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'John', 'john@example.com', 'x')")
+        self.conn.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (2, 'Jane', 'jane@example.com', 'x')")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (1, 1, 'Checking', 1000)")
+        self.conn.execute("INSERT INTO accounts (id, user_id, name, balance) VALUES (2, 2, 'Jane Checking', 1000)")
+        self.conn.commit()
+        self.transaction_operations = TransactionOperations(self.conn)
+        self.transaction_id = self.transaction_operations.add_transaction(1, '2024-06-28', 100, 'Expense', 'Groceries', 'Food')
+
+    def balance(self, account_id):
+        return self.conn.execute("SELECT balance FROM accounts WHERE id = ?", (account_id,)).fetchone()[0]
+
+    def test_get_checks_owner(self):
+        self.assertEqual(self.transaction_operations.get_transaction(self.transaction_id, user_id=1)['amount'], 100)
+        with self.assertRaises(PermissionError):
+            self.transaction_operations.get_transaction(self.transaction_id, user_id=2)
+        self.assertIsNone(self.transaction_operations.get_transaction(999, user_id=1))
+
+    def test_update_checks_owner_in_one_write_transaction(self):
+        with self.assertRaises(PermissionError):
+            self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 500, 'Expense', 'Groceries', 'Food', user_id=2)
+        self.assertFalse(self.conn.in_transaction)
+        self.assertEqual(self.balance(1), 900)
+        with self.assertRaises(PermissionError):
+            self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 100, 'Expense', 'Groceries', 'Food', account_id=2, user_id=1)
+        with self.assertRaises(ValueError):
+            self.transaction_operations.update_transaction(999, '2024-06-28', 100, 'Expense', 'Groceries', 'Food', user_id=1)
+
+        queries = []
+        self.conn.set_trace_callback(queries.append)
+        self.transaction_operations.update_transaction(self.transaction_id, '2024-06-28', 150, 'Expense', 'Groceries', 'Food', user_id=1)
+        self.conn.set_trace_callback(None)
+        self.assertEqual(self.balance(1), 850)
+        self.assertEqual(queries[0], 'BEGIN IMMEDIATE')
+        self.assertEqual(sum(1 for query in queries if query.strip().startswith('SELECT')), 1)
+
+    def test_delete_checks_owner(self):
+        with self.assertRaises(PermissionError):
+            self.transaction_operations.delete_transaction(self.transaction_id, user_id=2)
+        self.assertFalse(self.conn.in_transaction)
+        self.assertIsNotNone(self.transaction_operations.get_transaction(self.transaction_id))
+        with self.assertRaises(ValueError):
+            self.transaction_operations.delete_transaction(999, user_id=1)
+        self.transaction_operations.delete_transaction(self.transaction_id, user_id=1)
+        self.assertIsNone(self.transaction_operations.get_transaction(self.transaction_id))
+        self.assertEqual(self.balance(1), 1000)
+
 if __name__ == '__main__':
     unittest.main()